@@ -1,4 +1,11 @@
+from functools import partial
+
+from django.db import transaction
 from rest_framework import serializers
+from api.v1.products.attributes import attribute_registry
+from api.v1.products.cache import CatalogCache
+from api.v1.products.counters import CategoryCounters
+from api.v1.products.redemptions import CouponRedemptions
 from apps.products.models import Product, Category, ProductImage, ProductSKU, ProductAttribute, ProductDetail, ProductReview, Coupon, CouponUsage
 from apps.orders.models import Order, OrderItem
 from apps.users.models import User, Address
@@ -94,6 +101,13 @@ class AdminProductCreateUpdateSerializer(serializers.ModelSerializer):
         fields = ['name', 'summary', 'description', 'category', 'cover', 
                   'original_price', 'featured', 'in_stock', 'images', 'skus', 'details']
     
+    def save(self, **kwargs):
+        """Save and apply the category counter deltas in the same transaction"""
+        with CategoryCounters.track([self.instance.pk] if self.instance else []) as tracked:
+            product = super().save(**kwargs)
+            tracked.add(product.pk)
+        return product
+    
     def create(self, validated_data):
         images_data = validated_data.pop('images', [])
         skus_data = validated_data.pop('skus', [])
@@ -114,16 +128,10 @@ class AdminProductCreateUpdateSerializer(serializers.ModelSerializer):
             color_attr = None
             
             if sku_data.get('size_attribute_id'):
-                try:
-                    size_attr = ProductAttribute.objects.get(id=sku_data['size_attribute_id'], type='size')
-                except ProductAttribute.DoesNotExist:
-                    pass
+                size_attr = attribute_registry.get_by_id(sku_data['size_attribute_id'], ProductAttribute.SIZE)
             
             if sku_data.get('color_attribute_id'):
-                try:
-                    color_attr = ProductAttribute.objects.get(id=sku_data['color_attribute_id'], type='color')
-                except ProductAttribute.DoesNotExist:
-                    pass
+                color_attr = attribute_registry.get_by_id(sku_data['color_attribute_id'], ProductAttribute.COLOR)
             
             ProductSKU.objects.create(
                 product=product,
@@ -138,6 +146,8 @@ class AdminProductCreateUpdateSerializer(serializers.ModelSerializer):
         if details_data:
             ProductDetail.objects.create(product=product, **details_data)
         
+        Product.refresh_sku_aggregates([product.id])
+        CatalogCache.bump_version()
         return product
     
     def update(self, instance, validated_data):
@@ -168,16 +178,10 @@ class AdminProductCreateUpdateSerializer(serializers.ModelSerializer):
                 color_attr = None
                 
                 if sku_data.get('size_attribute_id'):
-                    try:
-                        size_attr = ProductAttribute.objects.get(id=sku_data['size_attribute_id'], type='size')
-                    except ProductAttribute.DoesNotExist:
-                        pass
+                    size_attr = attribute_registry.get_by_id(sku_data['size_attribute_id'], ProductAttribute.SIZE)
                 
                 if sku_data.get('color_attribute_id'):
-                    try:
-                        color_attr = ProductAttribute.objects.get(id=sku_data['color_attribute_id'], type='color')
-                    except ProductAttribute.DoesNotExist:
-                        pass
+                    color_attr = attribute_registry.get_by_id(sku_data['color_attribute_id'], ProductAttribute.COLOR)
                 
                 ProductSKU.objects.create(
                     product=instance,
@@ -187,6 +191,7 @@ class AdminProductCreateUpdateSerializer(serializers.ModelSerializer):
                     size_attribute=size_attr,
                     color_attribute=color_attr
                 )
+            Product.refresh_sku_aggregates([instance.id])
         
         # Update product details if provided
         if details_data:
@@ -195,6 +200,7 @@ class AdminProductCreateUpdateSerializer(serializers.ModelSerializer):
                 defaults=details_data
             )
         
+        CatalogCache.bump_version()
         return instance
 
 
@@ -225,6 +231,23 @@ class AdminCouponSerializer(serializers.ModelSerializer):
         model = Coupon
         fields = '__all__'
     
+    def create(self, validated_data):
+        coupon = super().create(validated_data)
+        CatalogCache.bump_version()
+        return coupon
+    
+    def update(self, instance, validated_data):
+        used_count, usage_limit = instance.used_count, instance.usage_limit
+        coupon = super().update(instance, validated_data)
+        if coupon.used_count != used_count:
+            # A hand-set count replaces what the usage shards hold
+            CouponRedemptions.reset(coupon)
+        if (coupon.used_count, coupon.usage_limit) != (used_count, usage_limit):
+            # Deactivate at once if the new count or limit is already used up
+            transaction.on_commit(partial(CouponRedemptions.settle, coupon.id))
+        CatalogCache.bump_version()
+        return coupon
+    
     def get_is_valid(self, obj):
         """Check if coupon is currently valid"""
         try:
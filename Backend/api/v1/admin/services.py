@@ -5,6 +5,10 @@ from django.contrib.auth import authenticate
 from rest_framework.exceptions import AuthenticationFailed, PermissionDenied, ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.v1.orders.services import OrderService
+from api.v1.products.attributes import attribute_registry
+from api.v1.products.cache import CatalogCache
+from api.v1.products.counters import CategoryCounters
 from apps.products.models import Product, Category, ProductImage, ProductSKU, ProductAttribute, Coupon, CouponUsage
 from apps.orders.models import Order
 from apps.users.models import User
@@ -85,6 +89,7 @@ class AdminProductService:
         )
     
     @staticmethod
+    @transaction.atomic
     def create_product(validated_data):
         """Create a new product"""
         images_data = validated_data.pop('images', [])
@@ -105,22 +110,10 @@ class AdminProductService:
             color_attr = None
             
             if sku_data.get('size_attribute_id'):
-                try:
-                    size_attr = ProductAttribute.objects.get(
-                        id=sku_data['size_attribute_id'],
-                        type=ProductAttribute.SIZE
-                    )
-                except ProductAttribute.DoesNotExist:
-                    pass
+                size_attr = attribute_registry.get_by_id(sku_data['size_attribute_id'], ProductAttribute.SIZE)
             
             if sku_data.get('color_attribute_id'):
-                try:
-                    color_attr = ProductAttribute.objects.get(
-                        id=sku_data['color_attribute_id'],
-                        type=ProductAttribute.COLOR
-                    )
-                except ProductAttribute.DoesNotExist:
-                    pass
+                color_attr = attribute_registry.get_by_id(sku_data['color_attribute_id'], ProductAttribute.COLOR)
             
             ProductSKU.objects.create(
                 product=product,
@@ -131,11 +124,16 @@ class AdminProductService:
                 color_attribute=color_attr
             )
         
+        Product.refresh_sku_aggregates([product.id])
+        CategoryCounters.record({}, [product.id])
+        CatalogCache.bump_version()
         return product
     
     @staticmethod
+    @transaction.atomic
     def update_product(product, validated_data):
         """Update an existing product"""
+        counters_before = CategoryCounters.capture([product.id])
         images_data = validated_data.pop('images', None)
         skus_data = validated_data.pop('skus', None)
         
@@ -163,22 +161,10 @@ class AdminProductService:
                 color_attr = None
                 
                 if sku_data.get('size_attribute_id'):
-                    try:
-                        size_attr = ProductAttribute.objects.get(
-                            id=sku_data['size_attribute_id'],
-                            type=ProductAttribute.SIZE
-                        )
-                    except ProductAttribute.DoesNotExist:
-                        pass
+                    size_attr = attribute_registry.get_by_id(sku_data['size_attribute_id'], ProductAttribute.SIZE)
                 
                 if sku_data.get('color_attribute_id'):
-                    try:
-                        color_attr = ProductAttribute.objects.get(
-                            id=sku_data['color_attribute_id'],
-                            type=ProductAttribute.COLOR
-                        )
-                    except ProductAttribute.DoesNotExist:
-                        pass
+                    color_attr = attribute_registry.get_by_id(sku_data['color_attribute_id'], ProductAttribute.COLOR)
                 
                 ProductSKU.objects.create(
                     product=product,
@@ -188,14 +174,19 @@ class AdminProductService:
                     size_attribute=size_attr,
                     color_attribute=color_attr
                 )
+            Product.refresh_sku_aggregates([product.id])
         
+        CategoryCounters.record(counters_before)
+        CatalogCache.bump_version()
         return product
     
     @staticmethod
     def delete_product(product_id):
         """Delete a product by ID"""
-        product = get_object_or_404(Product, id=product_id)
-        product.delete()
+        with CategoryCounters.track([product_id]):
+            product = get_object_or_404(Product, id=product_id)
+            product.delete()
+        CatalogCache.bump_version()
         return product
 
 
@@ -215,7 +206,9 @@ class AdminCategoryService:
     @staticmethod
     def create_category(validated_data):
         """Create a new category"""
-        return Category.objects.create(**validated_data)
+        category = Category.objects.create(**validated_data)
+        CatalogCache.bump_version()
+        return category
     
     @staticmethod
     def update_category(category, validated_data):
@@ -223,6 +216,7 @@ class AdminCategoryService:
         for attr, value in validated_data.items():
             setattr(category, attr, value)
         category.save()
+        CatalogCache.bump_version()
         return category
     
     @staticmethod
@@ -230,6 +224,7 @@ class AdminCategoryService:
         """Delete a category by ID"""
         category = get_object_or_404(Category, id=category_id)
         category.delete()
+        CatalogCache.bump_version()
         return category
 
 
@@ -239,9 +234,7 @@ class AdminOrderService:
     @staticmethod
     def get_all_orders(status_filter=None):
         """Get all orders, optionally filtered by status"""
-        orders = Order.objects.select_related('user', 'address').prefetch_related(
-            'items__product'
-        ).order_by('-created_at')
+        orders = Order.objects.select_related('user', 'address').order_by('-created_at')
         
         if status_filter:
             orders = orders.filter(status=status_filter)
@@ -257,73 +250,9 @@ class AdminOrderService:
         )
     
     @staticmethod
-    @transaction.atomic
     def update_order_status(order, new_status):
         """Update the status of an order - handles inventory restoration for cancellations"""
-        from django.db.models import F
-        from apps.products.models import Coupon, CouponUsage
-        
-        old_status = order.status
-        
-        # If cancelling, restore inventory
-        if new_status == Order.CANCELLED and old_status != Order.CANCELLED:
-            # Restore inventory for all order items
-            for item in order.items.all():
-                ProductSKU.objects.filter(id=item.sku.id).update(
-                    quantity=F('quantity') + item.quantity
-                )
-                
-                # Update product in_stock status
-                product = item.product
-                has_stock = ProductSKU.objects.filter(
-                    product=product,
-                    quantity__gt=0
-                ).exists()
-                
-                if product.in_stock != has_stock:
-                    product.in_stock = has_stock
-                    product.save(update_fields=['in_stock'])
-            
-            # Handle coupon usage if order had a coupon
-            coupon_usage = CouponUsage.objects.filter(order=order).first()
-            if coupon_usage:
-                # Atomically decrement coupon used count
-                Coupon.objects.filter(id=coupon_usage.coupon.id).update(
-                    used_count=F('used_count') - 1
-                )
-                # Delete coupon usage record
-                coupon_usage.delete()
-        
-        # If uncancelling (changing from cancelled to another status), deduct inventory again
-        elif old_status == Order.CANCELLED and new_status != Order.CANCELLED:
-            for item in order.items.all():
-                # Lock SKU for update
-                sku = ProductSKU.objects.select_for_update().get(id=item.sku.id)
-                
-                # Check if enough stock is available
-                if sku.quantity < item.quantity:
-                    from rest_framework.exceptions import ValidationError
-                    raise ValidationError(f"Insufficient stock to restore order. Available: {sku.quantity}, Required: {item.quantity}")
-                
-                # Deduct inventory
-                ProductSKU.objects.filter(id=item.sku.id).update(
-                    quantity=F('quantity') - item.quantity
-                )
-                
-                # Update product in_stock status
-                product = item.product
-                has_stock = ProductSKU.objects.filter(
-                    product=product,
-                    quantity__gt=0
-                ).exists()
-                
-                if product.in_stock != has_stock:
-                    product.in_stock = has_stock
-                    product.save(update_fields=['in_stock'])
-        
-        order.status = new_status
-        order.save(update_fields=['status'])
-        return order
+        return OrderService.update_order_status(order, new_status)
 
 
 class AdminUserService:
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -12,6 +13,9 @@ from .serializers import (
     AdminProductReviewSerializer, AdminCouponSerializer, AdminCouponUsageSerializer
 )
 from .permissions import IsAdminUser
+from api.v1.orders.fast import FastAdminOrderSerializer
+from api.v1.products.attributes import attribute_registry
+from api.v1.products.cache import CatalogCache
 from .services import (
     AdminAuthService,
     AdminDashboardService,
@@ -20,7 +24,7 @@ from .services import (
     AdminOrderService,
     AdminUserService
 )
-from apps.products.models import ProductAttribute, ProductReview, Coupon, CouponUsage
+from apps.products.models import ProductReview, ProductReviewStats, Coupon, CouponUsage
 
 
 # ==================== ADMIN AUTHENTICATION ====================
@@ -67,10 +71,7 @@ class AdminProductAttributesView(APIView):
     
     def get(self, request):
         attr_type = request.query_params.get('type')  # 'size' or 'color'
-        attributes = ProductAttribute.objects.filter(deleted_at__isnull=True)
-        
-        if attr_type:
-            attributes = attributes.filter(type=attr_type)
+        attributes = attribute_registry.all(attr_type)
         
         serializer = ProductAttributeSerializer(attributes, many=True)
         return Response({
@@ -186,10 +187,10 @@ class AdminOrderListView(APIView):
         status_filter = request.query_params.get('status')
         orders = AdminOrderService.get_all_orders(status_filter=status_filter)
         
-        serializer = AdminOrderSerializer(orders, many=True)
+        data = FastAdminOrderSerializer.serialize_many(orders)
         return Response({
-            'count': len(serializer.data),
-            'data': serializer.data
+            'count': len(data),
+            'data': data
         }, status=status.HTTP_200_OK)
 
 
@@ -198,8 +199,7 @@ class AdminOrderDetailView(APIView):
     
     def get(self, request, order_id):
         order = AdminOrderService.get_order_by_id(order_id)
-        serializer = AdminOrderSerializer(order)
-        return Response({"data": serializer.data}, status=status.HTTP_200_OK)
+        return Response({"data": FastAdminOrderSerializer.serialize(order)}, status=status.HTTP_200_OK)
     
     def patch(self, request, order_id):
         order = AdminOrderService.get_order_by_id(order_id)
@@ -281,8 +281,11 @@ class AdminReviewDetailView(APIView):
         return Response({"data": serializer.data}, status=status.HTTP_200_OK)
     
     def delete(self, request, review_id):
-        review = ProductReview.objects.get(id=review_id)
-        review.delete()
+        with transaction.atomic():
+            review = ProductReview.objects.select_for_update().get(id=review_id)
+            ProductReviewStats.remove_review(review)
+            review.delete()
+            CatalogCache.bump_version()
         return Response({'message': 'Review deleted successfully'}, status=status.HTTP_200_OK)
 
 
@@ -335,6 +338,7 @@ class AdminCouponDetailView(APIView):
     def delete(self, request, coupon_id):
         coupon = Coupon.objects.get(id=coupon_id)
         coupon.delete()
+        CatalogCache.bump_version()
         return Response({'message': 'Coupon deleted successfully'}, status=status.HTTP_200_OK)
 
 
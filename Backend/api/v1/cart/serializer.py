@@ -0,0 +1,25 @@
+from rest_framework import serializers
+from apps.cart.models import StockReservation
+
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    """Serializer for an active cart stock hold"""
+    sku_id = serializers.IntegerField(read_only=True)
+    product_id = serializers.IntegerField(source='sku.product_id', read_only=True)
+    sku = serializers.CharField(source='sku.sku', read_only=True)
+
+    class Meta:
+        model = StockReservation
+        fields = ['sku_id', 'product_id', 'sku', 'quantity', 'expires_at']
+
+
+class ReservationItemSerializer(serializers.Serializer):
+    """Serializer for one SKU hold request; quantity 0 releases the hold"""
+    sku_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class ReservationCreateSerializer(serializers.Serializer):
+    """Serializer for reserving stock for the current user's cart"""
+    items = ReservationItemSerializer(many=True, allow_empty=False)
+    ttl = serializers.IntegerField(required=False, min_value=1, help_text="Hold lifetime in seconds")
@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from api.v1.products.stripes import StripedStock
+from apps.cart.models import Cart, StockReservation
+from apps.products.models import ProductSKU
+
+
+class ReservationService:
+    """
+    Time-limited stock holds for a shopper's cart.
+
+    A hold sets aside units of a SKU for one cart until it expires; the SKU
+    quantity itself is only decremented when the order is placed. Available
+    stock is quantity minus the active holds of other carts, summed over the
+    (sku, expires_at) index. reserve() takes no row locks: a hold only grows
+    through a guarded UPDATE whose WHERE clause re-checks stock minus other
+    carts' holds, so the stock check moves from the last checkout step to
+    add-to-cart without locking the hot SKU rows. Expired rows are ignored
+    everywhere and reclaimed in batches by sweep().
+    """
+
+    @staticmethod
+    def active_holds(now=None):
+        return StockReservation.objects.filter(expires_at__gt=now or timezone.now())
+
+    @classmethod
+    def held(cls, sku_ids, exclude_user=None):
+        """{sku_id: units held by active reservations}, ignoring exclude_user's own cart"""
+        holds = cls.active_holds().filter(sku_id__in=sku_ids)
+        if exclude_user is not None:
+            holds = holds.exclude(cart__user=exclude_user)
+        return dict(
+            holds.order_by().values('sku_id').annotate(units=Sum('quantity')).values_list('sku_id', 'units')
+        )
+
+    @classmethod
+    def held_subquery(cls, exclude_user=None):
+        """Active units held on the outer SKU row, for guarded updates"""
+        holds = cls.active_holds().filter(sku=OuterRef('pk'))
+        if exclude_user is not None:
+            holds = holds.exclude(cart__user=exclude_user)
+        units = holds.order_by().values('sku').annotate(units=Sum('quantity')).values('units')
+        return Coalesce(Subquery(units, output_field=IntegerField()), 0)
+
+    @classmethod
+    def available(cls, sku_ids, user=None):
+        """{sku_id: units free to reserve or buy}; user's own holds count as available to them"""
+        held = cls.held(sku_ids, exclude_user=user)
+        stock = StripedStock.stock(ProductSKU.objects.filter(id__in=sku_ids).only('id', 'quantity', 'stripe_count'))
+        return {sku_id: max(units - held.get(sku_id, 0), 0) for sku_id, units in stock.items()}
+
+    @classmethod
+    def covered(cls, user, requested):
+        """SKU ids of {sku_id: units} that the user's own active holds fully cover"""
+        holds = cls.active_holds().filter(cart__user=user, sku_id__in=requested).values_list('sku_id', 'quantity')
+        return {sku_id for sku_id, units in holds if units >= requested[sku_id]}
+
+    @staticmethod
+    def get_reservations(user):
+        """Active holds of the user's cart"""
+        return ReservationService.active_holds().filter(cart__user=user).select_related('sku').order_by('sku_id')
+
+    @classmethod
+    def _held_by_other_carts(cls, now):
+        """Active units held on the outer reservation's SKU by other carts, for guarded updates"""
+        holds = cls.active_holds(now).filter(sku=OuterRef('sku_id')).exclude(cart=OuterRef('cart_id'))
+        units = holds.order_by().values('sku').annotate(units=Sum('quantity')).values('units')
+        return Coalesce(Subquery(units, output_field=IntegerField()), 0)
+
+    @classmethod
+    @transaction.atomic
+    def reserve(cls, user, items, ttl=None):
+        """
+        Set the held quantity of each {sku_id, quantity} item for the user's
+        cart (0 releases it) and restart those holds' TTL. All or nothing:
+        raises ValidationError if any SKU lacks free stock.
+        """
+        ttl = min(ttl or settings.RESERVATION_TTL_SECONDS, settings.RESERVATION_MAX_TTL_SECONDS)
+        requested = {}
+        for item in items:
+            requested[item['sku_id']] = requested.get(item['sku_id'], 0) + item['quantity']
+
+        skus = ProductSKU.objects.select_related('product').in_bulk(requested)
+        missing = requested.keys() - skus.keys()
+        if missing:
+            raise ValidationError(f"SKU not found for sku_id: {min(missing)}")
+
+        cart, _ = Cart.objects.get_or_create(user=user)
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=ttl)
+        current = dict(cls.active_holds(now).filter(cart=cart, sku_id__in=requested).values_list('sku_id', 'quantity'))
+        # Releasing, shrinking or renewing a hold always succeeds, even if other holds now exceed stock
+        growing = {sku_id: units for sku_id, units in requested.items() if units > current.get(sku_id, 0)}
+
+        StockReservation.objects.filter(
+            cart=cart, sku_id__in=[sku_id for sku_id, units in requested.items() if not units]
+        ).delete()
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(cart=cart, sku_id=sku_id, quantity=units, expires_at=expires_at)
+                for sku_id, units in requested.items() if units and sku_id not in growing
+            ],
+            update_conflicts=True,
+            unique_fields=['cart', 'sku'],
+            update_fields=['quantity', 'expires_at', 'updated_at'],
+        )
+        if growing:
+            # Already expired, so a new row counts for nothing until the guarded UPDATE below
+            StockReservation.objects.bulk_create(
+                [StockReservation(cart=cart, sku_id=sku_id, quantity=0, expires_at=now) for sku_id in growing],
+                ignore_conflicts=True,
+            )
+            units = Case(
+                *[When(sku_id=sku_id, then=Value(units)) for sku_id, units in growing.items()],
+                output_field=IntegerField(),
+            )
+            updated = StockReservation.objects.filter(cart=cart, sku_id__in=growing).filter(
+                GreaterThanOrEqual(StripedStock.stock_subquery(OuterRef('sku_id')) - cls._held_by_other_carts(now), units)
+            ).update(quantity=units, expires_at=expires_at, updated_at=now)
+            if updated != len(growing):
+                available = cls.available(growing, user=user)
+                for sku_id in sorted(growing):
+                    if available.get(sku_id, 0) < growing[sku_id]:
+                        raise ValidationError(
+                            f"Insufficient stock for {skus[sku_id].product.name}. "
+                            f"Available: {available.get(sku_id, 0)}, Requested: {growing[sku_id]}"
+                        )
+                raise ValidationError("Stock changed while reserving, please try again")
+        return cls.get_reservations(user)
+
+    @staticmethod
+    def release(user, sku_ids=None):
+        """Drop the user's holds (only those SKUs if given); returns the number released"""
+        holds = StockReservation.objects.filter(cart__user=user)
+        if sku_ids is not None:
+            holds = holds.filter(sku_id__in=sku_ids)
+        deleted, _ = holds.delete()
+        return deleted
+
+    @classmethod
+    def sweep(cls, batch_size=None, now=None):
+        """Delete expired holds in id batches, oldest first; returns the number deleted"""
+        batch_size = batch_size or settings.RESERVATION_SWEEP_BATCH
+        now = now or timezone.now()
+        total = 0
+        while True:
+            ids = list(
+                StockReservation.objects.filter(expires_at__lte=now)
+                .order_by('expires_at', 'id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += StockReservation.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import StockReservationView
+
+urlpatterns = [
+    path('reservations/', StockReservationView.as_view(), name='cart-reservations'),
+]
@@ -0,0 +1,49 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from .serializer import StockReservationSerializer, ReservationCreateSerializer
+from .services import ReservationService
+
+
+class StockReservationView(APIView):
+    """View for holding cart stock until checkout - business logic in ReservationService"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Get the active holds of the current user's cart"""
+        serializer = StockReservationSerializer(ReservationService.get_reservations(request.user), many=True)
+        return Response({
+            "count": len(serializer.data),
+            "data": serializer.data
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        """Reserve (or change, or with quantity 0 release) holds for the given SKUs"""
+        serializer = ReservationCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        reservations = ReservationService.reserve(
+            request.user, serializer.validated_data['items'], ttl=serializer.validated_data.get('ttl')
+        )
+        data = StockReservationSerializer(reservations, many=True).data
+        return Response({
+            "count": len(data),
+            "data": data,
+            "message": "Stock reserved"
+        }, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        """Release all holds, or only ?sku_id=1,2"""
+        sku_ids = None
+        if 'sku_id' in request.query_params:
+            try:
+                sku_ids = [int(sku_id) for sku_id in request.query_params['sku_id'].split(',') if sku_id.strip()]
+            except ValueError:
+                raise ValidationError({"sku_id": "Expected comma-separated SKU ids"})
+        released = ReservationService.release(request.user, sku_ids)
+        return Response({
+            "released": released,
+            "message": "Stock released"
+        }, status=status.HTTP_200_OK)
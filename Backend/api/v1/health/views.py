@@ -12,6 +12,9 @@ from django.db import connections
 from django.conf import settings
 from django.utils.timezone import now
 
+from api.v1.products.cache import CatalogCache
+from config.middleware import CompressionMiddleware
+
 
 APP_START_TIME = time.time()
 INSTANCE_ID = str(uuid.uuid4())[:8]
@@ -103,7 +106,9 @@ class HealthCheckView(APIView):
                     "database": {
                         "status": db_status,
                         "latency_ms": db_latency_ms,
-                    }
+                    },
+                    "cache": CatalogCache.stats(),
+                    "compression": CompressionMiddleware.stats(),
                 },
                 "features": features,
                 "security": security,
@@ -0,0 +1,141 @@
+from api.v1.products.serializer.fast import drf_datetime, drf_decimal
+from apps.orders.models import OrderItem
+from apps.products.models import ProductImage
+
+
+class FastOrderItems:
+    """Order items for a batch of orders as plain dicts, in at most two queries"""
+
+    ITEM_FIELDS = (
+        'order_id', 'id', 'product_id', 'product__name', 'product__cover',
+        'sku_id', 'sku__sku', 'sku__size_attribute__value', 'sku__color_attribute__value', 'sku__price',
+        'quantity', 'price', 'created_at',
+    )
+    SUMMARY_FIELDS = ('order_id', 'id', 'product_id', 'product__name', 'quantity', 'price', 'created_at')
+
+    @classmethod
+    def by_order(cls, order_ids):
+        """Items shaped like orders.serializer.OrderItemSerializer"""
+        rows = list(
+            OrderItem.objects.filter(order_id__in=order_ids).order_by('order_id', 'id').values_list(*cls.ITEM_FIELDS)
+        )
+
+        first_images = {}
+        product_ids = {row[2] for row in rows}
+        for product_id, image_url in ProductImage.objects.filter(product_id__in=product_ids).order_by(
+            'product_id', 'order', 'id'
+        ).values_list('product_id', 'image_url'):
+            first_images.setdefault(product_id, image_url)
+
+        items = {order_id: [] for order_id in order_ids}
+        for (order_id, item_id, product_id, product_name, cover, sku_id, sku_code, size, color, sku_price,
+             quantity, price, created_at) in rows:
+            items[order_id].append({
+                'id': item_id,
+                'product': product_id,
+                'product_name': product_name,
+                'product_image': first_images.get(product_id) or cover or None,
+                'sku': {
+                    'id': sku_id,
+                    'sku': sku_code,
+                    'size': size,
+                    'color': color,
+                    'price': drf_decimal(sku_price),
+                },
+                'quantity': quantity,
+                'price': drf_decimal(price),
+                'created_at': drf_datetime(created_at),
+            })
+        return items
+
+    @classmethod
+    def summaries_by_order(cls, order_ids):
+        """Items shaped like admin.serializers.OrderItemSerializer"""
+        items = {order_id: [] for order_id in order_ids}
+        rows = OrderItem.objects.filter(order_id__in=order_ids).order_by('order_id', 'id').values_list(
+            *cls.SUMMARY_FIELDS
+        )
+        for order_id, item_id, product_id, product_name, quantity, price, created_at in rows:
+            items[order_id].append({
+                'id': item_id,
+                'product': product_id,
+                'product_name': product_name,
+                'quantity': quantity,
+                'price': drf_decimal(price),
+                'created_at': drf_datetime(created_at),
+            })
+        return items
+
+
+class FastOrderSerializer:
+    """Read-only OrderSerializer equivalent; expects address select_related"""
+
+    @staticmethod
+    def address_details(address):
+        if address is None:
+            return None
+        return {
+            'id': address.id,
+            'name': address.name,
+            'street': address.street,
+            'city': address.city,
+            'state': address.state,
+            'zip_code': address.zip_code,
+            'phone': address.phone,
+        }
+
+    @classmethod
+    def serialize_many(cls, orders):
+        orders = list(orders)
+        items = FastOrderItems.by_order([order.pk for order in orders])
+        return [
+            {
+                'id': order.pk,
+                'user': order.user_id,
+                'total': drf_decimal(order.total),
+                'address': order.address_id,
+                'address_details': cls.address_details(order.address) if order.address_id else None,
+                'status': order.status,
+                'items': items[order.pk],
+                'created_at': drf_datetime(order.created_at),
+                'updated_at': drf_datetime(order.updated_at),
+            }
+            for order in orders
+        ]
+
+    @classmethod
+    def serialize(cls, order):
+        return cls.serialize_many([order])[0]
+
+
+class FastAdminOrderSerializer:
+    """Read-only AdminOrderSerializer equivalent; expects user select_related"""
+
+    @staticmethod
+    def user_name(user):
+        if user.first_name or user.last_name:
+            return f"{user.first_name} {user.last_name}".strip()
+        return user.username
+
+    @classmethod
+    def serialize_many(cls, orders):
+        orders = list(orders)
+        items = FastOrderItems.summaries_by_order([order.pk for order in orders])
+        return [
+            {
+                'id': order.pk,
+                'user': order.user_id,
+                'user_email': order.user.email,
+                'user_name': cls.user_name(order.user),
+                'total': drf_decimal(order.total),
+                'status': order.status,
+                'items': items[order.pk],
+                'created_at': drf_datetime(order.created_at),
+                'updated_at': drf_datetime(order.updated_at),
+            }
+            for order in orders
+        ]
+
+    @classmethod
+    def serialize(cls, order):
+        return cls.serialize_many([order])[0]
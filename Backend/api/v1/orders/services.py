@@ -1,8 +1,19 @@
 from decimal import Decimal
 from django.db import transaction
-from django.db.models import F
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Case, F, Q, Value, When
+from api.v1.cart.services import ReservationService
+from api.v1.products.attributes import attribute_registry
+from api.v1.products.cache import CatalogCache
+from api.v1.products.cards import ProductCards
+from api.v1.products.counters import CategoryCounters
+from api.v1.products.redemptions import CouponRedemptions
+from api.v1.products.stripes import StripedStock
 from apps.orders.models import Order, OrderItem
-from apps.products.models import Product, ProductSKU, Coupon, CouponUsage
+from apps.products.models import (
+    Product, ProductAttribute, ProductDailySales, ProductSKU, Coupon, CouponUsage, PendingSale
+)
 from apps.users.models import Address
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
@@ -29,7 +40,7 @@ class OrderService:
             except Address.DoesNotExist:
                 raise ValidationError("Address not found")
         
-        # Handle coupon if provided - use select_for_update to lock the coupon
+        # Handle coupon if provided - read without locking; uses are counted on shards
         coupon = None
         coupon_discount = Decimal('0.00')
         coupon_code = validated_data.get('coupon_code')
@@ -44,9 +55,9 @@ class OrderService:
             
             if coupon_code:  # Only proceed if code is not empty after normalization
                 try:
-                    # Use select_for_update to lock the coupon row during transaction
-                    # This prevents race conditions when multiple users try to use the same coupon
-                    coupon = Coupon.objects.select_for_update().get(
+                    # Not locked: concurrent orders with one code must not queue on this row.
+                    # CouponRedemptions.redeem() below enforces the usage limit
+                    coupon = Coupon.objects.get(
                         code=coupon_code, 
                         is_active=True
                     )
@@ -57,66 +68,37 @@ class OrderService:
                     ):
                         raise ValidationError("Coupon has expired or is not yet active")
                     
-                    # Check usage limit with locked coupon
+                    # Fail fast on the folded count; it may lag by in-flight orders
                     if coupon.usage_limit is not None and coupon.used_count >= coupon.usage_limit:
                         raise ValidationError("Coupon usage limit has been reached")
                 except Coupon.DoesNotExist:
                     raise ValidationError(f"Invalid coupon code: {coupon_code}")
         
-        # Calculate total and create order items
-        total = Decimal('0.00')
-        order_items = []
-        
-        for item_data in items_data:
-            product_id = item_data['product_id']
-            quantity = item_data['quantity']
-            
-            try:
-                product = Product.objects.get(id=product_id)
-            except Product.DoesNotExist:
-                raise ValidationError(f"Product not found for product_id: {product_id}")
-            
-            # Get SKU - either by ID or by size/color
-            sku = None
-            if 'sku_id' in item_data and item_data['sku_id']:
-                try:
-                    sku = ProductSKU.objects.get(id=item_data['sku_id'], product=product)
-                except ProductSKU.DoesNotExist:
-                    raise ValidationError(f"SKU not found for sku_id: {item_data['sku_id']}")
-            elif 'size' in item_data and 'color' in item_data:
-                # Find SKU by size and color attributes
-                from apps.products.models import ProductAttribute
-                try:
-                    size_attr = ProductAttribute.objects.get(value=item_data['size'], type='SIZE')
-                    color_attr = ProductAttribute.objects.get(value=item_data['color'], type='COLOR')
-                    sku = ProductSKU.objects.get(
-                        product=product,
-                        size_attribute=size_attr,
-                        color_attribute=color_attr
-                    )
-                except (ProductAttribute.DoesNotExist, ProductSKU.DoesNotExist):
-                    raise ValidationError(f"SKU not found for {product.name} - Size: {item_data.get('size')}, Color: {item_data.get('color')}")
-            else:
-                raise ValidationError("Either sku_id or size+color must be provided")
-            
-            # Lock SKU for update to prevent race conditions
-            # Use select_for_update to ensure atomic inventory updates
-            sku = ProductSKU.objects.select_for_update().get(id=sku.id)
-            
-            # Check stock availability with locked SKU
-            if sku.quantity < quantity:
-                raise ValidationError(f"Insufficient stock for {product.name}. Available: {sku.quantity}, Requested: {quantity}")
-            
-            # Calculate item total
-            item_price = sku.price * quantity
-            total += item_price
-            
-            order_items.append({
-                'product': product,
-                'sku': sku,
-                'quantity': quantity,
-                'price': sku.price
-            })
+        # Resolve every SKU up front and check stock per SKU. Lines the buyer's own
+        # holds cover were checked when reserved, so like every line under the
+        # conditional strategy they are not locked: this check only fails fast and
+        # the guarded decrement below has the final say
+        conditional = OrderService.inventory_strategy() == OrderService.CONDITIONAL
+        order_items = OrderService._resolve_order_lines(items_data)
+        requested = OrderService._sum_units((item['sku'].id, item['quantity']) for item in order_items)
+        guarded = True if conditional else ReservationService.covered(user, requested)
+        if not conditional:
+            OrderService._lock_skus([
+                item['sku'] for item in order_items
+                if not item['sku'].stripe_count and item['sku'].id not in guarded
+            ])
+        # Units held in other shoppers' carts are not for sale; the buyer's own holds are
+        held = ReservationService.held(requested, exclude_user=user)
+        stock = StripedStock.stock([item['sku'] for item in order_items])
+        for item in order_items:
+            sku = item['sku']
+            available = stock[sku.id] - held.get(sku.id, 0)
+            if available < requested[sku.id]:
+                raise ValidationError(
+                    f"Insufficient stock for {item['product'].name}. Available: {max(available, 0)}, "
+                    f"Requested: {requested[sku.id]}"
+                )
+        total = sum((item['price'] * item['quantity'] for item in order_items), Decimal('0.00'))
         
         # Apply coupon discount if valid
         if coupon:
@@ -145,11 +127,8 @@ class OrderService:
         if coupon and coupon_discount > 0:
             logger.info(f"Recording coupon usage for {coupon.code}, discount: {coupon_discount}")
             
-            # Double-check coupon is still valid before finalizing (prevent race conditions)
-            coupon.refresh_from_db()
-            logger.info(f"Coupon {coupon.code} - used_count before update: {coupon.used_count}, limit: {coupon.usage_limit}")
-            
-            if coupon.usage_limit is not None and coupon.used_count >= coupon.usage_limit:
+            # Count the use on a random shard; refuses once the limit is reached
+            if not CouponRedemptions.redeem(coupon):
                 raise ValidationError("Coupon usage limit has been reached")
             
             # Create coupon usage record
@@ -161,70 +140,305 @@ class OrderService:
             )
             logger.info(f"Created CouponUsage record ID: {coupon_usage.id}")
             
-            # Atomically update coupon used count using F() expression
-            # This prevents race conditions when multiple orders use the same coupon
-            # Use update() which returns the number of rows affected
-            rows_updated = Coupon.objects.filter(id=coupon.id).update(
-                used_count=F('used_count') + 1
-            )
-            logger.info(f"Updated coupon {coupon.id}, rows affected: {rows_updated}")
-            
-            # Verify update was successful
-            if rows_updated == 0:
-                logger.error(f"Failed to update coupon {coupon.id} usage count")
-                raise ValidationError("Failed to update coupon usage count")
-            
-            # Refresh coupon to get updated count (for verification)
-            coupon.refresh_from_db()
-            logger.info(f"Coupon {coupon.code} - used_count after update: {coupon.used_count}")
-            # Deactivate coupon automatically if limit reached
-            if coupon.usage_limit is not None and coupon.used_count >= coupon.usage_limit:
-                Coupon.objects.filter(id=coupon.id).update(is_active=False)
-                logger.info(f"Coupon {coupon.code} deactivated after reaching usage limit")
+            # Fold the shards into used_count (deactivating the coupon at its limit) once
+            # this commits, so the coupon row is never written inside the checkout
+            # robust: a failure is logged, never raised at a buyer whose order is placed
+            transaction.on_commit(lambda: CouponRedemptions.settle(coupon.id), robust=True)
         elif coupon:
             logger.warning(f"Coupon {coupon.code} was provided but discount is 0 (discount: {coupon_discount})")
         
-        # Create order items and atomically update SKU quantities
-        for item_data in order_items:
-            OrderItem.objects.create(
+        # Products whose rows this transaction writes. Products of striped SKUs are as
+        # contended as the SKU itself, and the conditional strategy locks nothing but
+        # its final decrement, so their rows are left to settle_sales
+        product_ids = set() if conditional else {
+            item['product'].id for item in order_items if not item['sku'].stripe_count
+        }
+        ReservationService.release(user, requested)
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
                 product=item_data['product'],
                 sku=item_data['sku'],
                 quantity=item_data['quantity'],
                 price=item_data['price']
             )
-            
-            # Atomically update SKU quantity using F() expression
-            # This prevents race conditions when multiple orders are placed simultaneously
-            # and ensures inventory is always accurate
-            ProductSKU.objects.filter(id=item_data['sku'].id).update(
-                quantity=F('quantity') - item_data['quantity']
-            )
-            
-            # Also update product in_stock status if needed
-            # Check if any SKU for this product still has stock
-            product = item_data['product']
-            has_stock = ProductSKU.objects.filter(
-                product=product,
-                quantity__gt=0
-            ).exists()
-            
-            if product.in_stock != has_stock:
-                product.in_stock = has_stock
+            for item_data in order_items
+        ])
+        units = OrderService._sum_units(
+            (item['product'].id, item['quantity']) for item in order_items
+        )
+        PendingSale.objects.bulk_create([
+            PendingSale(order=order, product_id=product_id, units=units.pop(product_id), sold_at=order.created_at)
+            for product_id in set(units) - product_ids
+        ])
+        CatalogCache.bump_products(item['product'].id for item in order_items)
+        if conditional:
+            # Last statement before commit, so the guarded rows are locked only until then
+            OrderService._decrement_stock(order_items, requested, user, guarded=True)
+            return order
+        
+        counters_before = CategoryCounters.capture(product_ids)
+        OrderService._decrement_stock(order_items, requested, user, guarded=guarded)
+        
+        # Keep product in_stock in step with whether any SKU still has stock. Cached
+        # catalog responses are only dropped below when a product's listing state
+        # (CategoryCounters.record) changed; stock levels and sales counts alone
+        # are left to CATALOG_CACHE_TIMEOUT
+        has_stock = set(
+            ProductSKU.objects.filter(product_id__in=product_ids, quantity__gt=0)
+            .values_list('product_id', flat=True).distinct()
+        )
+        for product in {item['product'].id: item['product'] for item in order_items}.values():
+            if product.id in product_ids and product.in_stock != (product.id in has_stock):
+                product.in_stock = product.id in has_stock
                 product.save(update_fields=['in_stock'])
+        Product.refresh_sku_aggregates(product_ids)
+        listing_changed = CategoryCounters.record(counters_before)
         
+        Product.add_popularity(units)
+        ProductDailySales.record(order.created_at, units)
+        if listing_changed:
+            CatalogCache.bump_version()
         return order
     
+    LOCKING = 'locking'
+    CONDITIONAL = 'conditional'
+    
+    @classmethod
+    def inventory_strategy(cls):
+        """The INVENTORY_STRATEGY setting, validated"""
+        strategy = settings.INVENTORY_STRATEGY
+        if strategy not in (cls.LOCKING, cls.CONDITIONAL):
+            raise ImproperlyConfigured(
+                f"INVENTORY_STRATEGY must be '{cls.LOCKING}' or '{cls.CONDITIONAL}', not {strategy!r}"
+            )
+        return strategy
+    
+    @staticmethod
+    def settle_sales(batch_size=None):
+        """
+        Apply the product writes checkout deferred (see settle_sales command):
+        copy stripe sums onto stale ProductSKU.quantity mirrors, refresh
+        in_stock, SKU aggregates and category counters of the products
+        involved, and fold PendingSale rows into popularity and daily sales.
+        Works in batches of PendingSale rows, one transaction each. Returns
+        {'skus', 'sales', 'products'} totals.
+        """
+        batch_size = batch_size or settings.SALE_SETTLE_BATCH
+        totals = {'skus': 0, 'sales': 0, 'products': 0}
+        stale = StripedStock.stale()
+        while True:
+            with transaction.atomic():
+                sales = list(
+                    PendingSale.objects.select_for_update().order_by('id')
+                    .values_list('id', 'product_id', 'units', 'sold_at')[:batch_size]
+                )
+                if not sales and not stale:
+                    return totals
+                product_ids = {product_id for _, product_id, _, _ in sales} | set(stale.values())
+                counters_before = CategoryCounters.capture(product_ids)
+                StripedStock.refresh_mirrors(stale)
+                has_stock = set(
+                    ProductSKU.objects.filter(product_id__in=product_ids, quantity__gt=0)
+                    .values_list('product_id', flat=True).distinct()
+                )
+                # Bulk updates skip post_save, so refresh the cards whose flag changed here
+                changed = [
+                    product for product in Product.objects.filter(id__in=product_ids).only('id', 'in_stock')
+                    if product.in_stock != (product.id in has_stock)
+                ]
+                for product in changed:
+                    product.in_stock = product.id in has_stock
+                Product.objects.bulk_update(changed, ['in_stock'])
+                ProductCards.schedule(product.id for product in changed)
+                Product.refresh_sku_aggregates(product_ids)
+                listing_changed = CategoryCounters.record(counters_before)
+                
+                by_day = {}
+                for _, product_id, units, sold_at in sales:
+                    day = by_day.setdefault(timezone.localdate(sold_at), (sold_at, {}))[1]
+                    day[product_id] = day.get(product_id, 0) + units
+                for sold_at, units in by_day.values():
+                    Product.add_popularity(units)
+                    ProductDailySales.record(sold_at, units)
+                PendingSale.objects.filter(id__in=[sale[0] for sale in sales]).delete()
+                CatalogCache.bump_products(product_ids)
+                if listing_changed:
+                    CatalogCache.bump_version()
+            totals['skus'] += len(stale)
+            totals['sales'] += len(sales)
+            totals['products'] += len(product_ids)
+            stale = {}
+    
+    @staticmethod
+    def _decrement_stock(order_items, requested, user, guarded=False):
+        """
+        Take {sku_id: units} from stock. Striped SKUs are taken from their
+        stripes beyond other carts' holds (see StripedStock.take); the rest
+        in at most two UPDATEs. `guarded` is True or the set of SKU ids to
+        guard; the others must already be locked and checked. The guarded
+        UPDATE only touches rows that still have enough stock beyond other
+        carts' holds; if any row is short, the whole statement is rolled back
+        to a savepoint and reported as out of stock.
+        """
+        striped = {item['sku'].id for item in order_items if item['sku'].stripe_count}
+        held = ReservationService.held(striped, exclude_user=user) if striped else {}
+        short = StripedStock.take({sku_id: requested[sku_id] for sku_id in striped}, held)
+        totals = StripedStock.totals(short)
+        for item in order_items:
+            sku_id = item['sku'].id
+            if sku_id in short:
+                available = max(totals.get(sku_id, 0) - held.get(sku_id, 0), 0)
+                raise ValidationError(
+                    f"Insufficient stock for {item['product'].name}. Available: {available}, "
+                    f"Requested: {requested[sku_id]}"
+                )
+        if guarded is True:
+            guarded = requested.keys()
+        locked = {sku_id: units for sku_id, units in requested.items() if sku_id not in striped and sku_id not in guarded}
+        if locked:
+            ProductSKU.objects.filter(id__in=locked).update(quantity=Case(
+                *[When(id=sku_id, then=F('quantity') - units) for sku_id, units in locked.items()]
+            ))
+        requested = {sku_id: units for sku_id, units in requested.items() if sku_id not in striped and sku_id in guarded}
+        if not requested:
+            return
+        
+        skus = ProductSKU.objects.filter(id__in=requested)
+        decrements = Case(*[When(id=sku_id, then=F('quantity') - units) for sku_id, units in requested.items()])
+        with transaction.atomic():
+            updated = skus.filter(
+                quantity__gte=ReservationService.held_subquery(exclude_user=user) + Case(
+                    *[When(id=sku_id, then=Value(units)) for sku_id, units in requested.items()]
+                )
+            ).update(quantity=decrements)
+            if updated != len(requested):
+                transaction.set_rollback(True)
+        if updated == len(requested):
+            return
+        
+        available = ReservationService.available(requested, user=user)
+        for item in order_items:
+            sku_id = item['sku'].id
+            if available.get(sku_id, 0) < requested[sku_id]:
+                raise ValidationError(
+                    f"Insufficient stock for {item['product'].name}. Available: {available.get(sku_id, 0)}, "
+                    f"Requested: {requested[sku_id]}"
+                )
+        raise ValidationError("Stock changed while placing the order, please try again")
+    
+    @staticmethod
+    def _drop_pending_sales(order, units):
+        """Delete a cancelled order's unsettled PendingSale rows and take them out of its -units"""
+        pending = list(PendingSale.objects.select_for_update().filter(order=order).values_list('id', 'product_id', 'units'))
+        for _, product_id, sold in pending:
+            units[product_id] += sold
+        PendingSale.objects.filter(id__in=[sale_id for sale_id, _, _ in pending]).delete()
+    
+    @staticmethod
+    def _restock_striped(items):
+        """Put cancelled order items of striped SKUs back on their stripes; settle_sales refreshes the mirrors"""
+        returned = OrderService._sum_units(
+            (item.sku_id, item.quantity) for item in items if item.sku.stripe_count
+        )
+        if returned:
+            StripedStock.give(returned)
+    
+    @staticmethod
+    def _lock_skus(skus):
+        """
+        SELECT ... FOR UPDATE the SKUs in id order, so concurrent multi-item
+        checkouts can't deadlock on each other, and refresh their quantities.
+        """
+        if not skus:
+            return
+        quantities = dict(
+            ProductSKU.objects.select_for_update().filter(id__in={sku.id for sku in skus})
+            .order_by('id').values_list('id', 'quantity')
+        )
+        for sku in skus:
+            sku.quantity = quantities[sku.id]
+    
+    @staticmethod
+    def _resolve_order_lines(items_data):
+        """
+        Resolve order lines to products and SKUs with one product query and
+        one unlocked SKU query.
+        """
+        if not items_data:
+            return []
+        for item_data in items_data:
+            if not item_data.get('sku_id') and not ('size' in item_data and 'color' in item_data):
+                raise ValidationError("Either sku_id or size+color must be provided")
+
+        products = Product.objects.in_bulk({item_data['product_id'] for item_data in items_data})
+        for item_data in items_data:
+            if item_data['product_id'] not in products:
+                raise ValidationError(f"Product not found for product_id: {item_data['product_id']}")
+
+        # One lookup per line: a SKU id, or (product, size, color) resolved through the attribute registry
+        lookups = []
+        for item_data in items_data:
+            if item_data.get('sku_id'):
+                lookups.append(('id', item_data['sku_id'], item_data['product_id']))
+            else:
+                size_attr = attribute_registry.get(ProductAttribute.SIZE, item_data['size'])
+                color_attr = attribute_registry.get(ProductAttribute.COLOR, item_data['color'])
+                lookups.append(('attributes', (
+                    item_data['product_id'],
+                    size_attr.id if size_attr else None,
+                    color_attr.id if color_attr else None,
+                ), item_data['product_id']))
+
+        condition = Q(id__in=[key for kind, key, _ in lookups if kind == 'id'])
+        for kind, key, _ in lookups:
+            if kind == 'attributes' and all(key):
+                product_id, size_id, color_id = key
+                condition |= Q(product_id=product_id, size_attribute_id=size_id, color_attribute_id=color_id)
+        skus = list(ProductSKU.objects.filter(condition).order_by('id'))
+
+        by_id = {sku.id: sku for sku in skus}
+        by_attributes = {}
+        for sku in sorted(skus, key=lambda sku: sku.id):
+            by_attributes.setdefault((sku.product_id, sku.size_attribute_id, sku.color_attribute_id), sku)
+
+        order_items = []
+        for item_data, (kind, key, product_id) in zip(items_data, lookups):
+            product = products[product_id]
+            if kind == 'id':
+                sku = by_id.get(key)
+                if sku is None or sku.product_id != product_id:
+                    raise ValidationError(f"SKU not found for sku_id: {key}")
+            else:
+                sku = by_attributes.get(key)
+                if sku is None:
+                    raise ValidationError(f"SKU not found for {product.name} - Size: {item_data.get('size')}, Color: {item_data.get('color')}")
+            order_items.append({
+                'product': product,
+                'sku': sku,
+                'quantity': item_data['quantity'],
+                'price': sku.price
+            })
+        return order_items
+    
+    @staticmethod
+    def _sum_units(lines, sign=1):
+        """Sum (key, quantity) lines, keyed by product or SKU id, into {key: signed units}"""
+        units = {}
+        for key, quantity in lines:
+            units[key] = units.get(key, 0) + sign * quantity
+        return units
+    
     @staticmethod
     def get_user_orders(user):
         """Get all orders for a user"""
-        return Order.objects.filter(user=user).select_related('address').prefetch_related('items__product', 'items__sku').order_by('-created_at')
+        return Order.objects.filter(user=user).select_related('address').order_by('-created_at')
     
     @staticmethod
     def get_order(user, order_id):
         """Get a specific order for a user"""
         try:
-            return Order.objects.select_related('address').prefetch_related('items__product', 'items__sku').get(id=order_id, user=user)
+            return Order.objects.select_related('address').get(id=order_id, user=user)
         except Order.DoesNotExist:
             return None
     
@@ -244,11 +458,14 @@ class OrderService:
             raise ValidationError(f"Cannot cancel order with status: {order.status}")
         
         # Restore inventory for all order items
+        counters_before = CategoryCounters.capture(item.product_id for item in order.items.all())
+        OrderService._restock_striped(order.items.all())
         for item in order.items.all():
             # Atomically restore SKU quantity
-            ProductSKU.objects.filter(id=item.sku.id).update(
-                quantity=F('quantity') + item.quantity
-            )
+            if not item.sku.stripe_count:
+                ProductSKU.objects.filter(id=item.sku.id).update(
+                    quantity=F('quantity') + item.quantity
+                )
             
             # Update product in_stock status
             product = item.product
@@ -260,14 +477,15 @@ class OrderService:
             if product.in_stock != has_stock:
                 product.in_stock = has_stock
                 product.save(update_fields=['in_stock'])
+        Product.refresh_sku_aggregates(item.product_id for item in order.items.all())
+        listing_changed = CategoryCounters.record(counters_before)
         
         # Handle coupon usage if order had a coupon
         coupon_usage = CouponUsage.objects.filter(order=order).first()
         if coupon_usage:
-            # Atomically decrement coupon used count
-            Coupon.objects.filter(id=coupon_usage.coupon.id).update(
-                used_count=F('used_count') - 1
-            )
+            # Uncount the use; used_count catches up after commit
+            CouponRedemptions.release(coupon_usage.coupon)
+            transaction.on_commit(lambda: CouponRedemptions.settle(coupon_usage.coupon_id), robust=True)
             # Delete coupon usage record
             coupon_usage.delete()
         
@@ -275,6 +493,15 @@ class OrderService:
         order.status = Order.CANCELLED
         order.save(update_fields=['status'])
         
+        units = OrderService._sum_units(
+            ((item.product_id, item.quantity) for item in order.items.all()), sign=-1
+        )
+        OrderService._drop_pending_sales(order, units)
+        Product.add_popularity(units)
+        ProductDailySales.record(order.created_at, units)
+        CatalogCache.bump_products(units)
+        if listing_changed:
+            CatalogCache.bump_version()
         return order
     
     @staticmethod
@@ -282,14 +509,19 @@ class OrderService:
     def update_order_status(order, new_status):
         """Update order status - handles inventory for cancellations"""
         old_status = order.status
+        counters_before = {}
+        if (old_status == Order.CANCELLED) != (new_status == Order.CANCELLED):
+            counters_before = CategoryCounters.capture(item.product_id for item in order.items.all())
         
         # If cancelling, restore inventory
         if new_status == Order.CANCELLED and old_status != Order.CANCELLED:
             # Restore inventory for all order items
+            OrderService._restock_striped(order.items.all())
             for item in order.items.all():
-                ProductSKU.objects.filter(id=item.sku.id).update(
-                    quantity=F('quantity') + item.quantity
-                )
+                if not item.sku.stripe_count:
+                    ProductSKU.objects.filter(id=item.sku.id).update(
+                        quantity=F('quantity') + item.quantity
+                    )
                 
                 # Update product in_stock status
                 product = item.product
@@ -305,27 +537,31 @@ class OrderService:
             # Handle coupon usage if order had a coupon
             coupon_usage = CouponUsage.objects.filter(order=order).first()
             if coupon_usage:
-                # Atomically decrement coupon used count
-                Coupon.objects.filter(id=coupon_usage.coupon.id).update(
-                    used_count=F('used_count') - 1
-                )
+                # Uncount the use; used_count catches up after commit
+                CouponRedemptions.release(coupon_usage.coupon)
+                transaction.on_commit(lambda: CouponRedemptions.settle(coupon_usage.coupon_id), robust=True)
                 # Delete coupon usage record
                 coupon_usage.delete()
         
         # If uncancelling (changing from cancelled to another status), deduct inventory again
         elif old_status == Order.CANCELLED and new_status != Order.CANCELLED:
             for item in order.items.all():
-                # Lock SKU for update
-                sku = ProductSKU.objects.select_for_update().get(id=item.sku.id)
-                
-                # Check if enough stock is available
-                if sku.quantity < item.quantity:
-                    raise ValidationError(f"Insufficient stock to restore order. Available: {sku.quantity}, Required: {item.quantity}")
-                
-                # Deduct inventory
-                ProductSKU.objects.filter(id=item.sku.id).update(
-                    quantity=F('quantity') - item.quantity
-                )
+                if item.sku.stripe_count:
+                    if StripedStock.take({item.sku.id: item.quantity}):
+                        available = StripedStock.stock([item.sku])[item.sku.id]
+                        raise ValidationError(f"Insufficient stock to restore order. Available: {available}, Required: {item.quantity}")
+                else:
+                    # Lock SKU for update
+                    sku = ProductSKU.objects.select_for_update().get(id=item.sku.id)
+                    
+                    # Check if enough stock is available
+                    if sku.quantity < item.quantity:
+                        raise ValidationError(f"Insufficient stock to restore order. Available: {sku.quantity}, Required: {item.quantity}")
+                    
+                    # Deduct inventory
+                    ProductSKU.objects.filter(id=item.sku.id).update(
+                        quantity=F('quantity') - item.quantity
+                    )
                 
                 # Update product in_stock status
                 product = item.product
@@ -338,7 +574,23 @@ class OrderService:
                     product.in_stock = has_stock
                     product.save(update_fields=['in_stock'])
         
+        if (old_status == Order.CANCELLED) != (new_status == Order.CANCELLED):
+            units = OrderService._sum_units(
+                ((item.product_id, item.quantity) for item in order.items.all()),
+                sign=-1 if new_status == Order.CANCELLED else 1,
+            )
+            if new_status == Order.CANCELLED:
+                OrderService._drop_pending_sales(order, units)
+            Product.add_popularity(units)
+            ProductDailySales.record(order.created_at, units)
+            Product.refresh_sku_aggregates(units)
+            CatalogCache.bump_products(units)
+        
+        listing_changed = CategoryCounters.record(counters_before)
+        
         order.status = new_status
         order.save(update_fields=['status'])
+        if listing_changed:
+            CatalogCache.bump_version()
         return order
 
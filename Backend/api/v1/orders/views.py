@@ -3,6 +3,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
+from .fast import FastOrderSerializer
 from .serializer import OrderSerializer, OrderCreateSerializer
 from .services import OrderService
 
@@ -14,10 +15,10 @@ class OrderListView(APIView):
     def get(self, request):
         """Get all orders for the current user"""
         orders = OrderService.get_user_orders(request.user)
-        serializer = OrderSerializer(orders, many=True)
+        data = FastOrderSerializer.serialize_many(orders)
         return Response({
-            "count": len(serializer.data),
-            "data": serializer.data
+            "count": len(data),
+            "data": data
         }, status=status.HTTP_200_OK)
     
     def post(self, request):
@@ -61,8 +62,7 @@ class OrderDetailView(APIView):
                 'detail': f'No order found with id {order_id} for the current user'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = OrderSerializer(order)
-        return Response({"data": serializer.data}, status=status.HTTP_200_OK)
+        return Response({"data": FastOrderSerializer.serialize(order)}, status=status.HTTP_200_OK)
 
 
 
@@ -0,0 +1,53 @@
+from django.db.models import Prefetch
+from django.http import Http404
+
+from api.v1.products.services import ProductServices
+from apps.products.models import Product, ProductImage, ProductReview, ProductSKU
+
+
+class ProductDetailAggregate:
+    """
+    Everything the product detail page renders, loaded in a fixed number of queries.
+
+    One query for the product with category, details and review stats, then
+    one prefetch each for images, SKUs with their attributes and the top
+    reviews with their users. The product, SKU and review serializers all
+    read from these loaded objects, so serialization adds no queries.
+    """
+
+    REVIEW_LIMIT = 5
+    # product (+category, details, review_stats), images, skus (+attributes), reviews (+users)
+    QUERY_BUDGET = 4
+
+    def __init__(self, product, skus, recent_reviews):
+        self.product = product
+        self.skus = skus
+        self.recent_reviews = recent_reviews
+
+    @classmethod
+    def load(cls, product_id, include_out_of_stock=False, review_limit=REVIEW_LIMIT):
+        queryset = Product.objects.select_related("category", "details", "review_stats").prefetch_related(
+            Prefetch('images', queryset=ProductImage.objects.order_by('order', 'created_at')),
+            Prefetch(
+                'skus',
+                queryset=ProductSKU.objects.select_related('size_attribute', 'color_attribute').order_by('id')
+            ),
+            Prefetch(
+                'reviews',
+                queryset=ProductReview.objects.select_related('user').order_by(
+                    '-helpful_count', '-created_at'
+                )[:review_limit],
+                to_attr='recent_reviews'
+            ),
+        )
+        if not include_out_of_stock:
+            queryset = ProductServices.filter_in_stock(queryset)
+
+        product = queryset.filter(id=product_id).first()
+        if not product:
+            raise Http404("Product not found")
+
+        skus = list(product.skus.all())
+        if not include_out_of_stock:
+            skus = [sku for sku in skus if sku.quantity > 0]
+        return cls(product, skus, product.recent_reviews)
@@ -0,0 +1,118 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+from api.v1.products.text import normalize
+from apps.products.models import ProductAttribute
+
+
+class AttributeRegistry:
+    """
+    Process-local lookup table of live (non-deleted) ProductAttribute rows.
+
+    The table is small and almost never written, but checkout and imports
+    resolve sizes and colors per line. The whole table is loaded once into
+    dicts keyed by id and by (type, normalized value); type and value are
+    matched case-insensitively, so "SIZE"/"m" finds the "size"/"M" row.
+    Attribute writes invalidate it on commit (see apps.products.signals) and
+    bump a version in the cache, which other workers notice within
+    VERSION_CHECK_INTERVAL seconds when the cache is shared between them. A
+    per-process cache (the LocMemCache default) only carries the version
+    within one worker, so every worker also reloads tables older than
+    MAX_AGE seconds whatever the version says. Returned instances are shared
+    between threads and must be treated as read-only.
+    """
+
+    VERSION_KEY = "attributes:version"
+    VERSION_CHECK_INTERVAL = 1.0
+    MAX_AGE = 60.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = None
+        self._version = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+
+    @staticmethod
+    def key(attribute_type, value):
+        return (attribute_type or "").strip().lower(), normalize(value)
+
+    def _shared_version(self):
+        version = cache.get(self.VERSION_KEY)
+        if version is None:
+            cache.add(self.VERSION_KEY, int(time.time() * 1000), None)
+            version = cache.get(self.VERSION_KEY)
+        return version
+
+    def _ensure_loaded(self):
+        """(by_id, by_value) for the current version; callers read this pair, never the attribute twice"""
+        now = time.monotonic()
+        tables = self._tables
+        if tables is not None and now - self._checked_at < self.VERSION_CHECK_INTERVAL:
+            return tables
+        version = self._shared_version()
+        fresh = now - self._loaded_at < self.MAX_AGE
+        if tables is not None and version == self._version and fresh:
+            self._checked_at = now
+            return tables
+        with self._lock:
+            if self._tables is not None and version == self._version and now - self._loaded_at < self.MAX_AGE:
+                return self._tables
+            by_id, by_value = {}, {}
+            for attribute in ProductAttribute.objects.filter(deleted_at__isnull=True).order_by('id'):
+                by_id[attribute.id] = attribute
+                # Lowest id wins when values differ only by case or spacing
+                by_value.setdefault(self.key(attribute.type, attribute.value), attribute)
+            self._tables = by_id, by_value
+            self._version = version
+            self._checked_at = self._loaded_at = now
+            return self._tables
+
+    def get(self, attribute_type, value):
+        """Live attribute of this type matching the value, or None"""
+        _, by_value = self._ensure_loaded()
+        return by_value.get(self.key(attribute_type, value))
+
+    def get_by_id(self, attribute_id, attribute_type=None):
+        """Live attribute with this id (and type, if given), or None"""
+        try:
+            attribute_id = int(attribute_id)
+        except (TypeError, ValueError):
+            return None
+        by_id, _ = self._ensure_loaded()
+        attribute = by_id.get(attribute_id)
+        if attribute is None or (attribute_type and attribute.type != attribute_type.lower()):
+            return None
+        return attribute
+
+    def get_or_create(self, attribute_type, value):
+        """Like get(), creating the row on a miss; the registry picks it up once the transaction commits"""
+        attribute = self.get(attribute_type, value)
+        if attribute is None:
+            attribute, _ = ProductAttribute.objects.get_or_create(
+                type=attribute_type.lower(), value=value.strip(), deleted_at=None
+            )
+        return attribute
+
+    def all(self, attribute_type=None):
+        """Live attributes ordered by id, optionally of one type"""
+        by_id, _ = self._ensure_loaded()
+        return [
+            attribute for attribute in by_id.values()
+            if not attribute_type or attribute.type == attribute_type.lower()
+        ]
+
+    def invalidate(self):
+        """Make this worker reload on its next lookup and tell the others to; readers keep the old table meanwhile"""
+        try:
+            cache.incr(self.VERSION_KEY)
+        except ValueError:
+            self._shared_version()
+        with self._lock:
+            self._version = None
+            self._checked_at = 0.0
+
+
+attribute_registry = AttributeRegistry()
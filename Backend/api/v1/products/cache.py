@@ -0,0 +1,165 @@
+import hashlib
+import time
+from functools import partial, wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+class CatalogCache:
+    """
+    Versioned response cache for public catalog endpoints.
+
+    Every cached response is keyed by the current catalog version, so a
+    single version bump invalidates all of them at once. Writers call
+    bump_version() after changing products, categories, listings or coupons.
+    Responses for one product (URL kwarg product_id) are also keyed by that
+    product's version, which stock writes bump with bump_products() without
+    dropping the rest of the catalog.
+    """
+
+    VERSION_KEY = "catalog:version"
+    PRODUCT_VERSION_KEY = "catalog:product:{}:version"
+    HITS_KEY = "catalog:stats:hits"
+    MISSES_KEY = "catalog:stats:misses"
+
+    @classmethod
+    def get_version(cls):
+        """Current catalog version, seeded from the clock if the key was evicted"""
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            # A time-based seed never collides with versions used before eviction
+            cache.add(cls.VERSION_KEY, int(time.time() * 1000), None)
+            version = cache.get(cls.VERSION_KEY)
+        return version
+
+    @classmethod
+    def bump_version(cls):
+        """Invalidate all cached catalog responses once the current transaction commits"""
+        transaction.on_commit(cls._incr_version)
+
+    @classmethod
+    def _incr_version(cls):
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cls.get_version()
+
+    @classmethod
+    def get_product_version(cls, product_id):
+        """Current version of one product's stock, seeded like get_version()"""
+        key = cls.PRODUCT_VERSION_KEY.format(product_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, int(time.time() * 1000), None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def bump_products(cls, product_ids):
+        """Invalidate cached responses of these products once the current transaction commits"""
+        product_ids = set(product_ids)
+        if product_ids:
+            transaction.on_commit(partial(cls._incr_products, product_ids))
+
+    @classmethod
+    def _incr_products(cls, product_ids):
+        for product_id in product_ids:
+            try:
+                cache.incr(cls.PRODUCT_VERSION_KEY.format(product_id))
+            except ValueError:
+                cls.get_product_version(product_id)
+
+    @classmethod
+    def response_key(cls, endpoint, request, view_kwargs=None):
+        """Cache key from endpoint, URL kwargs and normalized query params"""
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        params.extend(sorted((f"@{key}", str(value)) for key, value in (view_kwargs or {}).items()))
+        if view_kwargs and "product_id" in view_kwargs:
+            params.append(("@product_version", str(cls.get_product_version(view_kwargs["product_id"]))))
+        digest = hashlib.sha1(urlencode(params).encode("utf-8")).hexdigest()
+        return f"catalog:response:{cls.get_version()}:{endpoint}:{digest}"
+
+    @classmethod
+    def _count(cls, key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, None)
+            cache.incr(key)
+
+    @classmethod
+    def record_hit(cls):
+        cls._count(cls.HITS_KEY)
+
+    @classmethod
+    def record_miss(cls):
+        cls._count(cls.MISSES_KEY)
+
+    @classmethod
+    def stats(cls):
+        """Hit/miss counters for the health endpoint"""
+        counters = cache.get_many([cls.HITS_KEY, cls.MISSES_KEY])
+        hits = counters.get(cls.HITS_KEY, 0)
+        misses = counters.get(cls.MISSES_KEY, 0)
+        lookups = hits + misses
+        return {
+            "backend": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+            "catalog_version": cls.get_version(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+def cache_catalog_response(endpoint):
+    """Cache successful responses of an APIView.get method under the catalog version"""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            key = CatalogCache.response_key(endpoint, request, kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                CatalogCache.record_hit()
+                response = Response(cached)
+                response["X-Cache"] = "HIT"
+                return response
+
+            CatalogCache.record_miss()
+            response = view_method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def weak_etag(*parts):
+    """Weak validator from opaque parts; weak because compression may alter the bytes"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def catalog_etag(endpoint):
+    """
+    ETag function for django.views.decorators.http.condition on catalog views.
+
+    Derived from the catalog version, the product version on per-product
+    endpoints and the request params only, so a matching If-None-Match is
+    answered with 304 before the response cache is consulted and before any
+    queryset or serializer work.
+    """
+    def etag(request, *args, **kwargs):
+        return weak_etag(
+            CatalogCache.response_key(endpoint, request, kwargs),
+            getattr(request, "accepted_media_type", ""),
+        )
+    return etag
@@ -0,0 +1,79 @@
+import threading
+
+from django.db import transaction
+
+from api.v1.products.serializer.fast import FastProductSerializer
+from apps.products.models import Product, ProductCard
+
+
+_pending = threading.local()
+
+
+class ProductCards:
+    """
+    Pre-materialized product JSON (ProductSerializer shape), one card per product.
+
+    Listing views fetch the ids of a page and splice the stored cards
+    together instead of re-serializing. Writers call schedule() with the
+    affected product ids; refreshes are collected and run once per product
+    when the transaction commits. Cards missing at read time are built on
+    the spot, so a fresh database or a lost refresh heals itself.
+    """
+
+    @classmethod
+    def refresh(cls, product_ids):
+        """Re-serialize and store the cards for the given products; returns {id: payload}"""
+        product_ids = set(product_ids)
+        if not product_ids:
+            return {}
+        payloads = {
+            card['id']: card
+            for card in FastProductSerializer.serialize_queryset(Product.objects.filter(id__in=product_ids))
+        }
+        ProductCard.objects.bulk_create(
+            [ProductCard(product_id=product_id, payload=payload) for product_id, payload in payloads.items()],
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=["payload", "updated_at"],
+            batch_size=500,
+        )
+        # Products deleted in the meantime leave no card behind
+        ProductCard.objects.filter(product_id__in=product_ids - payloads.keys()).delete()
+        return payloads
+
+    @classmethod
+    def schedule(cls, product_ids):
+        """Refresh these products' cards once the current transaction commits"""
+        pending = getattr(_pending, "ids", None)
+        if pending is None:
+            pending = _pending.ids = set()
+        pending.update(product_ids)
+        # Every write registers a flush, but only the first one to run finds work to do
+        transaction.on_commit(cls._flush)
+
+    @classmethod
+    def _flush(cls):
+        pending = getattr(_pending, "ids", None)
+        if not pending:
+            return
+        _pending.ids = set()
+        cls.refresh(pending)
+
+    @classmethod
+    def for_ids(cls, product_ids):
+        """Cards in the given id order, building any that are missing"""
+        product_ids = list(product_ids)
+        cards = dict(ProductCard.objects.filter(product_id__in=product_ids).values_list("product_id", "payload"))
+        missing = [product_id for product_id in product_ids if product_id not in cards]
+        if missing:
+            cards.update(cls.refresh(missing))
+        return [cards[product_id] for product_id in product_ids if product_id in cards]
+
+    @classmethod
+    def rebuild(cls, batch_size=500):
+        """Regenerate every card in batches; returns the number written"""
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+        for start in range(0, len(product_ids), batch_size):
+            cls.refresh(product_ids[start:start + batch_size])
+        ProductCard.objects.exclude(product_id__in=Product.objects.values("id")).delete()
+        return len(product_ids)
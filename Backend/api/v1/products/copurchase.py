@@ -0,0 +1,212 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import BatchWatermark, ProductCoPurchase, ProductPairCount
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - build_co_purchases then refuses to run
+    np = None
+
+
+logger = logging.getLogger(__name__)
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit
+ID_CHUNK = 500
+
+
+def _chunks(values, size=ID_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class CoPurchases:
+    """
+    "Frequently bought together" built from OrderItem history.
+
+    Orders are consumed incrementally past a BatchWatermark. Each batch is
+    turned into a sparse product x product co-occurrence count with NumPy:
+    order lines are deduplicated, pairs are generated per basket by shifted
+    comparisons, and pair keys are summed like COO duplicates in scipy.sparse.
+    The counts are added to ProductPairCount, and the top-K neighbours of
+    every product touched by the batch are re-derived into ProductCoPurchase,
+    which is all the related endpoint reads.
+
+    Orders are counted unless cancelled when processed; a later
+    cancellation is only reflected after rebuild().
+
+    The watermark is an order id, and ids are assigned at INSERT but become
+    visible at COMMIT, so an id below the watermark could still appear. A
+    batch therefore stops before the first order younger than
+    CO_PURCHASE_SETTLE_SECONDS; such orders are picked up by a later run
+    once every transaction that could hold a lower id has finished.
+    """
+
+    JOB = "co_purchases"
+
+    @staticmethod
+    def count_pairs(order_ids, product_ids, max_basket):
+        """
+        Co-occurrence counts from parallel (order_id, product_id) line arrays.
+        Returns (product_a, product_b, orders) arrays with product_a < product_b.
+        """
+        order_ids = np.asarray(order_ids, dtype=np.int64)
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        empty = np.empty(0, dtype=np.int64)
+        if not len(order_ids):
+            return empty, empty, empty
+
+        # One line per (order, product), sorted by order then product
+        base = int(product_ids.max()) + 1
+        lines = np.unique(order_ids * base + product_ids)
+        orders, products = lines // base, lines % base
+
+        # Position of each line inside its basket; oversized baskets are truncated
+        starts = np.flatnonzero(np.r_[True, orders[1:] != orders[:-1]])
+        sizes = np.diff(np.r_[starts, len(orders)])
+        position = np.arange(len(orders)) - np.repeat(starts, sizes)
+        keep = position < max_basket
+        orders, products = orders[keep], products[keep]
+
+        # Pairing each line with the one `offset` places later covers every
+        # pair within a basket once, smaller product id first
+        left, right = [], []
+        for offset in range(1, min(int(sizes.max()), max_basket)):
+            same_order = orders[offset:] == orders[:-offset]
+            left.append(products[:-offset][same_order])
+            right.append(products[offset:][same_order])
+        if not left:
+            return empty, empty, empty
+
+        keys, counts = np.unique(np.concatenate(left) * base + np.concatenate(right), return_counts=True)
+        return keys // base, keys % base, counts.astype(np.int64)
+
+    @staticmethod
+    def top_k(sources, targets, counts, k):
+        """
+        (source, target, count, rank) rows keeping the k highest counts per
+        source; ties go to the lower target id.
+        """
+        order = np.lexsort((targets, -counts, sources))
+        sources, targets, counts = sources[order], targets[order], counts[order]
+        starts = np.flatnonzero(np.r_[True, sources[1:] != sources[:-1]])
+        sizes = np.diff(np.r_[starts, len(sources)])
+        ranks = np.arange(len(sources)) - np.repeat(starts, sizes)
+        keep = ranks < k
+        return zip(
+            sources[keep].tolist(), targets[keep].tolist(), counts[keep].tolist(), ranks[keep].tolist()
+        )
+
+    @classmethod
+    def update(cls, batch_orders=None, max_basket=None, k=None, settle_seconds=None):
+        """Process settled orders past the watermark; returns {'orders', 'pairs', 'products'} totals"""
+        batch_orders = batch_orders or settings.CO_PURCHASE_BATCH_ORDERS
+        max_basket = max_basket or settings.CO_PURCHASE_MAX_BASKET
+        k = k or settings.CO_PURCHASE_TOP_K
+        if settle_seconds is None:
+            settle_seconds = settings.CO_PURCHASE_SETTLE_SECONDS
+
+        totals = {'orders': 0, 'pairs': 0, 'products': 0}
+        watermark = BatchWatermark.get(cls.JOB)
+        orders = Order.objects.filter(id__gt=watermark)
+        cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+        unsettled = orders.filter(created_at__gte=cutoff).order_by('id').values_list('id', flat=True).first()
+        if unsettled is not None:
+            orders = orders.filter(id__lt=unsettled)
+        while True:
+            window = list(
+                orders.filter(id__gt=watermark).order_by('id').values_list('id', flat=True)[:batch_orders]
+            )
+            if not window:
+                break
+            last = window[-1]
+            lines = list(
+                OrderItem.objects.filter(order_id__gt=watermark, order_id__lte=last)
+                .exclude(order__status=Order.CANCELLED)
+                .values_list('order_id', 'product_id')
+            )
+            order_ids = np.fromiter((line[0] for line in lines), dtype=np.int64, count=len(lines))
+            product_ids = np.fromiter((line[1] for line in lines), dtype=np.int64, count=len(lines))
+            product_a, product_b, counts = cls.count_pairs(order_ids, product_ids, max_basket)
+
+            with transaction.atomic():
+                touched = cls._merge_pairs(product_a, product_b, counts)
+                cls._refresh_neighbours(touched, k)
+                BatchWatermark.advance(cls.JOB, last)
+
+            totals['orders'] += len(window)
+            totals['pairs'] += len(counts)
+            totals['products'] += len(touched)
+            logger.info("Co-purchases: processed orders up to #%s (%s pairs)", last, len(counts))
+            watermark = last
+        return totals
+
+    @classmethod
+    def rebuild(cls, **options):
+        """Drop all counts and recount every order from the beginning"""
+        with transaction.atomic():
+            ProductPairCount.objects.all().delete()
+            ProductCoPurchase.objects.all().delete()
+            BatchWatermark.advance(cls.JOB, 0)
+        return cls.update(**options)
+
+    @staticmethod
+    def _merge_pairs(product_a, product_b, counts):
+        """Add batch counts onto ProductPairCount; returns the product ids involved"""
+        deltas = dict(zip(zip(product_a.tolist(), product_b.tolist()), counts.tolist()))
+        for chunk in _chunks(sorted(set(product_a.tolist()))):
+            existing = ProductPairCount.objects.filter(product_a_id__in=chunk).values_list(
+                'product_a_id', 'product_b_id', 'orders'
+            )
+            for a, b, orders in existing:
+                if (a, b) in deltas:
+                    deltas[(a, b)] += orders
+
+        ProductPairCount.objects.bulk_create(
+            [ProductPairCount(product_a_id=a, product_b_id=b, orders=orders) for (a, b), orders in deltas.items()],
+            update_conflicts=True,
+            unique_fields=['product_a', 'product_b'],
+            update_fields=['orders'],
+            batch_size=500,
+        )
+        return set(product_a.tolist()) | set(product_b.tolist())
+
+    @classmethod
+    def _refresh_neighbours(cls, product_ids, k):
+        """Re-derive the top-k ProductCoPurchase rows of the given products"""
+        for chunk in _chunks(sorted(product_ids)):
+            rows = list(
+                ProductPairCount.objects.filter(Q(product_a_id__in=chunk) | Q(product_b_id__in=chunk))
+                .values_list('product_a_id', 'product_b_id', 'orders')
+            )
+            pairs = np.array(rows, dtype=np.int64).reshape(-1, 3)
+            # Both directions of each pair, restricted to this chunk's products
+            sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+            targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+            counts = np.concatenate([pairs[:, 2], pairs[:, 2]])
+            mine = np.isin(sources, chunk)
+
+            ProductCoPurchase.objects.filter(product_id__in=chunk).delete()
+            ProductCoPurchase.objects.bulk_create(
+                [
+                    ProductCoPurchase(product_id=source, related_id=target, orders=orders, rank=rank)
+                    for source, target, orders, rank in cls.top_k(sources[mine], targets[mine], counts[mine], k)
+                ],
+                batch_size=500,
+            )
+
+    @staticmethod
+    def related_ids(product_id, limit):
+        """Neighbour ids of a product, most frequently co-purchased first"""
+        return list(
+            ProductCoPurchase.objects.filter(product_id=product_id).order_by('rank').values_list(
+                'related_id', flat=True
+            )[:limit]
+        )
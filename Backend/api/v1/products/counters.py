@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from apps.products.models import Category, Product
+
+
+class CategoryCounters:
+    """
+    Keeps Category.product_count / in_stock_count / featured_count in step
+    with product writes.
+
+    Writers wrap their changes in track() (or call capture() before and
+    record() after) with the affected product ids. Each product's contribution (category, listed as in stock, featured)
+    is read before and after the block, and only the difference is applied
+    to the category rows as F() increments in the same transaction.
+    "In stock" means what the public listing shows: in_stock is set and at
+    least one SKU has quantity left (Product.total_stock, so stock writes
+    must refresh SKU aggregates before record()). reconcile() recomputes everything from
+    the product table to catch drift from writes made outside track().
+    """
+
+    FIELDS = ('product_count', 'in_stock_count', 'featured_count')
+
+    @staticmethod
+    def listed_in_stock():
+        return Q(in_stock=True, total_stock__gt=0)
+
+    @classmethod
+    def snapshot(cls, product_ids, lock=False):
+        """{product_id: (category_id, (1, in_stock, featured))} for products that exist"""
+        if not product_ids:
+            return {}
+        products = Product.objects.filter(id__in=product_ids)
+        if lock:
+            products = products.select_for_update()
+        rows = products.annotate(listed=cls.listed_in_stock()).values_list(
+            'id', 'category_id', 'listed', 'featured'
+        )
+        return {
+            product_id: (category_id, (1, int(listed), int(featured)))
+            for product_id, category_id, listed, featured in rows
+        }
+
+    @staticmethod
+    def diff(before, after):
+        """{category_id: [product, in_stock, featured] deltas} between two snapshots"""
+        deltas = {}
+        for snapshot, sign in ((before, -1), (after, 1)):
+            for category_id, contribution in snapshot.values():
+                if category_id is None:
+                    continue
+                totals = deltas.setdefault(category_id, [0, 0, 0])
+                for i, value in enumerate(contribution):
+                    totals[i] += sign * value
+        return {category_id: totals for category_id, totals in deltas.items() if any(totals)}
+
+    @classmethod
+    def apply(cls, deltas):
+        for category_id, totals in deltas.items():
+            Category.objects.filter(id=category_id).update(**{
+                field: F(field) + delta for field, delta in zip(cls.FIELDS, totals) if delta
+            })
+
+    @classmethod
+    def capture(cls, product_ids):
+        """Lock and snapshot products about to be written; hand the result to record()"""
+        return cls.snapshot(set(product_ids), lock=True)
+
+    @classmethod
+    def record(cls, before, product_ids=()):
+        """
+        Apply the counter deltas since capture(); call in the same transaction
+        as the write. Returns the ids of products whose listing state
+        (category, listed as in stock, featured) changed.
+        """
+        after = cls.snapshot(set(product_ids) | before.keys())
+        cls.apply(cls.diff(before, after))
+        return {
+            product_id for product_id in before.keys() | after.keys()
+            if before.get(product_id) != after.get(product_id)
+        }
+
+    @classmethod
+    @contextmanager
+    def track(cls, product_ids=()):
+        """
+        capture()/record() around a block, in one transaction.
+
+        Yields the tracked id set; add ids of products created in the block.
+        """
+        tracked = set(product_ids)
+        with transaction.atomic():
+            before = cls.capture(tracked)
+            yield tracked
+            cls.record(before, tracked)
+
+    @classmethod
+    def expected(cls):
+        """{category_id: (product_count, in_stock_count, featured_count)} from the product table"""
+        rows = Product.objects.filter(category__isnull=False).annotate(
+            listed=cls.listed_in_stock()
+        ).order_by().values('category_id').annotate(
+            products=Count('id'),
+            listed_count=Count('id', filter=Q(listed=True)),
+            featured_count=Count('id', filter=Q(featured=True)),
+        ).values_list('category_id', 'products', 'listed_count', 'featured_count')
+        return {
+            category_id: (products, listed, featured)
+            for category_id, products, listed, featured in rows
+        }
+
+    @classmethod
+    def reconcile(cls, fix=True):
+        """
+        Compare stored counters with the product table.
+        Returns the categories that drifted; corrects them unless fix=False.
+        """
+        expected = cls.expected()
+        drifted = []
+        for category in Category.objects.only('id', 'name', *cls.FIELDS):
+            stored = tuple(getattr(category, field) for field in cls.FIELDS)
+            counts = expected.get(category.id, (0, 0, 0))
+            if stored != counts:
+                drifted.append((category, stored, counts))
+                for field, value in zip(cls.FIELDS, counts):
+                    setattr(category, field, value)
+        if fix and drifted:
+            Category.objects.bulk_update([category for category, _, _ in drifted], cls.FIELDS, batch_size=500)
+        return drifted
@@ -0,0 +1,151 @@
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, F, OuterRef, Q, Value
+from rest_framework.exceptions import ValidationError
+
+from api.v1.products.cache import CatalogCache
+from apps.products.models import ProductAttribute, ProductSKU
+
+
+class ProductFacets:
+    """
+    Facet filters and facet counts for product listing and search.
+
+    Counts are computed over the filtered result set with one grouped query
+    per facet family: categories, SKU attributes (size and color in a single
+    UNION) and price/rating buckets (conditional aggregation in one pass).
+    Views go through cached_counts(), so each filter combination is
+    aggregated once per catalog version rather than on every page.
+    """
+
+    # (label, lower bound inclusive, upper bound exclusive) on Product.min_price
+    PRICE_BUCKETS = [
+        ('0-500', None, Decimal('500')),
+        ('500-1000', Decimal('500'), Decimal('1000')),
+        ('1000-2500', Decimal('1000'), Decimal('2500')),
+        ('2500-5000', Decimal('2500'), Decimal('5000')),
+        ('5000+', Decimal('5000'), None),
+    ]
+    # "N stars & up" buckets on Product.rating_avg
+    RATING_BUCKETS = [4, 3, 2, 1]
+
+    @staticmethod
+    def _values(params, name):
+        """
+        Values of a multi-value filter, given as repeated params
+        (?category=A&category=B) or comma-separated. Each param also counts
+        as one whole value, so names containing commas still match.
+        """
+        values = {}
+        for value in params.getlist(name):
+            values[value.strip()] = None
+            values.update((part.strip(), None) for part in value.split(','))
+        values.pop('', None)
+        return list(values)
+
+    @staticmethod
+    def _decimal(params, name):
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            value = Decimal(value)
+        except InvalidOperation:
+            raise ValidationError({name: "Must be a number"})
+        if not value.is_finite():
+            raise ValidationError({name: "Must be a number"})
+        return value
+
+    @classmethod
+    def parse_filters(cls, params):
+        """Read facet filters from request query params"""
+        return {
+            'categories': cls._values(params, 'category'),
+            'sizes': cls._values(params, 'size'),
+            'colors': cls._values(params, 'color'),
+            'min_price': cls._decimal(params, 'min_price'),
+            'max_price': cls._decimal(params, 'max_price'),
+            'rating': cls._decimal(params, 'rating'),
+        }
+
+    @staticmethod
+    def _has_sku(attribute, values):
+        return Exists(ProductSKU.objects.filter(
+            product=OuterRef('pk'), quantity__gt=0, **{f'{attribute}__value__in': values}
+        ))
+
+    @classmethod
+    def apply_filters(cls, products, filters):
+        if not filters:
+            return products
+        if filters['categories']:
+            products = products.filter(category__name__in=filters['categories'])
+        if filters['sizes']:
+            products = products.filter(cls._has_sku('size_attribute', filters['sizes']))
+        if filters['colors']:
+            products = products.filter(cls._has_sku('color_attribute', filters['colors']))
+        if filters['min_price'] is not None:
+            products = products.filter(min_price__gte=filters['min_price'])
+        if filters['max_price'] is not None:
+            products = products.filter(min_price__lte=filters['max_price'])
+        if filters['rating'] is not None:
+            products = products.filter(rating_avg__gte=filters['rating'])
+        return products
+
+    @classmethod
+    def counts(cls, products):
+        """Facet counts for the given (already filtered) product queryset"""
+        products = products.order_by()
+        product_ids = products.values('id')
+
+        categories = {
+            row['category__name']: row['total']
+            for row in products.filter(category__isnull=False).values('category__name').annotate(
+                total=Count('id')
+            )
+        }
+
+        attributes = {ProductAttribute.SIZE: {}, ProductAttribute.COLOR: {}}
+        in_stock_skus = ProductSKU.objects.filter(product_id__in=product_ids, quantity__gt=0).order_by()
+        sizes = in_stock_skus.filter(size_attribute__isnull=False).values(
+            facet=Value(ProductAttribute.SIZE), value=F('size_attribute__value')
+        ).annotate(total=Count('product_id', distinct=True))
+        colors = in_stock_skus.filter(color_attribute__isnull=False).values(
+            facet=Value(ProductAttribute.COLOR), value=F('color_attribute__value')
+        ).annotate(total=Count('product_id', distinct=True))
+        for row in sizes.union(colors, all=True):
+            attributes[row['facet']][row['value']] = row['total']
+
+        buckets = {}
+        for idx, (label, lower, upper) in enumerate(cls.PRICE_BUCKETS):
+            condition = Q()
+            if lower is not None:
+                condition &= Q(min_price__gte=lower)
+            if upper is not None:
+                condition &= Q(min_price__lt=upper)
+            buckets[f'price_{idx}'] = Count('id', filter=condition)
+        for stars in cls.RATING_BUCKETS:
+            buckets[f'rating_{stars}'] = Count('id', filter=Q(rating_avg__gte=stars))
+        totals = products.aggregate(**buckets)
+
+        return {
+            'category': categories,
+            'size': attributes[ProductAttribute.SIZE],
+            'color': attributes[ProductAttribute.COLOR],
+            'price': {label: totals[f'price_{idx}'] for idx, (label, _, _) in enumerate(cls.PRICE_BUCKETS)},
+            'rating': {f'{stars}+': totals[f'rating_{stars}'] for stars in cls.RATING_BUCKETS},
+        }
+
+    @classmethod
+    def cached_counts(cls, products, cache_key_parts):
+        """counts() for a filter combination (never the cursor), cached under the catalog version"""
+        digest = hashlib.sha1(repr(sorted(cache_key_parts.items())).encode('utf-8')).hexdigest()
+        key = f"catalog:facets:{CatalogCache.get_version()}:{digest}"
+        facets = cache.get(key)
+        if facets is None:
+            facets = cls.counts(products)
+            cache.set(key, facets, settings.CATALOG_CACHE_TIMEOUT)
+        return facets
@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from api.v1.products.cache import CatalogCache
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over the indexed product sort orders.
+
+    Each sort order maps to a denormalized Product column backed by a
+    composite (in_stock, column, id) index, so fetching page N costs the
+    same index range scan as page 1. The cursor encodes the sort value and
+    id of the last product on the previous page.
+    """
+
+    # sort name -> (column, descending)
+    SORT_ORDERS = {
+        'newest': ('created_at', True),
+        'price_asc': ('min_price', False),
+        'price_desc': ('min_price', True),
+        'rating': ('rating_avg', True),
+        'popularity': ('popularity', True),
+        'bestselling': ('recent_sales', True),
+    }
+    DEFAULT_SORT = 'newest'
+    DEFAULT_LIMIT = 24
+    MAX_LIMIT = 100
+
+    def __init__(self, sort=None, cursor=None, limit=None):
+        self.sort = sort or self.DEFAULT_SORT
+        if self.sort not in self.SORT_ORDERS:
+            raise ValidationError({"sort": f"Unsupported sort order. Choose from: {', '.join(self.SORT_ORDERS)}"})
+        self.column, self.descending = self.SORT_ORDERS[self.sort]
+        self.cursor = self.decode_cursor(cursor) if cursor else None
+        self.limit = self.parse_limit(limit)
+
+    @classmethod
+    def parse_limit(cls, limit):
+        if limit in (None, ''):
+            return cls.DEFAULT_LIMIT
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValidationError({"limit": "Limit must be an integer"})
+        return max(1, min(limit, cls.MAX_LIMIT))
+
+    def order_by(self):
+        prefix = '-' if self.descending else ''
+        return [f'{prefix}{self.column}', f'{prefix}id']
+
+    def paginate(self, queryset):
+        """Return (products, next_cursor) for the page after the current cursor"""
+        if self.column == 'min_price':
+            queryset = queryset.filter(min_price__isnull=False)
+        queryset = queryset.order_by(*self.order_by())
+
+        if self.cursor is not None:
+            value, last_id = self.cursor
+            if self.descending:
+                queryset = queryset.filter(
+                    Q(**{f'{self.column}__lt': value}) | Q(**{self.column: value, 'id__lt': last_id})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.column}__gt': value}) | Q(**{self.column: value, 'id__gt': last_id})
+                )
+
+        products = list(queryset[:self.limit + 1])
+        next_cursor = None
+        if len(products) > self.limit:
+            products = products[:self.limit]
+            next_cursor = self.encode_cursor(products[-1])
+        return products, next_cursor
+
+    def encode_cursor(self, product):
+        value = getattr(product, self.column)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = json.dumps({'s': self.sort, 'v': value, 'id': product.id}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if payload['s'] != self.sort:
+                raise ValueError('cursor belongs to another sort order')
+            value = payload['v']
+            if self.column == 'created_at':
+                value = datetime.fromisoformat(value)
+            elif self.column in ('min_price', 'rating_avg'):
+                value = Decimal(value)
+                if not value.is_finite():
+                    raise ValueError('cursor value is not a number')
+            else:
+                value = int(value)
+            return value, int(payload['id'])
+        except (ValueError, KeyError, TypeError, ArithmeticError):
+            raise ValidationError({"cursor": "Invalid or expired cursor"})
+
+
+def estimated_count(queryset, cache_key_parts):
+    """
+    Product count for a filter combination, computed once per catalog
+    version and served from the cache afterwards.
+    """
+    digest = hashlib.sha1(repr(sorted(cache_key_parts.items())).encode('utf-8')).hexdigest()
+    key = f"catalog:count:{CatalogCache.get_version()}:{digest}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.order_by().count()
+        cache.set(key, count, settings.CATALOG_CACHE_TIMEOUT)
+    return count
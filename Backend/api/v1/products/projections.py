@@ -0,0 +1,180 @@
+from apps.products.models import Product, ProductSKU, ProductImage, ProductDetail, ProductReviewStats
+
+
+EMPTY_RATING_BREAKDOWN = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+# Mirrors ProductDetailSerializer.Meta.fields (all non-null text columns)
+DETAIL_FIELDS = ('material', 'care_instructions', 'fit', 'brand')
+
+
+class ProductProjection:
+    """
+    Batched read model for the computed fields of ProductSerializer.
+
+    Sizes, colors, minimum price, images, details and review summaries are
+    resolved for a whole page of products in a fixed number of queries.
+    Review summaries come from the denormalized ProductReviewStats rows.
+    Relations that were already prefetched on the products (see
+    ProductServices.get_products) are reused instead of re-queried.
+    """
+
+    @classmethod
+    def build(cls, products):
+        """
+        Return {product_id: projection dict} for the given products. Besides
+        model instances, any object exposing pk, cover and original_price
+        works; its relations are then always fetched in batch.
+        """
+        products = [product for product in products if product is not None]
+        if not products:
+            return {}
+
+        projections = {
+            product.pk: {
+                'images': [],
+                'sizes': [],
+                'colors': [],
+                'price': None,
+                'details': None,
+                'review_summary': None,
+            }
+            for product in products
+        }
+
+        cls._project_skus(products, projections)
+        cls._project_images(products, projections)
+        cls._project_details(products, projections)
+        cls._project_reviews(products, projections)
+
+        for product in products:
+            projection = projections[product.pk]
+            if not projection['images'] and product.cover:
+                projection['images'] = [product.cover]
+            if projection['price'] is None:
+                projection['price'] = float(product.original_price) if product.original_price else 0.0
+        return projections
+
+    @staticmethod
+    def _is_prefetched(product, relation):
+        return relation in getattr(product, '_prefetched_objects_cache', {})
+
+    @staticmethod
+    def _is_cached(descriptor, product):
+        """Whether a select_related relation is loaded; plain rows never have one"""
+        return hasattr(product, '_state') and descriptor.is_cached(product)
+
+    @classmethod
+    def _project_skus(cls, products, projections):
+        """Distinct sizes/colors (first-seen order) and minimum price per product"""
+        rows = []
+        missing = []
+        for product in products:
+            if cls._is_prefetched(product, 'skus'):
+                for sku in sorted(product.skus.all(), key=lambda s: s.pk):
+                    rows.append((
+                        product.pk,
+                        sku.price,
+                        sku.size_attribute.value if sku.size_attribute_id else None,
+                        sku.color_attribute.value if sku.color_attribute_id else None,
+                    ))
+            else:
+                missing.append(product.pk)
+
+        if missing:
+            rows.extend(
+                ProductSKU.objects.filter(product_id__in=missing)
+                .order_by('product_id', 'id')
+                .values_list('product_id', 'price', 'size_attribute__value', 'color_attribute__value')
+            )
+
+        for product_id, price, size, color in rows:
+            projection = projections[product_id]
+            if size is not None and size not in projection['sizes']:
+                projection['sizes'].append(size)
+            if color is not None and color not in projection['colors']:
+                projection['colors'].append(color)
+            if projection['price'] is None or float(price) < projection['price']:
+                projection['price'] = float(price)
+
+    @classmethod
+    def _project_images(cls, products, projections):
+        """Image URLs ordered by display order"""
+        missing = []
+        for product in products:
+            if cls._is_prefetched(product, 'images'):
+                images = sorted(product.images.all(), key=lambda img: (img.order, img.created_at))
+                projections[product.pk]['images'] = [img.image_url for img in images]
+            else:
+                missing.append(product.pk)
+
+        if missing:
+            rows = ProductImage.objects.filter(product_id__in=missing).order_by(
+                'product_id', 'order', 'created_at'
+            ).values_list('product_id', 'image_url')
+            for product_id, image_url in rows:
+                projections[product_id]['images'].append(image_url)
+
+    @staticmethod
+    def _details_dict(details):
+        """ProductDetailSerializer output without instantiating a serializer per row"""
+        return {field: getattr(details, field) for field in DETAIL_FIELDS}
+
+    @classmethod
+    def _project_details(cls, products, projections):
+        """ProductDetail fields, reusing select_related('details') when present"""
+        missing = []
+        for product in products:
+            if cls._is_cached(Product.details, product):
+                try:
+                    details = product.details
+                except ProductDetail.DoesNotExist:
+                    continue
+                projections[product.pk]['details'] = cls._details_dict(details)
+            else:
+                missing.append(product.pk)
+
+        if missing:
+            for details in ProductDetail.objects.filter(product_id__in=missing):
+                projections[details.product_id]['details'] = cls._details_dict(details)
+
+    @classmethod
+    def _project_reviews(cls, products, projections):
+        """Review summaries read from ProductReviewStats, O(1) per product"""
+        stats_by_product = {}
+        missing = []
+        for product in products:
+            if cls._is_cached(Product.review_stats, product):
+                try:
+                    stats_by_product[product.pk] = product.review_stats
+                except ProductReviewStats.DoesNotExist:
+                    pass
+            else:
+                missing.append(product.pk)
+
+        if missing:
+            for stats in ProductReviewStats.objects.filter(product_id__in=missing):
+                stats_by_product[stats.product_id] = stats
+
+        for product in products:
+            stats = stats_by_product.get(product.pk)
+            breakdown = stats.rating_breakdown if stats else dict(EMPTY_RATING_BREAKDOWN)
+            projections[product.pk]['review_summary'] = cls.review_summary(breakdown)
+
+    @staticmethod
+    def review_summary(breakdown):
+        """Build the review_summary payload from a {rating: count} breakdown"""
+        total_reviews = sum(breakdown.values())
+        if total_reviews == 0:
+            return {
+                'average_rating': 0,
+                'total_ratings': 0,
+                'total_reviews': 0,
+                'rating_breakdown': dict(EMPTY_RATING_BREAKDOWN)
+            }
+
+        total_rating = sum(rating * count for rating, count in breakdown.items())
+        return {
+            'average_rating': round(total_rating / total_reviews, 1),
+            'total_ratings': total_reviews,
+            'total_reviews': total_reviews,
+            'rating_breakdown': breakdown
+        }
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product, ProductDailySales, ProductSalesRank
+
+
+class SalesRankings:
+    """
+    Bestseller and trending ranks from the ProductDailySales rollup.
+
+    OrderService keeps the per-day unit counts current as orders are
+    placed, cancelled and un-cancelled. refresh() folds the last 30 days
+    into ProductSalesRank (one row per product that sold anything) and
+    copies the 30-day units to Product.recent_sales for ?sort=bestselling.
+    Trending compares the last 7 days against the 30-day pace, so a
+    product selling steadily scores 0 and one picking up scores high.
+    """
+
+    WINDOWS = (1, 7, 30)
+
+    @staticmethod
+    def trend_score(units_7d, units_30d):
+        return units_7d - units_30d * 7 / 30
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, today=None):
+        """Rewrite the ranking table from the daily rollup; returns the number of ranked products"""
+        today = today or timezone.localdate()
+        since = {window: today - timedelta(days=window - 1) for window in cls.WINDOWS}
+        rows = ProductDailySales.objects.filter(day__gte=since[30], day__lte=today).order_by().values(
+            'product_id'
+        ).annotate(
+            units_1d=Sum('units', filter=Q(day__gte=since[1]), default=0),
+            units_7d=Sum('units', filter=Q(day__gte=since[7]), default=0),
+            units_30d=Sum('units', default=0),
+        )
+
+        ranks = []
+        for row in rows:
+            rank = ProductSalesRank(
+                product_id=row['product_id'],
+                units_1d=max(row['units_1d'], 0),
+                units_7d=max(row['units_7d'], 0),
+                units_30d=max(row['units_30d'], 0),
+            )
+            if rank.units_30d:
+                rank.trend_score = round(cls.trend_score(rank.units_7d, rank.units_30d), 4)
+                ranks.append(rank)
+
+        for position, rank in enumerate(sorted(ranks, key=lambda r: (-r.units_30d, r.product_id)), 1):
+            rank.bestseller_rank = position
+        trending = [rank for rank in ranks if rank.trend_score > 0]
+        for position, rank in enumerate(
+            sorted(trending, key=lambda r: (-r.trend_score, -r.units_7d, r.product_id)), 1
+        ):
+            rank.trending_rank = position
+
+        ProductSalesRank.objects.all().delete()
+        ProductSalesRank.objects.bulk_create(ranks, batch_size=500)
+
+        # Mirror 30-day units onto Product for the indexed bestselling sort
+        current = dict(Product.objects.filter(
+            Q(recent_sales__gt=0) | Q(sales_rank__isnull=False)
+        ).values_list('id', 'recent_sales'))
+        expected = {rank.product_id: rank.units_30d for rank in ranks}
+        changed = [
+            Product(id=product_id, recent_sales=expected.get(product_id, 0))
+            for product_id, recent_sales in current.items()
+            if recent_sales != expected.get(product_id, 0)
+        ]
+        Product.objects.bulk_update(changed, ['recent_sales'], batch_size=500)
+
+        ProductDailySales.objects.filter(day__lt=since[30]).delete()
+        return len(ranks)
+
+    @classmethod
+    @transaction.atomic
+    def rebuild_daily(cls, today=None):
+        """Recompute the daily rollup for the retention window from OrderItem"""
+        today = today or timezone.localdate()
+        start = today - timedelta(days=ProductDailySales.RETENTION_DAYS)
+        rows = OrderItem.objects.filter(
+            order__created_at__date__gte=start
+        ).exclude(order__status=Order.CANCELLED).annotate(
+            day=TruncDate('order__created_at', tzinfo=timezone.get_current_timezone())
+        ).order_by().values('product_id', 'day').annotate(units=Sum('quantity'))
+
+        ProductDailySales.objects.all().delete()
+        ProductDailySales.objects.bulk_create(
+            [ProductDailySales(product_id=row['product_id'], day=row['day'], units=row['units']) for row in rows],
+            batch_size=500,
+        )
+
+    @staticmethod
+    def trending_ids(limit):
+        """In-stock product ids by trending rank"""
+        return list(
+            ProductSalesRank.objects.filter(trending_rank__isnull=False, product__in_stock=True)
+            .order_by('trending_rank').values_list('product_id', flat=True)[:limit]
+        )
@@ -0,0 +1,100 @@
+import random
+
+from django.conf import settings
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api.v1.products.cache import CatalogCache
+from apps.products.models import Coupon, CouponUsageShard
+
+
+class CouponRedemptions:
+    """
+    Coupon use counting that doesn't serialize checkouts on the coupon row.
+
+    Uses are counted on COUPON_USAGE_SHARDS CouponUsageShard rows per
+    coupon, created on first use and seeded from used_count. redeem()
+    increments a random shard with a guarded UPDATE, so concurrent orders
+    with one campaign code mostly lock different rows. With a usage limit
+    each shard may count at most its share of the limit (the shares sum to
+    the limit), so the limit is never overshot; when the shards a buyer
+    tries are full it moves on to the others. A lowered limit can leave
+    shards filled past their new share while others still have room, so
+    redeem() also refuses once the shards' total reaches the limit, and a
+    limit change settles the coupon. settle() folds the shards into
+    Coupon.used_count and deactivates an exhausted coupon after the order
+    commits; only the deactivation invalidates cached catalog responses.
+    """
+
+    @staticmethod
+    def share(total, shards, shard):
+        """Shard `shard`'s part of `total` split evenly over `shards` rows"""
+        return total // shards + (shard < total % shards)
+
+    @classmethod
+    def shards(cls, coupon):
+        """[(shard, used)] for the coupon, creating the shards on first use"""
+        rows = list(CouponUsageShard.objects.filter(coupon=coupon).values_list('shard', 'used'))
+        if rows:
+            return rows
+        count = settings.COUPON_USAGE_SHARDS
+        CouponUsageShard.objects.bulk_create(
+            [
+                CouponUsageShard(coupon=coupon, shard=shard, used=cls.share(coupon.used_count, count, shard))
+                for shard in range(count)
+            ],
+            ignore_conflicts=True,
+        )
+        return list(CouponUsageShard.objects.filter(coupon=coupon).values_list('shard', 'used'))
+
+    @classmethod
+    def redeem(cls, coupon):
+        """Count one use of the coupon; False if its usage limit is reached"""
+        rows = cls.shards(coupon)
+        count = len(rows)
+        if coupon.usage_limit is not None:
+            if sum(used for _, used in rows) >= coupon.usage_limit:
+                return False
+            rows = [(shard, used) for shard, used in rows if used < cls.share(coupon.usage_limit, count, shard)]
+        random.shuffle(rows)
+        for shard, _ in rows:
+            target = CouponUsageShard.objects.filter(coupon=coupon, shard=shard)
+            if coupon.usage_limit is not None:
+                target = target.filter(used__lt=cls.share(coupon.usage_limit, count, shard))
+            if target.update(used=F('used') + 1):
+                return True
+        return False
+
+    @classmethod
+    def release(cls, coupon):
+        """Uncount one use (a cancelled order); False if nothing was counted"""
+        rows = [shard for shard, used in cls.shards(coupon) if used]
+        random.shuffle(rows)
+        for shard in rows:
+            if CouponUsageShard.objects.filter(coupon=coupon, shard=shard, used__gt=0).update(used=F('used') - 1):
+                return True
+        return False
+
+    @staticmethod
+    def reset(coupon):
+        """Drop the shards after used_count was set by hand; the next use re-seeds them from it"""
+        CouponUsageShard.objects.filter(coupon=coupon).delete()
+
+    @staticmethod
+    def settle(coupon_id):
+        """Fold the shards into used_count and deactivate the coupon at its limit, in one UPDATE each"""
+        used = Coalesce(
+            Subquery(
+                CouponUsageShard.objects.filter(coupon=OuterRef('pk')).order_by().values('coupon').annotate(
+                    used=Sum('used')
+                ).values('used'),
+                output_field=IntegerField(),
+            ),
+            F('used_count'),
+        )
+        coupons = Coupon.objects.filter(id=coupon_id)
+        if coupons.filter(is_active=True, usage_limit__lte=used).update(used_count=used, is_active=False):
+            # The coupon just left the public coupon list
+            CatalogCache.bump_version()
+        else:
+            coupons.update(used_count=used)
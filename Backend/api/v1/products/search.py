@@ -0,0 +1,150 @@
+import re
+import time
+
+from django.db import connection
+from django.db.models import Q
+
+from apps.products.models import Product
+
+
+FTS_TABLE = "products_product_fts"
+SEARCH_VECTOR_COLUMN = "search_vector"
+SEARCH_VECTOR_INDEX = "products_product_search_idx"
+TEXT_SEARCH_CONFIG = "english"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query):
+    """Lower-cased word tokens; everything else is dropped so queries can't inject operators"""
+    return TOKEN_RE.findall(query.lower())[:16]
+
+
+class BaseSearchBackend:
+    """
+    Ranked product search behind ProductServices.get_search_results.
+
+    Backends return product ids best match first. Field weights favour
+    matches in the product name over the summary and description.
+    """
+
+    FIELD_WEIGHTS = {"name": 10.0, "summary": 4.0, "description": 1.0}
+
+    def search_ids(self, query, limit):
+        raise NotImplementedError
+
+    def index_product(self, product):
+        """Refresh one product's index entry (no-op where the database keeps it in sync)"""
+
+    def remove_product(self, product_id):
+        """Drop one product's index entry (no-op where the database keeps it in sync)"""
+
+    def rebuild(self):
+        """Rebuild the whole index in bulk; returns the number of indexed products"""
+        return Product.objects.count()
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """Fallback for databases without a full-text index: unranked substring match"""
+
+    def search_ids(self, query, limit):
+        return list(
+            Product.objects.filter(
+                Q(name__icontains=query) | Q(summary__icontains=query) | Q(description__icontains=query)
+            ).order_by("-created_at", "-id").values_list("id", flat=True)[:limit]
+        )
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """SQLite FTS5 index ranked with per-column bm25 weights"""
+
+    def search_ids(self, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        match = " ".join(f'"{token}"*' for token in tokens)
+        weights = ", ".join(str(weight) for weight in self.FIELD_WEIGHTS.values())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_product(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, summary, description) VALUES (%s, %s, %s, %s)",
+                [product.pk, product.name, product.summary, product.description],
+            )
+
+    def remove_product(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, summary, description) "
+                f"SELECT id, name, summary, description FROM {Product._meta.db_table}"
+            )
+            return cursor.rowcount
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL tsvector search. The weighted vector is a generated column
+    with a GIN index, so PostgreSQL keeps it in sync on every write.
+    """
+
+    def search_ids(self, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM {Product._meta.db_table} "
+                f"WHERE {SEARCH_VECTOR_COLUMN} @@ to_tsquery('{TEXT_SEARCH_CONFIG}', %s) "
+                f"ORDER BY ts_rank_cd({SEARCH_VECTOR_COLUMN}, to_tsquery('{TEXT_SEARCH_CONFIG}', %s)) DESC, id DESC "
+                f"LIMIT %s",
+                [tsquery, tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"REINDEX INDEX {SEARCH_VECTOR_INDEX}")
+        return Product.objects.count()
+
+
+# database -> (table exists, monotonic time checked); reset after migrate
+_fts_tables = {}
+FTS_MISSING_RECHECK_SECONDS = 60.0
+
+
+def fts_table_exists():
+    """Whether the FTS5 table exists; found once per database, a miss is rechecked every minute"""
+    database = str(connection.settings_dict["NAME"])
+    exists, checked_at = _fts_tables.get(database, (False, None))
+    now = time.monotonic()
+    if not exists and (checked_at is None or now - checked_at > FTS_MISSING_RECHECK_SECONDS):
+        exists = FTS_TABLE in connection.introspection.table_names()
+        _fts_tables[database] = (exists, now)
+    return exists
+
+
+def reset_fts_table_cache():
+    """Forget table checks so a just-migrated FTS table is used at once"""
+    _fts_tables.clear()
+
+
+def get_search_backend():
+    """Pick the search backend matching the active database"""
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if connection.vendor == "sqlite" and fts_table_exists():
+        return SQLiteFTSSearchBackend()
+    return IContainsSearchBackend()
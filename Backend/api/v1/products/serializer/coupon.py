@@ -41,8 +41,8 @@ class CouponValidateSerializer(serializers.Serializer):
         amount = attrs.get('amount')
         
         try:
-            # Use select_for_update to lock coupon during validation (if in transaction)
-            coupon = Coupon.objects.select_for_update(skip_locked=True).get(code=code.upper())
+            # A preview only: checkout counts the use (see CouponRedemptions), so don't lock
+            coupon = Coupon.objects.get(code=code.upper())
         except Coupon.DoesNotExist:
             raise serializers.ValidationError({"code": "Invalid coupon code"})
         
@@ -59,8 +59,7 @@ class CouponValidateSerializer(serializers.Serializer):
         if coupon.valid_until < now:
             raise serializers.ValidationError({"code": "This coupon has expired"})
         
-        # Check usage limit - refresh from DB to get latest count
-        coupon.refresh_from_db()
+        # Check usage limit against the folded count
         if coupon.usage_limit is not None and coupon.used_count >= coupon.usage_limit:
             raise serializers.ValidationError({"code": "This coupon has reached its usage limit"})
         
@@ -0,0 +1,168 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from api.v1.products.projections import ProductProjection
+
+
+def drf_decimal(value, decimal_places=2):
+    """Decimal rendered the way DRF's DecimalField does (string, fixed places)"""
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value).strip())
+    return '{:f}'.format(value.quantize(Decimal(1).scaleb(-decimal_places)))
+
+
+def drf_datetime(value):
+    """Datetime rendered the way DRF's DateTimeField does (current timezone, 'Z' for UTC)"""
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class ProductViews:
+    """Named response shapes for product listings (?view=...)"""
+
+    FULL = 'full'
+    CARD = 'card'
+    OMITTED_FIELDS = {
+        FULL: (),
+        CARD: ('description',),
+    }
+
+    @classmethod
+    def parse(cls, value):
+        view = value or cls.FULL
+        if view not in cls.OMITTED_FIELDS:
+            raise ValidationError({"view": f"Unsupported view. Choose from: {', '.join(cls.OMITTED_FIELDS)}"})
+        return view
+
+    @classmethod
+    def apply(cls, rows, view):
+        omitted = cls.OMITTED_FIELDS[view]
+        if not omitted:
+            return rows
+        return [{key: value for key, value in row.items() if key not in omitted} for row in rows]
+
+
+class FastProductSerializer:
+    """
+    Read-only ProductSerializer equivalent building plain dicts.
+
+    Uses the same batched ProductProjection for computed fields, but skips
+    DRF's per-field machinery. Works from model instances (serialize_many)
+    or straight from .values() rows (serialize_queryset). Output is
+    identical to ProductSerializer.
+    """
+
+    VALUE_FIELDS = (
+        'id', 'name', 'summary', 'description', 'category__name', 'cover',
+        'original_price', 'featured', 'in_stock', 'created_at',
+    )
+
+    @staticmethod
+    def _build(rows, projections, view):
+        data = []
+        for row in rows:
+            projection = projections[row['id']]
+            data.append({
+                'id': row['id'],
+                'name': row['name'],
+                'summary': row['summary'],
+                'description': row['description'],
+                'category': row['category__name'],
+                'cover': row['cover'],
+                'original_price': drf_decimal(row['original_price']),
+                'featured': row['featured'],
+                'in_stock': row['in_stock'],
+                'images': projection['images'],
+                'sizes': projection['sizes'],
+                'colors': projection['colors'],
+                'price': projection['price'],
+                'details': projection['details'],
+                'review_summary': projection['review_summary'],
+                'created_at': drf_datetime(row['created_at']),
+            })
+        return ProductViews.apply(data, view)
+
+    @classmethod
+    def serialize_many(cls, products, view=ProductViews.FULL):
+        """Serialize model instances, reusing their select_related/prefetch caches"""
+        products = list(products)
+        rows = [
+            {
+                'id': product.pk,
+                'name': product.name,
+                'summary': product.summary,
+                'description': product.description,
+                'category__name': str(product.category) if product.category_id else None,
+                'cover': product.cover,
+                'original_price': product.original_price,
+                'featured': product.featured,
+                'in_stock': product.in_stock,
+                'created_at': product.created_at,
+            }
+            for product in products
+        ]
+        return cls._build(rows, ProductProjection.build(products), view)
+
+    @classmethod
+    def serialize_queryset(cls, queryset, view=ProductViews.FULL):
+        """Serialize from .values() rows without instantiating Product models"""
+        rows = list(queryset.select_related(None).prefetch_related(None).values(*cls.VALUE_FIELDS))
+        handles = [
+            SimpleNamespace(pk=row['id'], cover=row['cover'], original_price=row['original_price'])
+            for row in rows
+        ]
+        return cls._build(rows, ProductProjection.build(handles), view)
+
+    @classmethod
+    def serialize(cls, product):
+        return cls.serialize_many([product])[0]
+
+
+class FastProductSKUSerializer:
+    """Read-only ProductSKUSerializer equivalent"""
+
+    VALUE_FIELDS = ('id', 'sku', 'color_attribute__value', 'size_attribute__value', 'price', 'quantity')
+
+    @staticmethod
+    def _build(rows):
+        return [
+            {
+                'id': sku_id,
+                'sku': code,
+                'color': color,
+                'size': size,
+                'price': drf_decimal(price),
+                'quantity': quantity,
+            }
+            for sku_id, code, color, size, price, quantity in rows
+        ]
+
+    @classmethod
+    def serialize_many(cls, skus):
+        """Serialize SKU instances; expects size/color attributes select_related"""
+        return cls._build(
+            (
+                sku.pk, sku.sku,
+                sku.color_attribute.value if sku.color_attribute_id else None,
+                sku.size_attribute.value if sku.size_attribute_id else None,
+                sku.price, sku.quantity,
+            )
+            for sku in skus
+        )
+
+    @classmethod
+    def serialize_queryset(cls, queryset):
+        """Serialize from .values_list() rows without instantiating SKU models"""
+        return cls._build(queryset.select_related(None).values_list(*cls.VALUE_FIELDS))
@@ -1,5 +1,8 @@
+from django.db import models
 from rest_framework import serializers
-from apps.products.models import Product, ProductImage, ProductSKU, ProductDetail, ProductReview
+
+from api.v1.products.projections import ProductProjection
+from apps.products.models import Product, ProductImage, ProductDetail
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -23,6 +26,16 @@ class ProductReviewSummarySerializer(serializers.Serializer):
     rating_breakdown = serializers.DictField()
 
 
+class ProductListSerializer(serializers.ListSerializer):
+    """List serializer that projects computed fields for the whole page at once"""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        products = list(iterable)
+        self.child.projections = ProductProjection.build(products)
+        return [self.child.to_representation(product) for product in products]
+
+
 class ProductSerializer(serializers.ModelSerializer):
     category = serializers.StringRelatedField()
     images = serializers.SerializerMethodField()
@@ -40,70 +53,35 @@ class ProductSerializer(serializers.ModelSerializer):
             'images', 'sizes', 'colors', 'price', 'details', 
             'review_summary', 'created_at'
         ]
+        list_serializer_class = ProductListSerializer
+    
+    def get_projection(self, obj):
+        """Get the batched projection for a product, building it on demand"""
+        projections = getattr(self, 'projections', None)
+        if projections is None or obj.pk not in projections:
+            self.projections = ProductProjection.build([obj])
+        return self.projections[obj.pk]
     
     def get_images(self, obj):
         """Get all product images ordered by order field"""
-        images = obj.images.all().order_by('order')
-        return [img.image_url for img in images] if images.exists() else ([obj.cover] if obj.cover else [])
+        return self.get_projection(obj)['images']
     
     def get_sizes(self, obj):
         """Get unique sizes from product SKUs"""
-        sizes = ProductSKU.objects.filter(
-            product=obj,
-            size_attribute__isnull=False
-        ).select_related('size_attribute').values_list(
-            'size_attribute__value', flat=True
-        ).distinct()
-        return list(sizes)
+        return self.get_projection(obj)['sizes']
     
     def get_colors(self, obj):
         """Get unique colors from product SKUs"""
-        colors = ProductSKU.objects.filter(
-            product=obj,
-            color_attribute__isnull=False
-        ).select_related('color_attribute').values_list(
-            'color_attribute__value', flat=True
-        ).distinct()
-        return list(colors)
+        return self.get_projection(obj)['colors']
     
     def get_price(self, obj):
         """Get minimum price from product SKUs"""
-        sku = ProductSKU.objects.filter(product=obj).order_by('price').first()
-        return float(sku.price) if sku else (float(obj.original_price) if obj.original_price else 0.0)
+        return self.get_projection(obj)['price']
     
     def get_details(self, obj):
         """Get product additional details if available"""
-        try:
-            details = obj.details
-            return ProductDetailSerializer(details).data
-        except ProductDetail.DoesNotExist:
-            return None
+        return self.get_projection(obj)['details']
     
     def get_review_summary(self, obj):
         """Get product review summary"""
-        reviews = ProductReview.objects.filter(product=obj)
-        total_reviews = reviews.count()
-        
-        if total_reviews == 0:
-            return {
-                'average_rating': 0,
-                'total_ratings': 0,
-                'total_reviews': 0,
-                'rating_breakdown': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-            }
-        
-        # Calculate average rating
-        total_rating = sum(review.rating for review in reviews)
-        average_rating = round(total_rating / total_reviews, 1)
-        
-        # Calculate rating breakdown
-        rating_breakdown = {i: 0 for i in range(1, 6)}
-        for review in reviews:
-            rating_breakdown[review.rating] += 1
-        
-        return {
-            'average_rating': average_rating,
-            'total_ratings': total_reviews,
-            'total_reviews': total_reviews,
-            'rating_breakdown': rating_breakdown
-        }
+        return self.get_projection(obj)['review_summary']
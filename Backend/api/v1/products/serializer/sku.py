@@ -3,8 +3,8 @@ from apps.products.models import ProductSKU
 
 
 class ProductSKUSerializer(serializers.ModelSerializer):
-    color = serializers.CharField(source="color_attribute.value")
-    size = serializers.CharField(source="size_attribute.value")
+    color = serializers.CharField(source="color_attribute.value", allow_null=True)
+    size = serializers.CharField(source="size_attribute.value", allow_null=True)
 
     class Meta:
         model = ProductSKU
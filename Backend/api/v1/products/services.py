@@ -1,29 +1,34 @@
 from django.shortcuts import get_object_or_404
 from django.http import Http404
-from django.db.models import Q, Prefetch, Count
+from django.db.models import Prefetch, Case, When
 
+from api.v1.products.facets import ProductFacets
+from api.v1.products.search import get_search_backend
 from apps.products.models import Product, ProductSKU, ProductImage, Category
 
 
 class ProductServices:
     """Service for product operations - business logic separated from views"""
 
+    SEARCH_MAX_RESULTS = 200
+
     @classmethod
-    def get_products(cls, featured=None, category=None, include_out_of_stock=False):
+    def get_products(cls, featured=None, category=None, include_out_of_stock=False, filters=None):
         """
         Get all products with optimized queries
         Args:
             featured: Filter by featured status (True/False/None)
             category: Filter by category name (string/None)
             include_out_of_stock: If True, return all products; otherwise hide out-of-stock
+            filters: Facet filters parsed by ProductFacets.parse_filters (dict/None)
         """
-        products = Product.objects.select_related("category").prefetch_related(
+        products = Product.objects.select_related("category", "details", "review_stats").prefetch_related(
             Prefetch('images', queryset=ProductImage.objects.order_by('order')),
             Prefetch('skus', queryset=ProductSKU.objects.select_related('size_attribute', 'color_attribute'))
-        ).order_by("-created_at")
+        ).order_by("-created_at", "-id")
 
         if not include_out_of_stock:
-            products = products.filter(in_stock=True, skus__quantity__gt=0).distinct()
+            products = cls.filter_in_stock(products)
         
         if featured is not None:
             products = products.filter(featured=featured)
@@ -31,19 +36,24 @@ class ProductServices:
         if category:
             products = products.filter(category__name=category)
         
-        return products
+        return ProductFacets.apply_filters(products, filters)
+
+    @staticmethod
+    def filter_in_stock(products):
+        """Keep in-stock products with at least one SKU in stock, from the denormalized total_stock"""
+        return products.filter(in_stock=True, total_stock__gt=0)
 
     @classmethod
     def get_product(cls, product_id, include_out_of_stock=False):
         """Get a single product by ID with all related data"""
-        queryset = Product.objects.select_related("category").prefetch_related(
+        queryset = Product.objects.select_related("category", "details", "review_stats").prefetch_related(
             Prefetch('images', queryset=ProductImage.objects.order_by('order')),
             Prefetch('skus', queryset=ProductSKU.objects.select_related('size_attribute', 'color_attribute'))
         )
         if not include_out_of_stock:
-            queryset = queryset.filter(in_stock=True, skus__quantity__gt=0)
+            queryset = cls.filter_in_stock(queryset)
 
-        product = queryset.filter(id=product_id).distinct().first()
+        product = queryset.filter(id=product_id).first()
         if not product:
             raise Http404("Product not found")
         return product
@@ -58,22 +68,26 @@ class ProductServices:
             skus_qs = skus_qs.filter(quantity__gt=0)
         skus = skus_qs
         return skus
-    def get_search_results(cls, query, include_out_of_stock=False):
-        """Search products by name or summary"""
+
+    @classmethod
+    def get_search_results(cls, query, include_out_of_stock=False, filters=None):
+        """Search products by name, summary or description, best match first"""
+        ranked_ids = get_search_backend().search_ids(query, limit=cls.SEARCH_MAX_RESULTS)
         products = (
-            Product.objects.filter(
-                Q(name__icontains=query) | Q(summary__icontains=query) | Q(description__icontains=query)
-            )
-            .select_related("category")
+            Product.objects.filter(id__in=ranked_ids)
+            .select_related("category", "details", "review_stats")
             .prefetch_related(
                 Prefetch('images', queryset=ProductImage.objects.order_by('order')),
                 Prefetch('skus', queryset=ProductSKU.objects.select_related('size_attribute', 'color_attribute'))
             )
-            .order_by("-created_at")
         )
+        if ranked_ids:
+            products = products.order_by(
+                Case(*[When(id=product_id, then=rank) for rank, product_id in enumerate(ranked_ids)])
+            )
         if not include_out_of_stock:
-            products = products.filter(in_stock=True, skus__quantity__gt=0).distinct()
-        return products
+            products = cls.filter_in_stock(products)
+        return ProductFacets.apply_filters(products, filters)
 
     @classmethod
     def get_featured_products(cls, limit=None):
@@ -90,8 +104,5 @@ class ProductServices:
 
     @classmethod
     def get_categories(cls):
-        """Get all categories with product count"""
-        categories = Category.objects.annotate(
-            product_count=Count('product')
-        ).filter(product_count__gt=0).order_by('name')
-        return categories
+        """Get categories that have products, with their maintained counters (category_listed_idx)"""
+        return Category.objects.filter(product_count__gt=0).order_by('name')
@@ -0,0 +1,269 @@
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.v1.products.text import normalize
+from apps.products.models import Product
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - build_similar_index then refuses to run
+    np = None
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(normalize(text)) if len(token) > 1]
+
+
+class SimilarIndex:
+    """
+    Content-based "similar items" from catalog text, served from memory-mapped files.
+
+    build() turns name, summary, description, category and brand/material
+    into TF-IDF vectors (sublinear tf, smoothed idf, L2-normalized), keeping
+    the max_features most widespread terms that occur in at least two
+    products. Cosine top-K neighbours come from tiled matrix multiplies, so
+    peak memory is one block x block score tile plus the running top-K,
+    never the full similarity matrix; the vectors themselves sit in a
+    temporary memmap. Each build writes its .npy arrays and JSON sidecar
+    into a fresh version directory, then atomically replaces the CURRENT
+    pointer file naming it, so readers never see arrays from two builds.
+    Readers memory-map the version the pointer names and reload when it
+    changes, so lookups never touch the database. The previous version is
+    kept for readers still mapping it; older ones are removed.
+    """
+
+    # Field weights: the token list of a field is repeated this many times
+    FIELDS = (
+        ('name', 3),
+        ('category__name', 2),
+        ('details__brand', 2),
+        ('details__material', 2),
+        ('summary', 1),
+        ('description', 1),
+    )
+    MAX_DOCUMENT_FREQUENCY = 0.8
+    IDS_FILE = "similar_ids.npy"
+    NEIGHBOURS_FILE = "similar_neighbours.npy"
+    SCORES_FILE = "similar_scores.npy"
+    META_FILE = "similar_index.json"
+    VECTORS_FILE = "similar_vectors.tmp.npy"
+    POINTER_FILE = "CURRENT"
+    VERSION_PREFIX = "v"
+    KEEP_VERSIONS = 2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = None  # version directory
+        self._ids = self._neighbours = self._scores = None
+        self._meta = {}
+
+    # ---- building ----
+
+    @classmethod
+    def documents(cls):
+        """(product ids, weighted token lists) for the whole catalog, ordered by id"""
+        rows = Product.objects.order_by('id').values_list('id', *(field for field, _ in cls.FIELDS))
+        ids, documents = [], []
+        for product_id, *texts in rows:
+            tokens = []
+            for text, (_, weight) in zip(texts, cls.FIELDS):
+                tokens.extend(tokenize(text) * weight)
+            ids.append(product_id)
+            documents.append(tokens)
+        return ids, documents
+
+    @classmethod
+    def vocabulary(cls, documents, max_features):
+        """{term: (column, idf)} for terms shared by 2+ products but not nearly all of them"""
+        n = len(documents)
+        document_frequency = Counter()
+        for tokens in documents:
+            document_frequency.update(set(tokens))
+        candidates = [
+            (df, term) for term, df in document_frequency.items()
+            if df >= 2 and df <= max(2, cls.MAX_DOCUMENT_FREQUENCY * n)
+        ]
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        return {
+            term: (column, math.log((1 + n) / (1 + df)) + 1)
+            for column, (df, term) in enumerate(candidates[:max_features])
+        }
+
+    @staticmethod
+    def fill_vectors(vectors, documents, vocabulary):
+        """Write L2-normalized TF-IDF rows into a preallocated (n x terms) array"""
+        for row, tokens in enumerate(documents):
+            counts = Counter(token for token in tokens if token in vocabulary)
+            if not counts:
+                continue
+            columns = np.fromiter((vocabulary[term][0] for term in counts), dtype=np.int64, count=len(counts))
+            weights = np.fromiter(
+                ((1 + math.log(tf)) * vocabulary[term][1] for term, tf in counts.items()),
+                dtype=np.float32, count=len(counts),
+            )
+            vectors[row, columns] = weights / np.linalg.norm(weights)
+
+    @staticmethod
+    def top_k(vectors, k, block_size):
+        """
+        (rows, scores) of the k most cosine-similar other rows per row, best
+        first; -1 marks empty slots. Computed tile by tile.
+        """
+        n = len(vectors)
+        neighbours = np.full((n, k), -1, dtype=np.int64)
+        scores = np.zeros((n, k), dtype=np.float32)
+        keep = min(k, n - 1)
+        if keep <= 0:
+            return neighbours, scores
+
+        for start in range(0, n, block_size):
+            rows = np.asarray(vectors[start:start + block_size])
+            best_scores = np.full((len(rows), keep), -np.inf, dtype=np.float32)
+            best_rows = np.full((len(rows), keep), -1, dtype=np.int64)
+            for other in range(0, n, block_size):
+                tile = rows @ np.asarray(vectors[other:other + block_size]).T
+                if other == start:
+                    np.fill_diagonal(tile, -np.inf)
+                candidates = np.hstack([best_scores, tile])
+                candidate_rows = np.hstack([
+                    best_rows, np.broadcast_to(np.arange(other, other + tile.shape[1]), tile.shape)
+                ])
+                picked = np.argpartition(-candidates, keep - 1, axis=1)[:, :keep]
+                best_scores = np.take_along_axis(candidates, picked, axis=1)
+                best_rows = np.take_along_axis(candidate_rows, picked, axis=1)
+
+            order = np.argsort(-best_scores, axis=1, kind='stable')
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+            # Rows sharing no vocabulary are not neighbours
+            best_rows[best_scores <= 0] = -1
+            neighbours[start:start + len(rows), :keep] = best_rows
+            scores[start:start + len(rows), :keep] = np.maximum(best_scores, 0)
+        return neighbours, scores
+
+    @classmethod
+    def build(cls, directory=None, k=None, max_features=None, block_size=None):
+        """Compute neighbours for the whole catalog and write the index files; returns the sidecar"""
+        directory = Path(directory or settings.SIMILAR_INDEX_DIR)
+        k = k or settings.SIMILAR_TOP_K
+        max_features = max_features or settings.SIMILAR_MAX_FEATURES
+        block_size = block_size or settings.SIMILAR_BLOCK_SIZE
+        directory.mkdir(parents=True, exist_ok=True)
+
+        ids, documents = cls.documents()
+        vocabulary = cls.vocabulary(documents, max_features)
+        vectors_path = directory / cls.VECTORS_FILE
+        shape = (len(ids), max(1, len(vocabulary)))
+        # An empty catalog can't be memory-mapped (zero-length file)
+        vectors = (
+            np.lib.format.open_memmap(vectors_path, mode='w+', dtype=np.float32, shape=shape)
+            if ids else np.zeros(shape, dtype=np.float32)
+        )
+        try:
+            cls.fill_vectors(vectors, documents, vocabulary)
+            rows, scores = cls.top_k(vectors, k, block_size)
+        finally:
+            del vectors
+            vectors_path.unlink(missing_ok=True)
+
+        ids = np.asarray(ids, dtype=np.int64)
+        neighbours = np.where(rows >= 0, ids[np.clip(rows, 0, None)], 0) if len(ids) else rows
+        meta = {
+            "built_at": timezone.now().isoformat(),
+            "products": len(ids),
+            "terms": len(vocabulary),
+            "k": k,
+        }
+        version = directory / f"{cls.VERSION_PREFIX}{time.time_ns()}"
+        version.mkdir()
+        for name, array in ((cls.IDS_FILE, ids), (cls.NEIGHBOURS_FILE, neighbours), (cls.SCORES_FILE, scores)):
+            np.save(version / name, array)
+        (version / cls.META_FILE).write_text(json.dumps(meta))
+        # Switching the pointer publishes the whole version at once
+        cls._write_atomic(directory / cls.POINTER_FILE, lambda f: f.write(version.name.encode()))
+        cls._prune(directory)
+        logger.info("Similar-items index built: %s products, %s terms", len(ids), len(vocabulary))
+        return meta
+
+    @staticmethod
+    def _write_atomic(path, write):
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def _prune(cls, directory):
+        """Remove version directories older than the newest KEEP_VERSIONS"""
+        versions = sorted(
+            (path for path in directory.iterdir() if path.is_dir() and path.name.startswith(cls.VERSION_PREFIX)),
+            key=lambda path: int(path.name[len(cls.VERSION_PREFIX):]),
+        )
+        for path in versions[:-cls.KEEP_VERSIONS]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    # ---- serving ----
+
+    def _ensure_loaded(self):
+        directory = Path(settings.SIMILAR_INDEX_DIR)
+        try:
+            version = directory / (directory / self.POINTER_FILE).read_text().strip()
+        except FileNotFoundError:
+            version = None
+        if version == self._loaded:
+            return
+        with self._lock:
+            if version == self._loaded:
+                return
+            if version is None:
+                self._ids = self._neighbours = self._scores = None
+                self._meta = {}
+            else:
+                self._meta = json.loads((version / self.META_FILE).read_text())
+                self._ids = np.load(version / self.IDS_FILE, mmap_mode='r')
+                self._neighbours = np.load(version / self.NEIGHBOURS_FILE, mmap_mode='r')
+                self._scores = np.load(version / self.SCORES_FILE, mmap_mode='r')
+            self._loaded = version
+
+    def neighbours(self, product_id, limit):
+        """[{"id", "score"}] most similar first; empty if the product isn't indexed"""
+        if np is None:
+            return []
+        self._ensure_loaded()
+        ids = self._ids
+        if ids is None or not len(ids):
+            return []
+        row = int(np.searchsorted(ids, product_id))
+        if row >= len(ids) or ids[row] != product_id:
+            return []
+        return [
+            {"id": int(neighbour), "score": round(float(score), 4)}
+            for neighbour, score in zip(self._neighbours[row][:limit], self._scores[row][:limit])
+            if neighbour
+        ]
+
+    def version(self):
+        """Sidecar build timestamp, or None when no index has been built"""
+        if np is None:
+            return None
+        self._ensure_loaded()
+        return self._meta.get("built_at")
+
+
+similar_index = SimilarIndex()
@@ -0,0 +1,153 @@
+import random
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+from apps.products.models import ProductSKU, ProductSKUStripe
+
+
+class StripedStock:
+    """
+    Optional striped stock for hot SKUs.
+
+    Every checkout of a SKU updates its one ProductSKU row, so a flash sale
+    on a single SKU serializes on that row. stripe() splits the quantity
+    across N ProductSKUStripe rows; take() decrements a random non-empty
+    stripe with a guarded UPDATE (draining several only when no single
+    stripe covers the order), so concurrent buyers mostly write different
+    rows. A striped SKU's stock is the sum of its stripes. ProductSKU.quantity
+    mirrors that sum via refresh_mirrors(), which the periodic settle_sales
+    job runs for stale() SKUs rather than every checkout, so listings,
+    facets and serializers keep reading one column that lags by at most
+    one run.
+    """
+
+    TAKE_ATTEMPTS = 3
+
+    @staticmethod
+    def totals(sku_ids):
+        """{sku_id: units} summed over the stripes of striped SKUs"""
+        if not sku_ids:
+            return {}
+        return dict(
+            ProductSKUStripe.objects.filter(sku_id__in=sku_ids).order_by().values('sku_id')
+            .annotate(units=Sum('quantity')).values_list('sku_id', 'units')
+        )
+
+    @classmethod
+    def stock(cls, skus):
+        """{sku_id: units in stock} for SKU instances; only striped SKUs cost a query"""
+        totals = cls.totals([sku.id for sku in skus if sku.stripe_count])
+        return {sku.id: totals.get(sku.id, 0) if sku.stripe_count else sku.quantity for sku in skus}
+
+    @staticmethod
+    def stock_subquery(sku_ref):
+        """Units in stock of the SKU `sku_ref` (an OuterRef) points at, striped or not, for guarded writes"""
+        stripes = ProductSKUStripe.objects.filter(sku=OuterRef('pk')).order_by().values('sku').annotate(
+            units=Sum('quantity')
+        ).values('units')
+        stock = ProductSKU.objects.filter(id=sku_ref).annotate(stock=Case(
+            When(stripe_count__gt=0, then=Coalesce(Subquery(stripes, output_field=IntegerField()), 0)),
+            default=F('quantity'),
+            output_field=IntegerField(),
+        )).values('stock')
+        return Subquery(stock, output_field=IntegerField())
+
+    @classmethod
+    @transaction.atomic
+    def stripe(cls, sku_id, count, quantity=None):
+        """
+        Spread the SKU's stock (or a new `quantity`) evenly over `count`
+        stripes; a count below 2 unstripes it back into ProductSKU.quantity.
+        Returns the updated SKU.
+        """
+        sku = ProductSKU.objects.select_for_update().get(id=sku_id)
+        # Locking the stripes waits out in-flight take()s, so the sum is current
+        stripes = list(ProductSKUStripe.objects.select_for_update().filter(sku=sku).values_list('quantity', flat=True))
+        if quantity is None:
+            quantity = sum(stripes) if sku.stripe_count else sku.quantity
+        count = count if count > 1 else 0
+
+        ProductSKUStripe.objects.filter(sku=sku).delete()
+        per_stripe, extra = divmod(quantity, count) if count else (0, 0)
+        ProductSKUStripe.objects.bulk_create([
+            ProductSKUStripe(sku=sku, stripe=idx, quantity=per_stripe + (idx < extra)) for idx in range(count)
+        ])
+        ProductSKU.objects.filter(id=sku.id).update(quantity=quantity, stripe_count=count)
+        sku.quantity, sku.stripe_count = quantity, count
+        return sku
+
+    @classmethod
+    def take(cls, requested, held=None):
+        """
+        Decrement {sku_id: units} from striped SKUs, leaving {sku_id: units}
+        held by other carts untouched. Returns {sku_id: units that could not
+        be taken}; the caller must roll its transaction back if that is not
+        empty, since partial takes are not undone here.
+        """
+        held = held or {}
+        short = {}
+        for sku_id, units in requested.items():
+            for _ in range(cls.TAKE_ATTEMPTS):
+                stripes = list(
+                    ProductSKUStripe.objects.filter(sku_id=sku_id, quantity__gt=0).values_list('id', 'quantity')
+                )
+                # Re-read every attempt, so holds placed meanwhile are respected too
+                if sum(quantity for _, quantity in stripes) - held.get(sku_id, 0) < units:
+                    break
+                random.shuffle(stripes)
+                # A stripe that covers the whole line first, else drain several
+                stripes.sort(key=lambda stripe: stripe[1] < units)
+                for stripe_id, quantity in stripes:
+                    taken = min(units, quantity)
+                    if ProductSKUStripe.objects.filter(id=stripe_id, quantity__gte=taken).update(
+                        quantity=F('quantity') - taken
+                    ):
+                        units -= taken
+                        if not units:
+                            break
+                if not units:
+                    break
+            if units:
+                short[sku_id] = units
+        return short
+
+    @staticmethod
+    def give(returned):
+        """Add {sku_id: units} back to one random stripe of each striped SKU, in one statement"""
+        returned = {sku_id: units for sku_id, units in returned.items() if units}
+        counts = dict(
+            ProductSKU.objects.filter(id__in=returned, stripe_count__gt=0).values_list('id', 'stripe_count')
+        )
+        if not counts:
+            return
+        targets = [Q(sku_id=sku_id, stripe=random.randrange(count)) for sku_id, count in counts.items()]
+        ProductSKUStripe.objects.filter(reduce(or_, targets)).update(quantity=Case(
+            *[When(sku_id=sku_id, then=F('quantity') + returned[sku_id]) for sku_id in counts]
+        ))
+
+    @staticmethod
+    def stale():
+        """{sku_id: product_id} of striped SKUs whose ProductSKU.quantity differs from their stripe sum"""
+        units = ProductSKUStripe.objects.filter(sku=OuterRef('pk')).order_by().values('sku').annotate(
+            units=Sum('quantity')
+        ).values('units')
+        return dict(
+            ProductSKU.objects.filter(stripe_count__gt=0)
+            .annotate(units=Coalesce(Subquery(units, output_field=IntegerField()), 0))
+            .exclude(quantity=F('units')).values_list('id', 'product_id')
+        )
+
+    @staticmethod
+    def refresh_mirrors(sku_ids=None):
+        """Copy stripe sums onto ProductSKU.quantity for striped SKUs (all of them by default)"""
+        skus = ProductSKU.objects.filter(stripe_count__gt=0)
+        if sku_ids is not None:
+            skus = skus.filter(id__in=sku_ids)
+        units = ProductSKUStripe.objects.filter(sku=OuterRef('pk')).order_by().values('sku').annotate(
+            units=Sum('quantity')
+        ).values('units')
+        return skus.update(quantity=Coalesce(Subquery(units, output_field=IntegerField()), 0))
@@ -0,0 +1,236 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models import Count
+
+from api.v1.products.text import normalize
+from apps.products.models import Category, Product, ProductDetail
+
+logger = logging.getLogger(__name__)
+
+
+class SuggestIndex:
+    """
+    In-memory prefix index for search-box completions.
+
+    Keys are normalized phrases (the full text plus every word-start suffix,
+    so "sh" matches "Linen Shirt") kept in one sorted list; a prefix lookup
+    is a bisect plus a scan of the matching slice. Suggestions are ranked by
+    popularity weight (a product's popularity + 1, which it also adds to its
+    brand) and results for one- and two-character prefixes are memoized
+    because those slices are the largest. Once the index is older than its
+    TTL one thread rebuilds it while the others keep serving the old one. The number of keys is
+    capped per worker to bound memory, for incremental updates as well as
+    builds; a suggestion that does not fit is left out until the next build.
+    """
+
+    PRODUCT = "product"
+    CATEGORY = "category"
+    BRAND = "brand"
+    HOT_PREFIX_LENGTH = 2
+
+    def __init__(self, max_keys=None, ttl=None):
+        self.max_keys = max_keys or settings.SUGGEST_MAX_KEYS
+        self.ttl = ttl if ttl is not None else settings.SUGGEST_INDEX_TTL
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._keys = []          # sorted (key, ref) tuples
+        self._suggestions = {}   # ref -> {"text", "type", "id", "weight"}
+        self._owned_keys = {}    # ref -> [(key, ref), ...]
+        self._product_brands = {}  # product id -> (brand, weight it adds to the brand)
+        self._hot = {}
+        self._built_at = None
+
+    # ---- building ----
+
+    def build(self):
+        """Load all suggestions from the database, heaviest first, up to max_keys"""
+        candidates = []
+        products = Product.objects.filter(in_stock=True).values_list("id", "name", "popularity")
+        for product_id, name, popularity in products:
+            candidates.append(((self.PRODUCT, product_id), name, product_id, popularity + 1))
+
+        categories = Category.objects.annotate(total=Count("product")).filter(total__gt=0)
+        for category in categories:
+            candidates.append(((self.CATEGORY, category.id), category.name, category.id, category.total))
+
+        product_brands = {}
+        brands = {}
+        for product_id, brand, popularity in ProductDetail.objects.exclude(brand="").values_list(
+            "product_id", "brand", "product__popularity"
+        ):
+            product_brands[product_id] = (brand, popularity + 1)
+            key = normalize(brand)
+            label, weight = brands.get(key, (brand, 0))
+            brands[key] = (label, weight + popularity + 1)
+        for key, (label, weight) in brands.items():
+            candidates.append(((self.BRAND, key), label, None, weight))
+
+        candidates.sort(key=lambda candidate: candidate[3], reverse=True)
+        with self._lock:
+            self._keys = []
+            self._suggestions = {}
+            self._owned_keys = {}
+            self._hot = {}
+            self._product_brands = product_brands
+            for ref, text, ref_id, weight in candidates:
+                self._add(ref, text, ref_id, weight, sort=False)
+            self._keys.sort()
+            self._built_at = time.monotonic()
+        logger.info(f"Suggest index built with {len(self._suggestions)} suggestions, {len(self._keys)} keys")
+
+    def ensure_built(self):
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self.build()
+        elif self.is_stale() and self._build_lock.acquire(blocking=False):
+            try:
+                if self.is_stale():
+                    self.build()
+            finally:
+                self._build_lock.release()
+
+    def is_stale(self):
+        return time.monotonic() - self._built_at > self.ttl
+
+    def is_built(self):
+        return self._built_at is not None
+
+    @staticmethod
+    def phrase_keys(text):
+        words = normalize(text).split(" ")
+        return {" ".join(words[idx:]) for idx in range(len(words)) if words[idx]}
+
+    def _add(self, ref, text, ref_id, weight, sort=True):
+        self._remove(ref)
+        keys = [(key, ref) for key in self.phrase_keys(text)]
+        if not keys or len(self._keys) + len(keys) > self.max_keys:
+            return
+        self._suggestions[ref] = {"text": text, "type": ref[0], "id": ref_id, "weight": weight}
+        self._owned_keys[ref] = keys
+        for entry in keys:
+            if sort:
+                insort(self._keys, entry)
+            else:
+                self._keys.append(entry)
+
+    def _remove(self, ref):
+        for entry in self._owned_keys.pop(ref, []):
+            idx = bisect_left(self._keys, entry)
+            if idx < len(self._keys) and self._keys[idx] == entry:
+                del self._keys[idx]
+        self._suggestions.pop(ref, None)
+
+    # ---- incremental updates ----
+
+    def update_product(self, product):
+        if not self.is_built():
+            return
+        with self._lock:
+            ref = (self.PRODUCT, product.pk)
+            if product.in_stock:
+                self._add(ref, product.name, product.pk, product.popularity + 1)
+            else:
+                self._remove(ref)
+            brand = self._product_brands.get(product.pk)
+            if brand is not None:
+                self._set_product_brand(product.pk, brand[0], product.popularity + 1)
+            self._hot = {}
+
+    def remove_product(self, product_id):
+        if not self.is_built():
+            return
+        with self._lock:
+            self._remove((self.PRODUCT, product_id))
+            self._set_product_brand(product_id, None, 0)
+            self._hot = {}
+
+    def update_category(self, category):
+        if not self.is_built():
+            return
+        with self._lock:
+            ref = (self.CATEGORY, category.pk)
+            current = self._suggestions.get(ref)
+            weight = current["weight"] if current is not None else Product.objects.filter(category=category).count()
+            self._add(ref, category.name, category.pk, weight)
+            self._hot = {}
+
+    def remove_category(self, category_id):
+        if not self.is_built():
+            return
+        with self._lock:
+            self._remove((self.CATEGORY, category_id))
+            self._hot = {}
+
+    def update_product_brand(self, product_id, brand):
+        if not self.is_built():
+            return
+        with self._lock:
+            known = self._product_brands.get(product_id)
+            if known is not None:
+                weight = known[1]
+            else:
+                weight = (Product.objects.filter(pk=product_id).values_list("popularity", flat=True).first() or 0) + 1
+            self._set_product_brand(product_id, brand or None, weight)
+            self._hot = {}
+
+    def _set_product_brand(self, product_id, brand, weight):
+        """Move the product's weight from its previous brand to `brand`, weighted as build() does"""
+        previous = self._product_brands.pop(product_id, None)
+        if previous is not None:
+            ref = (self.BRAND, normalize(previous[0]))
+            current = self._suggestions.get(ref)
+            if current is not None:
+                current["weight"] -= previous[1]
+                if current["weight"] <= 0:
+                    self._remove(ref)
+        if brand:
+            self._product_brands[product_id] = (brand, weight)
+            ref = (self.BRAND, normalize(brand))
+            current = self._suggestions.get(ref)
+            self._add(ref, current["text"] if current else brand, None, (current["weight"] if current else 0) + weight)
+
+    # ---- lookups ----
+
+    def suggest(self, query, limit=8):
+        """Top suggestions whose text (or a word in it) starts with the query"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self.ensure_built()
+
+        with self._lock:
+            hot = len(prefix) <= self.HOT_PREFIX_LENGTH
+            if hot and prefix in self._hot:
+                cached_limit, cached = self._hot[prefix]
+                # a short list means every match is already in it
+                if cached_limit >= limit or len(cached) < cached_limit:
+                    return cached[:limit]
+
+            refs = set()
+            idx = bisect_left(self._keys, (prefix,))
+            while idx < len(self._keys) and self._keys[idx][0].startswith(prefix):
+                refs.add(self._keys[idx][1])
+                idx += 1
+            ranked = heapq.nlargest(
+                limit, (self._suggestions[ref] for ref in refs),
+                key=lambda suggestion: (suggestion["weight"], -len(suggestion["text"]))
+            )
+            results = [
+                {"text": suggestion["text"], "type": suggestion["type"], "id": suggestion["id"]}
+                for suggestion in ranked
+            ]
+            if hot:
+                self._hot[prefix] = (limit, results)
+            return results
+
+    def stats(self):
+        return {"suggestions": len(self._suggestions), "keys": len(self._keys)}
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,8 @@
+import unicodedata
+
+
+def normalize(text):
+    """Lower-case, strip accents and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
@@ -5,6 +5,10 @@ from api.v1.products.views.public import (
     ProductDetailView, 
     ProductDetailedSKUView, 
     ProductSearchView,
+    ProductSuggestView,
+    ProductRelatedView,
+    ProductSimilarView,
+    ProductTrendingView,
     CategoryListView
 )
 from api.v1.products.views.reviews import (
@@ -21,10 +25,14 @@ urlpatterns = [
     path('', ProductListView.as_view(), name='products'),
     path('<int:product_id>/', ProductDetailView.as_view(), name='product-detail'),
     path('<int:product_id>/skus/', ProductDetailedSKUView.as_view(), name='product-skus'),
+    path('<int:product_id>/related/', ProductRelatedView.as_view(), name='product-related'),
+    path('<int:product_id>/similar/', ProductSimilarView.as_view(), name='product-similar'),
     path('<int:product_id>/reviews/', ProductReviewListView.as_view(), name='product-reviews'),
     path('<int:product_id>/reviews/create/', ProductReviewCreateView.as_view(), name='product-review-create'),
     path('reviews/<int:review_id>/helpful/', ProductReviewHelpfulView.as_view(), name='review-helpful'),
     path('search/', ProductSearchView.as_view(), name='product-search'),
+    path('trending/', ProductTrendingView.as_view(), name='product-trending'),
+    path('suggest/', ProductSuggestView.as_view(), name='product-suggest'),
     path('categories/', CategoryListView.as_view(), name='categories'),
     path('coupons/', CouponListView.as_view(), name='coupons'),
     path('coupons/validate/', CouponValidateView.as_view(), name='coupon-validate'),
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from api.v1.products.serializer.coupon import CouponSerializer, CouponValidateSerializer
+from api.v1.products.cache import cache_catalog_response
 from apps.products.models import Coupon
 from django.utils import timezone
 
@@ -13,6 +14,7 @@ class CouponListView(APIView):
     authentication_classes = []
     permission_classes = []
     
+    @cache_catalog_response('coupons')
     def get(self, request):
         """Get all active and valid coupons"""
         now = timezone.now()
@@ -1,21 +1,33 @@
+from django.conf import settings
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from api.v1.products.serializer.product import ProductSerializer
-from api.v1.products.serializer.sku import ProductSKUSerializer
+from api.v1.products.serializer.fast import FastProductSerializer, FastProductSKUSerializer, ProductViews
 from api.v1.products.services import ProductServices
-from apps.products.models import Category
+from api.v1.products.aggregates import ProductDetailAggregate
+from api.v1.products.serializer.review import ProductReviewSerializer
+from api.v1.products.cards import ProductCards
+from api.v1.products.copurchase import CoPurchases
+from api.v1.products.cache import cache_catalog_response, catalog_etag, weak_etag
+from api.v1.products.facets import ProductFacets
+from api.v1.products.pagination import KeysetPaginator, estimated_count
+from api.v1.products.rankings import SalesRankings
+from api.v1.products.similar import similar_index
+from api.v1.products.suggest import suggest_index
+from apps.products.models import Category, Product
 from rest_framework import serializers
 
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer for public category listing"""
-    product_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'product_count']
+        fields = ['id', 'name', 'description', 'product_count', 'in_stock_count', 'featured_count']
 
 
 class ProductListView(APIView):
@@ -23,26 +35,40 @@ class ProductListView(APIView):
     authentication_classes = []
     permission_classes = []
     
+    @method_decorator(condition(etag_func=catalog_etag('products')))
+    @cache_catalog_response('products')
     def get(self, request):
         # Get query parameters
         featured = request.query_params.get('featured')
-        category = request.query_params.get('category')
+        filters = ProductFacets.parse_filters(request.query_params)
+        view = ProductViews.parse(request.query_params.get('view'))
         
         # Convert featured string to boolean if provided
         featured_bool = None
         if featured is not None:
             featured_bool = featured.lower() == 'true'
         
+        paginator = KeysetPaginator(
+            sort=request.query_params.get('sort'),
+            cursor=request.query_params.get('cursor'),
+            limit=request.query_params.get('limit'),
+        )
+        
         # Get products using service
-        products = ProductServices.get_products(featured=featured_bool, category=category)
+        products = ProductServices.get_products(featured=featured_bool, filters=filters)
+        page, next_cursor = paginator.paginate(
+            products.select_related(None).prefetch_related(None).only('id', paginator.column)
+        )
         
-        # Serialize products
-        serializer = ProductSerializer(products, many=True)
+        # Splice pre-serialized product cards
+        data = ProductViews.apply(ProductCards.for_ids(product.id for product in page), view)
         
         return Response(
             {
-                "count": len(serializer.data),
-                "data": serializer.data
+                "count": estimated_count(products, {'featured': featured_bool, **filters}),
+                "next_cursor": next_cursor,
+                "facets": ProductFacets.cached_counts(products, {'featured': featured_bool, **filters}),
+                "data": data
             },
             status=status.HTTP_200_OK
         )
@@ -53,22 +79,16 @@ class ProductDetailView(APIView):
     authentication_classes = []
     permission_classes = []
     
+    @method_decorator(condition(etag_func=catalog_etag('product-detail')))
+    @cache_catalog_response('product-detail')
     def get(self, request, product_id):
-        # Get product using service
-        product = ProductServices.get_product(product_id, include_out_of_stock=True)
-        
-        # Get SKUs using service
-        skus = ProductServices.get_product_skus(product, include_out_of_stock=True)
-        
-        # Get recent reviews (limit to 5 for detail page)
-        from apps.products.models import ProductReview
-        from api.v1.products.serializer.review import ProductReviewSerializer
-        recent_reviews = ProductReview.objects.filter(product=product).order_by('-helpful_count', '-created_at')[:5]
+        # Product, SKUs and the five most helpful reviews in a fixed number of queries
+        aggregate = ProductDetailAggregate.load(product_id, include_out_of_stock=True)
         
-        # Serialize data
-        product_data = ProductSerializer(product).data
-        skus_data = ProductSKUSerializer(skus, many=True).data
-        reviews_data = ProductReviewSerializer(recent_reviews, many=True).data
+        # Serialize data from the loaded objects; no further queries
+        product_data = FastProductSerializer.serialize(aggregate.product)
+        skus_data = FastProductSKUSerializer.serialize_many(aggregate.skus)
+        reviews_data = ProductReviewSerializer(aggregate.recent_reviews, many=True).data
         
         return Response({
             "data": {
@@ -84,6 +104,7 @@ class ProductDetailedSKUView(APIView):
     authentication_classes = []
     permission_classes = []
     
+    @method_decorator(condition(etag_func=catalog_etag('product-skus')))
     def get(self, request, product_id):
         # Get product using service
         product = ProductServices.get_product(product_id)
@@ -92,7 +113,7 @@ class ProductDetailedSKUView(APIView):
         skus = ProductServices.get_product_skus(product)
         
         # Serialize SKUs
-        skus_data = ProductSKUSerializer(skus, many=True).data
+        skus_data = FastProductSKUSerializer.serialize_queryset(skus)
         
         return Response({
             "count": len(skus_data),
@@ -119,16 +140,118 @@ class ProductSearchView(APIView):
             )
 
         # Get search results using service
-        products = ProductServices.get_search_results(query)
+        filters = ProductFacets.parse_filters(request.query_params)
+        view = ProductViews.parse(request.query_params.get('view'))
+        products = ProductServices.get_search_results(query, filters=filters)
 
-        # Serialize products
-        serializer = ProductSerializer(products, many=True)
+        # Splice pre-serialized product cards in rank order
+        data = ProductViews.apply(ProductCards.for_ids(products.values_list('id', flat=True)), view)
 
         return Response(
             {
                 "query": query,
-                "count": len(serializer.data),
-                "data": serializer.data
+                "count": len(data),
+                "facets": ProductFacets.cached_counts(products, {'query': query, **filters}),
+                "data": data
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ProductSuggestView(APIView):
+    """Typeahead completions for product, category and brand names"""
+    authentication_classes = []
+    permission_classes = []
+    DEFAULT_LIMIT = 8
+    MAX_LIMIT = 20
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        limit = KeysetPaginator.parse_limit(request.query_params.get("limit") or self.DEFAULT_LIMIT)
+        suggestions = suggest_index.suggest(query, limit=min(limit, self.MAX_LIMIT))
+
+        return Response(
+            {
+                "query": query,
+                "count": len(suggestions),
+                "data": suggestions
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ProductRelatedView(APIView):
+    """Products frequently bought together with this one (built by build_co_purchases)"""
+    authentication_classes = []
+    permission_classes = []
+    DEFAULT_LIMIT = 6
+
+    @method_decorator(condition(etag_func=catalog_etag('product-related')))
+    @cache_catalog_response('product-related')
+    def get(self, request, product_id):
+        limit = KeysetPaginator.parse_limit(request.query_params.get("limit") or self.DEFAULT_LIMIT)
+        if not Product.objects.filter(id=product_id).exists():
+            raise Http404("Product not found")
+
+        related_ids = CoPurchases.related_ids(product_id, settings.CO_PURCHASE_TOP_K)
+        in_stock = set(
+            ProductServices.filter_in_stock(Product.objects.filter(id__in=related_ids)).values_list('id', flat=True)
+        )
+        data = ProductCards.for_ids([pk for pk in related_ids if pk in in_stock][:limit])
+
+        return Response(
+            {
+                "count": len(data),
+                "data": data
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ProductTrendingView(APIView):
+    """In-stock products selling above their 30-day pace (ranked by refresh_sales_ranks)"""
+    authentication_classes = []
+    permission_classes = []
+    DEFAULT_LIMIT = 12
+
+    @method_decorator(condition(etag_func=catalog_etag('product-trending')))
+    @cache_catalog_response('product-trending')
+    def get(self, request):
+        limit = KeysetPaginator.parse_limit(request.query_params.get("limit") or self.DEFAULT_LIMIT)
+        data = ProductCards.for_ids(SalesRankings.trending_ids(limit))
+
+        return Response(
+            {
+                "count": len(data),
+                "data": data
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+def similar_etag(request, product_id):
+    """Changes only when the similar-items index is rebuilt"""
+    return weak_etag(
+        'similar', product_id, similar_index.version(), request.GET.urlencode(),
+        getattr(request, 'accepted_media_type', '')
+    )
+
+
+class ProductSimilarView(APIView):
+    """Content-similar products from the memory-mapped index (build_similar_index); no database access"""
+    authentication_classes = []
+    permission_classes = []
+    DEFAULT_LIMIT = 6
+
+    @method_decorator(condition(etag_func=similar_etag))
+    def get(self, request, product_id):
+        limit = KeysetPaginator.parse_limit(request.query_params.get("limit") or self.DEFAULT_LIMIT)
+        neighbours = similar_index.neighbours(product_id, limit)
+
+        return Response(
+            {
+                "count": len(neighbours),
+                "data": neighbours
             },
             status=status.HTTP_200_OK
         )
@@ -139,6 +262,8 @@ class CategoryListView(APIView):
     authentication_classes = []
     permission_classes = []
     
+    @method_decorator(condition(etag_func=catalog_etag('categories')))
+    @cache_catalog_response('categories')
     def get(self, request):
         # Get categories using service
         categories = ProductServices.get_categories()
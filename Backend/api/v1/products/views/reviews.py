@@ -1,19 +1,36 @@
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound, ValidationError
 
+from api.v1.products.cache import CatalogCache, weak_etag
 from api.v1.products.serializer.review import ProductReviewSerializer, ProductReviewCreateSerializer
-from apps.products.models import Product, ProductReview
+from apps.products.models import Product, ProductReview, ProductReviewStats
 from apps.orders.models import Order, OrderItem
 
 
+def review_list_etag(request, product_id):
+    """Review watermark: latest update and review count, one indexed aggregate per product"""
+    watermark = ProductReview.objects.filter(product_id=product_id).aggregate(
+        last_updated=Max('updated_at'), total=Count('id')
+    )
+    return weak_etag(
+        'reviews', product_id, watermark['last_updated'], watermark['total'],
+        getattr(request, 'accepted_media_type', '')
+    )
+
+
 class ProductReviewListView(APIView):
     """View for listing product reviews"""
     authentication_classes = []
     permission_classes = []
     
+    @method_decorator(condition(etag_func=review_list_etag))
     def get(self, request, product_id):
         """Get all reviews for a product"""
         try:
@@ -24,7 +41,9 @@ class ProductReviewListView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        reviews = ProductReview.objects.filter(product=product).order_by('-helpful_count', '-created_at')
+        reviews = ProductReview.objects.filter(product=product).select_related('user').order_by(
+            '-helpful_count', '-created_at'
+        )
         serializer = ProductReviewSerializer(reviews, many=True)
         
         return Response({
@@ -72,9 +91,10 @@ class ProductReviewCreateView(APIView):
         )
         
         if serializer.is_valid():
-            review = serializer.save()
-            review.is_verified_purchase = has_purchased
-            review.save()
+            with transaction.atomic():
+                review = serializer.save(is_verified_purchase=has_purchased)
+                ProductReviewStats.record_review(review)
+                CatalogCache.bump_version()
             
             return Response({
                 "data": ProductReviewSerializer(review).data,
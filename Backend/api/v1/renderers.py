@@ -0,0 +1,137 @@
+import codecs
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to DRF's json-based classes
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - MessagePack negotiation is then disabled in settings
+    msgpack = None
+
+
+# DRF's encoder fallback handles everything orjson doesn't natively:
+# Decimal (as float), lazy strings, querysets, timedelta, generators...
+_drf_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    orjson-backed drop-in for DRF's JSONRenderer.
+
+    Output matches JSONRenderer: compact UTF-8, 'Z' for UTC datetimes,
+    Decimal as float, U+2028/U+2029 escaped. orjson encodes datetime, UUID
+    and non-string dict keys natively. Without orjson installed it behaves
+    exactly like JSONRenderer.
+    """
+
+    OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        options = self.OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            # orjson only supports two-space indentation
+            options |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=options)
+        except TypeError:
+            # e.g. integers beyond 64 bits; the json module copes with those
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same JavaScript-safety escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """orjson-backed drop-in for DRF's JSONParser"""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read() if stream is not None else b''
+        try:
+            if codecs.lookup(encoding).name != 'utf-8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+# MessagePack extension type carrying a Decimal as its exact string form
+MSGPACK_DECIMAL_EXT = 1
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(MSGPACK_DECIMAL_EXT, str(obj).encode('ascii'))
+    if isinstance(obj, datetime.datetime):
+        # Same text form as the JSON renderers
+        representation = obj.isoformat()
+        return representation[:-6] + 'Z' if representation.endswith('+00:00') else representation
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    return _drf_default(obj)
+
+
+def _msgpack_ext_hook(code, data):
+    if code == MSGPACK_DECIMAL_EXT:
+        return Decimal(data.decode('ascii'))
+    return msgpack.ExtType(code, data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Binary MessagePack responses for clients sending Accept: application/msgpack.
+
+    Decimals that reach the renderer are packed losslessly as extension
+    type 1 (their string form) instead of being rounded through float;
+    serializer money fields are already decimal strings. Datetimes use the
+    same ISO 8601 text as the JSON renderers.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    """Parses request bodies sent with Content-Type: application/msgpack"""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(
+                stream.read(), raw=False, strict_map_key=False, ext_hook=_msgpack_ext_hook
+            )
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -5,5 +5,6 @@ urlpatterns = [
     path("users/", include("api.v1.users.urls")),
     path("products/", include("api.v1.products.urls")),
     path("orders/", include("api.v1.orders.urls")),
+    path("cart/", include("api.v1.cart.urls")),
     path("admin/", include("api.v1.admin.urls")),
 ]
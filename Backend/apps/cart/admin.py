@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Cart, CartItem
+from .models import Cart, CartItem, StockReservation
 # Register your models here.
 
 admin.site.register(Cart)
-admin.site.register(CartItem)
\ No newline at end of file
+admin.site.register(CartItem)
+admin.site.register(StockReservation)
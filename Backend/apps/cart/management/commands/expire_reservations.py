@@ -0,0 +1,30 @@
+"""
+Django management command to delete expired cart stock holds in batches
+(run it every few minutes from cron). Expired holds already stop counting
+against available stock; this only reclaims the rows.
+
+Usage:
+    python manage.py expire_reservations
+    python manage.py expire_reservations --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+from api.v1.cart.services import ReservationService
+
+
+class Command(BaseCommand):
+    help = 'Delete expired StockReservation rows in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows deleted per statement (default: RESERVATION_SWEEP_BATCH)'
+        )
+
+    def handle(self, *args, **options):
+        expired = ReservationService.sweep(batch_size=options['batch_size'])
+        if expired:
+            self.stdout.write(self.style.SUCCESS(f'Expired {expired} stock reservations'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No expired stock reservations'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_initial'),
+        ('products', '0011_sku_quantity_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='cart.cart')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='products.productsku')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sku', 'expires_at'], name='reservation_sku_active_idx'), models.Index(fields=['expires_at', 'id'], name='reservation_expiry_idx')],
+                'unique_together': {('cart', 'sku')},
+            },
+        ),
+    ]
@@ -19,3 +19,26 @@ class CartItem(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class StockReservation(models.Model):
+    """Units of a SKU held for a cart until expires_at; see ReservationService"""
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="reservations")
+    sku = models.ForeignKey(ProductSKU, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['cart', 'sku']
+        indexes = [
+            # Active holds per SKU: sku = ? AND expires_at > now
+            models.Index(fields=['sku', 'expires_at'], name='reservation_sku_active_idx'),
+            # Sweeper: expires_at <= now, oldest first
+            models.Index(fields=['expires_at', 'id'], name='reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x SKU #{self.sku_id} for cart #{self.cart_id}"
@@ -1,3 +1,104 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.v1.cart.services import ReservationService
+from api.v1.orders.services import OrderService
+from apps.cart.models import StockReservation
+from apps.products.models import ProductSKU
+from apps.products.tests import create_catalog
+from apps.users.models import User
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.shopper = User.objects.create_user(username="shopper", password="pass12345")
+        self.other = User.objects.create_user(username="other", password="pass12345")
+        (self.product,) = create_catalog(1)
+        self.sku = self.product.skus.order_by('id').first()
+
+    def line(self, quantity):
+        return {'product_id': self.product.id, 'sku_id': self.sku.id, 'quantity': quantity}
+
+    def test_holds_reduce_stock_available_to_others(self):
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 3}])
+        self.assertEqual(ReservationService.available([self.sku.id]), {self.sku.id: 2})
+        self.assertEqual(ReservationService.available([self.sku.id], user=self.shopper), {self.sku.id: 5})
+
+        with self.assertRaisesMessage(ValidationError, "Available: 2, Requested: 3"):
+            ReservationService.reserve(self.other, [{'sku_id': self.sku.id, 'quantity': 3}])
+        with self.assertRaisesMessage(ValidationError, "Available: 2, Requested: 3"):
+            OrderService.create_order(self.other, {'items': [self.line(3)]})
+
+    def test_checkout_uses_and_releases_own_holds(self):
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 5}])
+        OrderService.create_order(self.shopper, {'items': [self.line(4)]})
+        self.sku.refresh_from_db()
+        self.assertEqual(self.sku.quantity, 1)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_zero_quantity_releases_and_expired_holds_do_not_count(self):
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 2}])
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 0}])
+        self.assertFalse(StockReservation.objects.exists())
+
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 5}])
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(ReservationService.available([self.sku.id]), {self.sku.id: 5})
+        OrderService.create_order(self.other, {'items': [self.line(5)]})
+
+    def test_holds_can_shrink_when_stock_is_oversubscribed(self):
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 3}])
+        ReservationService.reserve(self.other, [{'sku_id': self.sku.id, 'quantity': 2}])
+        ProductSKU.objects.filter(id=self.sku.id).update(quantity=2)
+
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 1}])
+        ReservationService.reserve(self.other, [{'sku_id': self.sku.id, 'quantity': 0}])
+        self.assertEqual(list(StockReservation.objects.values_list('quantity', flat=True)), [1])
+        with self.assertRaisesMessage(ValidationError, "Available: 2, Requested: 3"):
+            ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 3}])
+
+    def test_holds_grow_by_guarded_update_and_covered_lines_are_not_locked(self):
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 2}])
+        ReservationService.reserve(self.other, [{'sku_id': self.sku.id, 'quantity': 3}])
+        with self.assertRaisesMessage(ValidationError, "Available: 2, Requested: 3"):
+            ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 3}])
+        self.assertEqual(ReservationService.get_reservations(self.shopper).get().quantity, 2)
+
+        with mock.patch.object(OrderService, '_lock_skus', wraps=OrderService._lock_skus) as lock_skus:
+            OrderService.create_order(self.shopper, {'items': [self.line(2)]})
+            with self.assertRaisesMessage(ValidationError, "Available: 0, Requested: 1"):
+                OrderService.create_order(self.shopper, {'items': [self.line(1)]})
+        self.assertEqual(lock_skus.call_args_list, [mock.call([]), mock.call([self.sku])])
+        self.sku.refresh_from_db()
+        self.assertEqual(self.sku.quantity, 3)
+
+    def test_sweep_deletes_only_expired_holds(self):
+        other_sku = self.product.skus.order_by('id').last()
+        ReservationService.reserve(self.shopper, [{'sku_id': self.sku.id, 'quantity': 1}])
+        ReservationService.reserve(self.other, [{'sku_id': other_sku.id, 'quantity': 1}])
+        StockReservation.objects.filter(sku=self.sku).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(ReservationService.sweep(batch_size=1), 1)
+        self.assertEqual(list(StockReservation.objects.values_list('sku_id', flat=True)), [other_sku.id])
+
+    def test_reservation_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(self.shopper)
+        url = '/api/v1/cart/reservations/'
+
+        response = client.post(url, {'items': [{'sku_id': self.sku.id, 'quantity': 2}]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data'][0]['quantity'], 2)
+        self.assertEqual(client.get(url).json()['count'], 1)
+
+        response = client.post(url, {'items': [{'sku_id': self.sku.id, 'quantity': 9}]}, format='json')
+        self.assertEqual(response.status_code, 400)
 
-# Create your tests here.
+        self.assertEqual(client.delete(f'{url}?sku_id={self.sku.id}').json()['released'], 1)
+        self.assertEqual(client.get(url).json()['count'], 0)
+        self.assertEqual(ProductSKU.objects.get(id=self.sku.id).quantity, 5)
@@ -1,3 +1,325 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from api.v1.admin.serializers import AdminCouponSerializer, AdminOrderSerializer
+from api.v1.cart.services import ReservationService
+from api.v1.orders.fast import FastAdminOrderSerializer, FastOrderSerializer
+from api.v1.orders.serializer import OrderSerializer
+from api.v1.orders.services import OrderService
+from api.v1.products.cache import CatalogCache
+from api.v1.products.redemptions import CouponRedemptions
+from api.v1.products.stripes import StripedStock
+from apps.orders.models import Order, OrderItem
+from apps.products.models import (
+    Coupon, CouponUsageShard, PendingSale, Product, ProductCard, ProductSKU, ProductSKUStripe
+)
+from apps.products.tests import create_catalog
+from apps.users.models import Address, User
+
+
+class FastOrderSerializerTests(TestCase):
+    def test_output_matches_drf_serializers(self):
+        products = create_catalog(2)
+        user = User.objects.create_user(username="buyer", password="pass12345", email="buyer@test.dev", first_name="Ada")
+        address = Address.objects.create(
+            user=user, name="Home", street="1 Main St", city="Pune", state="MH", zip_code="411001", phone="999"
+        )
+        with_address = Order.objects.create(user=user, address=address, total=Decimal("88.00"))
+        without_address = Order.objects.create(user=user, total=Decimal("49.00"))
+        for order in (with_address, without_address):
+            for product in products:
+                sku = product.skus.order_by('id').first()
+                OrderItem.objects.create(order=order, product=product, sku=sku, quantity=1, price=sku.price)
+
+        orders = Order.objects.select_related('user', 'address').order_by('-created_at')
+        self.assertEqual(FastOrderSerializer.serialize_many(orders), OrderSerializer(orders, many=True).data)
+        self.assertEqual(FastAdminOrderSerializer.serialize_many(orders), AdminOrderSerializer(orders, many=True).data)
+
+
+class BatchedCheckoutTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(username="buyer", password="pass12345")
+
+    def checkout_queries(self, products):
+        lines = [
+            {'product_id': product.id, 'sku_id': sku.id, 'quantity': 1}
+            for product in products for sku in product.skus.order_by('id')
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            order = OrderService.create_order(self.buyer, {'items': lines})
+        self.assertEqual(order.items.count(), len(lines))
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        products = create_catalog(11)
+        self.assertEqual(self.checkout_queries(products[:1]), self.checkout_queries(products[1:]))
+        self.assertEqual(
+            set(ProductSKU.objects.filter(product__in=products).values_list('quantity', flat=True)), {4}
+        )
+
+    def test_stock_is_checked_per_sku_across_lines(self):
+        (product,) = create_catalog(1)
+        sku = product.skus.order_by('id').first()
+        with self.assertRaisesMessage(ValidationError, "Available: 5, Requested: 6"):
+            OrderService.create_order(self.buyer, {'items': [
+                {'product_id': product.id, 'sku_id': sku.id, 'quantity': 3},
+                {'product_id': product.id, 'size': 'M', 'color': 'Red', 'quantity': 3},
+            ]})
+        sku.refresh_from_db()
+        self.assertEqual(sku.quantity, 5)
+
+
+    def test_catalog_cache_survives_orders_that_leave_listings_unchanged(self):
+        (product,) = create_catalog(1)
+        sku = product.skus.order_by('id').first()
+        version = CatalogCache.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderService.create_order(self.buyer, {'items': [
+                {'product_id': product.id, 'sku_id': sku.id, 'quantity': 2}
+            ]})
+        self.assertEqual(CatalogCache.get_version(), version)
+
+        other = product.skus.exclude(id=sku.id).get()
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderService.create_order(self.buyer, {'items': [
+                {'product_id': product.id, 'sku_id': sku.id, 'quantity': 3},
+                {'product_id': product.id, 'sku_id': other.id, 'quantity': 5},
+            ]})
+        self.assertNotEqual(CatalogCache.get_version(), version)
+
+
+@override_settings(INVENTORY_STRATEGY='conditional')
+class ConditionalInventoryTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(username="buyer", password="pass12345")
+
+    def test_checkout_decrements_without_locking(self):
+        (product,) = create_catalog(1)
+        sku = product.skus.order_by('id').first()
+        with CaptureQueriesContext(connection) as queries:
+            OrderService.create_order(self.buyer, {'items': [
+                {'product_id': product.id, 'sku_id': sku.id, 'quantity': 5}
+            ]})
+        sku.refresh_from_db()
+        self.assertEqual(sku.quantity, 0)
+        # The guarded decrement is the last write and no product row is touched
+        writes = [query['sql'] for query in queries.captured_queries if query['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertIn('"quantity" >=', writes[-1])
+        self.assertFalse([sql for sql in writes if sql.startswith('UPDATE "products_product" ')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderService.settle_sales()
+        product.refresh_from_db()
+        self.assertEqual((product.total_stock, product.popularity, product.in_stock), (5, 5, True))
+
+    def test_short_stock_rolls_back_the_whole_decrement(self):
+        first, second = create_catalog(2)
+        items = [
+            {'product': product, 'sku': product.skus.order_by('id').first(), 'quantity': 2}
+            for product in (first, second)
+        ]
+        # Another checkout took stock after this one read it
+        ProductSKU.objects.filter(id=items[1]['sku'].id).update(quantity=1)
+        requested = {item['sku'].id: item['quantity'] for item in items}
+        with self.assertRaisesMessage(ValidationError, f"Insufficient stock for {second.name}. Available: 1"):
+            OrderService._decrement_stock(items, requested, self.buyer, guarded=True)
+        self.assertEqual(
+            list(ProductSKU.objects.filter(id__in=requested).order_by('id').values_list('quantity', flat=True)), [5, 1]
+        )
+
+    def test_quantity_can_never_go_negative(self):
+        (product,) = create_catalog(1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductSKU.objects.filter(product=product).update(quantity=F('quantity') - 6)
+
+    @override_settings(INVENTORY_STRATEGY='optimistic')
+    def test_unknown_strategy_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            OrderService.inventory_strategy()
+
+
+class StripedStockTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(username="buyer", password="pass12345")
+        (self.product,) = create_catalog(1)
+        self.sku = StripedStock.stripe(self.product.skus.order_by('id').first().id, 4)
+
+    def stripes(self):
+        return list(ProductSKUStripe.objects.filter(sku=self.sku).order_by('stripe').values_list('quantity', flat=True))
+
+    def order(self, quantity):
+        return OrderService.create_order(self.buyer, {'items': [
+            {'product_id': self.product.id, 'sku_id': self.sku.id, 'quantity': quantity}
+        ]})
+
+    def settle(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return OrderService.settle_sales()
+
+    def test_stock_is_spread_and_taken_from_one_stripe(self):
+        self.assertEqual(self.stripes(), [2, 1, 1, 1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(1)
+        self.assertIn(sorted(self.stripes()), ([1, 1, 1, 1], [0, 1, 1, 2]))
+        self.settle()
+        self.sku.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual((self.sku.quantity, self.product.total_stock, self.product.popularity), (4, 9, 1))
+
+    def test_product_rows_are_settled_in_batches(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.order(2)
+            self.order(3)
+        # Checkout never writes the hot SKU or product rows
+        hot_rows = ('UPDATE "products_product" ', 'UPDATE "products_productsku" ')
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith(hot_rows)])
+        self.assertEqual(self.stripes(), [0, 0, 0, 0])
+        self.assertEqual(ProductSKU.objects.get(id=self.sku.id).quantity, 5)
+        self.assertEqual(PendingSale.objects.count(), 2)
+
+        self.assertEqual(self.settle(), {'skus': 1, 'sales': 2, 'products': 1})
+        self.assertEqual(ProductSKU.objects.get(id=self.sku.id).quantity, 0)
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual((product.total_stock, product.popularity), (5, 5))
+        self.assertFalse(PendingSale.objects.exists())
+        self.assertEqual(self.settle(), {'skus': 0, 'sales': 0, 'products': 0})
+
+        # Selling out the other SKU flips in_stock and the card follows
+        other = self.product.skus.exclude(id=self.sku.id).get()
+        StripedStock.stripe(other.id, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderService.create_order(self.buyer, {'items': [
+                {'product_id': self.product.id, 'sku_id': other.id, 'quantity': 5}
+            ]})
+        self.settle()
+        self.assertFalse(Product.objects.get(id=self.product.id).in_stock)
+        self.assertFalse(ProductCard.objects.get(product=self.product).payload['in_stock'])
+
+    def test_short_stock_is_rejected_and_rolled_back(self):
+        with self.assertRaisesMessage(ValidationError, "Available: 5, Requested: 6"):
+            self.order(6)
+        ProductSKUStripe.objects.filter(sku=self.sku, stripe=0).update(quantity=0)
+        with self.assertRaisesMessage(ValidationError, "Available: 3, Requested: 5"), transaction.atomic():
+            OrderService._decrement_stock(
+                [{'product': self.product, 'sku': self.sku, 'quantity': 5}], {self.sku.id: 5}, self.buyer
+            )
+        self.assertEqual(self.stripes(), [0, 1, 1, 1])
+
+    def test_stripes_leave_other_carts_holds_alone(self):
+        other = User.objects.create_user(username="other", password="pass12345")
+        ReservationService.reserve(other, [{'sku_id': self.sku.id, 'quantity': 3}])
+        with self.assertRaisesMessage(ValidationError, "Available: 2, Requested: 3"), transaction.atomic():
+            OrderService._decrement_stock(
+                [{'product': self.product, 'sku': self.sku, 'quantity': 3}], {self.sku.id: 3}, self.buyer
+            )
+        self.assertEqual(sum(self.stripes()), 5)
+        OrderService._decrement_stock(
+            [{'product': self.product, 'sku': self.sku, 'quantity': 2}], {self.sku.id: 2}, self.buyer
+        )
+        self.assertEqual(sum(self.stripes()), 3)
+
+    def test_cancel_restocks_stripes_and_unstripe_folds_back(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = self.order(3)
+        OrderService.cancel_order(self.buyer, order.id)
+        self.assertEqual(sum(self.stripes()), 5)
+        self.settle()
+        self.assertEqual(ProductSKU.objects.get(id=self.sku.id).quantity, 5)
+        self.assertEqual(Product.objects.get(id=self.product.id).popularity, 0)
+
+        sku = StripedStock.stripe(self.sku.id, 0)
+        self.assertEqual((sku.quantity, sku.stripe_count), (5, 0))
+        self.assertEqual(self.stripes(), [])
+
+
+class CouponRedemptionTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(username="buyer", password="pass12345")
+        (self.product,) = create_catalog(1)
+        self.sku = self.product.skus.order_by('id').first()
+        now = timezone.now()
+        self.coupon = Coupon.objects.create(
+            code="FLASH10", discount_value=Decimal("10.00"), usage_limit=3,
+            valid_from=now - timedelta(days=1), valid_until=now + timedelta(days=1)
+        )
+
+    def order(self):
+        return OrderService.create_order(self.buyer, {'coupon_code': 'flash10', 'items': [
+            {'product_id': self.product.id, 'sku_id': self.sku.id, 'quantity': 1}
+        ]})
+
+    def test_limit_is_enforced_by_shards_and_settled_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for _ in range(3):
+                self.order()
+            with self.assertRaisesMessage(ValidationError, "usage limit has been reached"), transaction.atomic():
+                self.order()
+        self.coupon.refresh_from_db()
+        self.assertEqual((self.coupon.used_count, self.coupon.is_active), (0, True))
+        self.assertEqual(sum(CouponUsageShard.objects.values_list('used', flat=True)), 3)
+
+        for callback in callbacks:
+            callback()
+        self.coupon.refresh_from_db()
+        self.assertEqual((self.coupon.used_count, self.coupon.is_active), (3, False))
+
+    def test_settle_failure_does_not_fail_a_placed_order(self):
+        with mock.patch.object(CouponRedemptions, 'settle', side_effect=RuntimeError("cache down")), \
+                self.assertLogs('django.test', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            order = self.order()
+        self.assertTrue(Order.objects.filter(id=order.id).exists())
+
+    def test_cancel_releases_a_use(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = self.order()
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderService.cancel_order(self.buyer, order.id)
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.used_count, 0)
+        self.assertEqual(sum(CouponUsageShard.objects.values_list('used', flat=True)), 0)
+
+    def test_lowered_limit_counts_uses_across_all_shards(self):
+        Coupon.objects.filter(id=self.coupon.id).update(usage_limit=100)
+        self.coupon.refresh_from_db()
+        CouponRedemptions.shards(self.coupon)
+        CouponUsageShard.objects.filter(coupon=self.coupon, shard=0).update(used=3)
+
+        serializer = AdminCouponSerializer(self.coupon, data={'usage_limit': 3}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        self.coupon.refresh_from_db()
+        self.assertEqual((self.coupon.used_count, self.coupon.is_active), (3, False))
+
+        # Even with the coupon reactivated, the other shards' room under the new limit is not usable
+        Coupon.objects.filter(id=self.coupon.id).update(is_active=True)
+        self.assertFalse(CouponRedemptions.redeem(self.coupon))
+
+    def test_hand_set_count_and_limit_reset_shards_and_settle(self):
+        CouponRedemptions.shards(self.coupon)
+        CouponUsageShard.objects.filter(coupon=self.coupon, shard=0).update(used=1)
+
+        serializer = AdminCouponSerializer(self.coupon, data={'used_count': 2, 'usage_limit': 2}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        self.coupon.refresh_from_db()
+        self.assertEqual((self.coupon.used_count, self.coupon.is_active), (2, False))
+        self.assertFalse(CouponUsageShard.objects.filter(coupon=self.coupon).exists())
+
+    def test_shards_are_seeded_from_existing_count(self):
+        Coupon.objects.filter(id=self.coupon.id).update(used_count=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order()
+        self.coupon.refresh_from_db()
+        self.assertEqual((self.coupon.used_count, self.coupon.is_active), (3, False))
 
-# Create your tests here.
@@ -1,73 +1,212 @@
+from functools import partial
+
+from django.conf import settings
 from django.contrib import admin
+from django.db import transaction
+from api.v1.products.cache import CatalogCache
+from api.v1.products.counters import CategoryCounters
+from api.v1.products.redemptions import CouponRedemptions
+from api.v1.products.stripes import StripedStock
 from apps.products.models import (
     Category, SubCategory, Product, ProductImage, ProductAttribute, 
-    ProductSKU, ProductDetail, ProductReview, Coupon, CouponUsage
+    ProductSKU, ProductDetail, ProductReview, ProductReviewStats, ProductCard, ProductCoPurchase, ProductSalesRank, Coupon, CouponUsage
 )
 
 
+class CatalogModelAdmin(admin.ModelAdmin):
+    """ModelAdmin that invalidates cached catalog responses on every write"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        CatalogCache.bump_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        CatalogCache.bump_version()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        CatalogCache.bump_version()
+
+
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(CatalogModelAdmin):
     list_display = ['name', 'created_at']
     search_fields = ['name']
 
 
 @admin.register(SubCategory)
-class SubCategoryAdmin(admin.ModelAdmin):
+class SubCategoryAdmin(CatalogModelAdmin):
     list_display = ['name', 'parent', 'created_at']
     list_filter = ['parent']
     search_fields = ['name']
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'featured', 'in_stock', 'created_at']
+class ProductAdmin(CatalogModelAdmin):
+    list_display = ['name', 'category', 'featured', 'in_stock', 'total_stock', 'created_at']
     list_filter = ['category', 'featured', 'in_stock', 'created_at']
     search_fields = ['name', 'description']
     readonly_fields = ['created_at', 'updated_at']
 
+    def save_model(self, request, obj, form, change):
+        with CategoryCounters.track([obj.pk] if change else []) as tracked:
+            super().save_model(request, obj, form, change)
+            tracked.add(obj.pk)
+
+    def delete_model(self, request, obj):
+        with CategoryCounters.track([obj.pk]):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with CategoryCounters.track(queryset.values_list('id', flat=True)):
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(ProductImage)
-class ProductImageAdmin(admin.ModelAdmin):
+class ProductImageAdmin(CatalogModelAdmin):
     list_display = ['product', 'order', 'created_at']
     list_filter = ['created_at']
     search_fields = ['product__name']
 
 
 @admin.register(ProductAttribute)
-class ProductAttributeAdmin(admin.ModelAdmin):
+class ProductAttributeAdmin(CatalogModelAdmin):
     list_display = ['type', 'value', 'created_at']
     list_filter = ['type', 'created_at']
     search_fields = ['value']
 
 
 @admin.register(ProductSKU)
-class ProductSKUAdmin(admin.ModelAdmin):
-    list_display = ['sku', 'product', 'price', 'quantity', 'created_at']
+class ProductSKUAdmin(CatalogModelAdmin):
+    list_display = ['sku', 'product', 'price', 'quantity', 'stripe_count', 'created_at']
     list_filter = ['created_at']
     search_fields = ['sku', 'product__name']
+    readonly_fields = ['stripe_count']
+    actions = ['stripe_stock', 'unstripe_stock']
+
+    def save_model(self, request, obj, form, change):
+        previous_product_id = None
+        if change and 'product' in form.changed_data:
+            previous_product_id = form.initial.get('product')
+        product_ids = {obj.product_id, previous_product_id} - {None}
+        with CategoryCounters.track(product_ids):
+            super().save_model(request, obj, form, change)
+            if obj.stripe_count and 'quantity' in form.changed_data:
+                # An edited quantity is the new stock level; spread it over the stripes
+                StripedStock.stripe(obj.pk, obj.stripe_count, quantity=obj.quantity)
+            Product.refresh_sku_aggregates(product_ids)
+
+    def delete_model(self, request, obj):
+        with CategoryCounters.track([obj.product_id]):
+            super().delete_model(request, obj)
+            Product.refresh_sku_aggregates([obj.product_id])
+
+    def delete_queryset(self, request, queryset):
+        product_ids = set(queryset.values_list('product_id', flat=True))
+        with CategoryCounters.track(product_ids):
+            super().delete_queryset(request, queryset)
+            Product.refresh_sku_aggregates(product_ids)
+
+    @admin.action(description="Stripe stock across INVENTORY_STRIPES rows (for flash sales)")
+    def stripe_stock(self, request, queryset):
+        count = self.restripe(queryset, settings.INVENTORY_STRIPES)
+        self.message_user(request, f"Striped {count} SKUs across {settings.INVENTORY_STRIPES} rows")
+
+    @admin.action(description="Fold striped stock back into a single quantity")
+    def unstripe_stock(self, request, queryset):
+        count = self.restripe(queryset.filter(stripe_count__gt=0), 0)
+        self.message_user(request, f"Unstriped {count} SKUs")
+
+    @staticmethod
+    def restripe(queryset, stripes):
+        skus = list(queryset.order_by('id').values_list('id', 'product_id'))
+        product_ids = {product_id for _, product_id in skus}
+        with CategoryCounters.track(product_ids):
+            for sku_id, _ in skus:
+                StripedStock.stripe(sku_id, stripes)
+            Product.refresh_sku_aggregates(product_ids)
+        CatalogCache.bump_version()
+        return len(skus)
 
 
 @admin.register(ProductDetail)
-class ProductDetailAdmin(admin.ModelAdmin):
+class ProductDetailAdmin(CatalogModelAdmin):
     list_display = ['product', 'material', 'fit', 'brand']
     search_fields = ['product__name', 'material', 'brand']
 
 
 @admin.register(ProductReview)
-class ProductReviewAdmin(admin.ModelAdmin):
+class ProductReviewAdmin(CatalogModelAdmin):
     list_display = ['product', 'user', 'rating', 'is_verified_purchase', 'helpful_count', 'created_at']
     list_filter = ['rating', 'is_verified_purchase', 'created_at']
     search_fields = ['product__name', 'user__username', 'comment']
     readonly_fields = ['created_at', 'updated_at']
 
+    def save_model(self, request, obj, form, change):
+        """Keep ProductReviewStats in step with the saved review"""
+        with transaction.atomic():
+            if change:
+                previous = ProductReview.objects.select_for_update().get(pk=obj.pk)
+                ProductReviewStats.remove_review(previous)
+            super().save_model(request, obj, form, change)
+            ProductReviewStats.record_review(obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            ProductReviewStats.remove_review(obj)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for review in queryset.select_for_update():
+                ProductReviewStats.remove_review(review)
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(ProductReviewStats)
+class ProductReviewStatsAdmin(admin.ModelAdmin):
+    list_display = ['product', 'review_count', 'rating_sum', 'updated_at']
+    search_fields = ['product__name']
+    readonly_fields = ['review_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3',
+                       'rating_4', 'rating_5', 'updated_at']
+
+
+@admin.register(ProductCard)
+class ProductCardAdmin(admin.ModelAdmin):
+    list_display = ['product', 'updated_at']
+    search_fields = ['product__name']
+    readonly_fields = ['product', 'payload', 'updated_at']
+
+
+@admin.register(ProductCoPurchase)
+class ProductCoPurchaseAdmin(admin.ModelAdmin):
+    list_display = ['product', 'rank', 'related', 'orders']
+    search_fields = ['product__name']
+    readonly_fields = ['product', 'related', 'orders', 'rank']
+
+
+@admin.register(ProductSalesRank)
+class ProductSalesRankAdmin(admin.ModelAdmin):
+    list_display = ['product', 'bestseller_rank', 'trending_rank', 'units_1d', 'units_7d', 'units_30d', 'updated_at']
+    search_fields = ['product__name']
+    ordering = ['bestseller_rank']
+    readonly_fields = ['product', 'units_1d', 'units_7d', 'units_30d', 'trend_score', 'bestseller_rank', 'trending_rank', 'updated_at']
+
 
 @admin.register(Coupon)
-class CouponAdmin(admin.ModelAdmin):
+class CouponAdmin(CatalogModelAdmin):
     list_display = ['code', 'discount_type', 'discount_value', 'is_active', 'valid_from', 'valid_until', 'used_count']
     list_filter = ['discount_type', 'is_active', 'valid_from', 'valid_until']
     search_fields = ['code', 'description']
     readonly_fields = ['used_count', 'created_at', 'updated_at']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'usage_limit' in form.changed_data:
+            # Deactivate at once if the new limit is already used up
+            transaction.on_commit(partial(CouponRedemptions.settle, obj.pk))
+
 
 @admin.register(CouponUsage)
 class CouponUsageAdmin(admin.ModelAdmin):
@@ -0,0 +1,67 @@
+"""Shared fixtures and timing helpers for the benchmark management commands."""
+
+import time
+from decimal import Decimal
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import (
+    Category, Product, ProductAttribute, ProductDetail, ProductImage, ProductSKU
+)
+from apps.users.models import User
+
+
+def best_of(func, repeat):
+    """Run func `repeat` times; return (fastest wall time in seconds, last result)"""
+    best, result = None, None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def create_fixture(size):
+    """
+    Bulk-create `size` products (two SKUs, an image and details each) and
+    `size` single-item orders. Callers run this inside a transaction they
+    roll back.
+    """
+    category = Category.objects.create(name='Benchmark')
+    user = User.objects.create_user(username=f'bench-{size}', email=f'bench-{size}@example.com')
+    attrs = [
+        ProductAttribute.objects.get_or_create(type=ProductAttribute.SIZE, value=value)[0]
+        for value in ('S', 'M')
+    ]
+    color, _ = ProductAttribute.objects.get_or_create(type=ProductAttribute.COLOR, value='Black')
+
+    products = Product.objects.bulk_create([
+        Product(
+            category=category, name=f'Benchmark product {idx}', summary='Summary',
+            description='Description ' * 20, original_price=Decimal('99.00'),
+        )
+        for idx in range(size)
+    ])
+    skus = ProductSKU.objects.bulk_create([
+        ProductSKU(
+            product=product, sku=f'BENCH-{size}-{product.id}-{attr.value}', price=Decimal('49.00'),
+            quantity=10, size_attribute=attr, color_attribute=color,
+        )
+        for product in products for attr in attrs
+    ])
+    Product.refresh_sku_aggregates(product.id for product in products)
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image_url=f'https://example.com/{product.id}.jpg')
+        for product in products
+    ])
+    ProductDetail.objects.bulk_create([
+        ProductDetail(product=product, material='Cotton', brand='Bench') for product in products
+    ])
+    orders = Order.objects.bulk_create([
+        Order(user=user, total=Decimal('98.00')) for _ in range(size)
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product_id=sku.product_id, sku=sku, quantity=1, price=sku.price)
+        for order, sku in zip(orders, skus[::2])
+    ])
+    return products, orders
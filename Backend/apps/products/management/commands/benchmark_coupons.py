@@ -0,0 +1,134 @@
+"""
+Django management command to measure checkout throughput when every
+concurrent order uses the same coupon, across usage shard counts (see
+COUPON_USAGE_SHARDS and CouponRedemptions).
+
+Like benchmark_inventory it commits through one connection per worker
+thread and deletes its throwaway catalog, coupon and buyer afterwards.
+Every order buys one unit of its own SKU (striped across --stock-stripes
+rows) so stock is not the bottleneck being measured. One shard is the old
+single-counter behaviour. With --limit, it also checks that the coupon is
+never redeemed more than its usage limit. SQLite serializes all writers,
+so run it against PostgreSQL or MySQL to see scaling.
+
+Usage:
+    python manage.py benchmark_coupons
+    python manage.py benchmark_coupons --shards 1 --shards 16 --threads 32 --orders 2000
+    python manage.py benchmark_coupons --limit 250
+"""
+
+import statistics
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.v1.orders.services import OrderService
+from api.v1.products.counters import CategoryCounters
+from api.v1.products.redemptions import CouponRedemptions
+from api.v1.products.stripes import StripedStock
+from apps.products.management.commands.benchmark_inventory import Command as InventoryBenchmark
+from apps.products.models import Category, Coupon, CouponUsage, Product, ProductSKU
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent checkouts sharing one coupon across usage shard counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shards',
+            type=int,
+            action='append',
+            dest='shard_counts',
+            help='Usage shard count to run (can be repeated; default: 1, 8)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='Concurrent buyers (default: 16)'
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=400,
+            help='Checkout attempts per shard count (default: 400)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Coupon usage limit (default: unlimited)'
+        )
+        parser.add_argument(
+            '--stock-stripes',
+            type=int,
+            default=16,
+            help='Stripes of the SKU being bought, to keep stock off the critical path (default: 16)'
+        )
+
+    def handle(self, *args, **options):
+        shard_counts = options['shard_counts'] or [1, 8]
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes all writers (expect "database is locked" errors); shards cannot help there'
+            ))
+
+        category = Category.objects.create(name='Coupon benchmark')
+        product = Product.objects.create(
+            category=category, name='Coupon benchmark product', summary='Summary', description='Description'
+        )
+        sku = ProductSKU.objects.create(
+            product=product, sku=f'COUPONBENCH-{product.id}', price=Decimal('100.00'), quantity=options['orders']
+        )
+        Product.refresh_sku_aggregates([product.id])
+        CategoryCounters.record({}, [product.id])
+        now = timezone.now()
+        coupon = Coupon.objects.create(
+            code=f'BENCH{product.id}', discount_value=Decimal('10.00'), usage_limit=options['limit'],
+            valid_from=now - timedelta(days=1), valid_until=now + timedelta(days=1)
+        )
+        buyer = User.objects.create_user(
+            username=f'coupon-bench-{product.id}', email=f'coupon-bench-{product.id}@example.com'
+        )
+        baseline = None
+        try:
+            for shards in shard_counts:
+                with CategoryCounters.track([product.id]):
+                    sku = StripedStock.stripe(sku.id, options['stock_stripes'], quantity=options['orders'])
+                    Product.objects.filter(id=product.id).update(in_stock=True)
+                    Product.refresh_sku_aggregates([product.id])
+                CouponUsage.objects.filter(coupon=coupon).delete()
+                CouponRedemptions.reset(coupon)
+                Coupon.objects.filter(id=coupon.id).update(used_count=0, is_active=True)
+                coupon.used_count = 0
+
+                with override_settings(COUPON_USAGE_SHARDS=shards, INVENTORY_STRATEGY=OrderService.CONDITIONAL):
+                    result = InventoryBenchmark.run_strategy(
+                        buyer, product, [sku], options['threads'], options['orders'], coupon_code=coupon.code
+                    )
+                throughput = result['placed'] / result['seconds']
+                baseline = baseline or throughput
+                self.report(shards, result, throughput, baseline, coupon)
+        finally:
+            buyer.delete()
+            coupon.delete()
+            with CategoryCounters.track([product.id]):
+                product.delete()
+            category.delete()
+
+    def report(self, shards, result, throughput, baseline, coupon):
+        latencies = sorted(result['latencies']) or [0.0]
+        redeemed = CouponUsage.objects.filter(coupon=coupon).count()
+        coupon.refresh_from_db()
+        self.stdout.write(
+            f"{shards:>3} shards {throughput:>9.1f} orders/s ({throughput / baseline if baseline else 0:.2f}x)   "
+            f"placed {result['placed']}, refused {result['sold_out']}, errors {result['errors']}   "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms   "
+            f"redeemed {redeemed} (used_count {coupon.used_count}, active {coupon.is_active})"
+        )
+        if coupon.usage_limit is not None and redeemed > coupon.usage_limit:
+            self.stdout.write(self.style.ERROR(f'{shards} shards: usage limit {coupon.usage_limit} overshot'))
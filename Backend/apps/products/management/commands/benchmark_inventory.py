@@ -0,0 +1,161 @@
+"""
+Django management command to compare checkout throughput of the inventory
+strategies (see INVENTORY_STRATEGY) with concurrent buyers hammering the same
+hot SKUs.
+
+Unlike the other benchmarks this one has to commit: every worker thread uses
+its own database connection. The throwaway category, product, SKUs and buyer
+are deleted afterwards.
+
+Numbers from SQLite mean nothing: it locks the whole database for every
+write and SELECT ... FOR UPDATE is a no-op, so both strategies serialize
+the same way there. Run it against PostgreSQL or MySQL.
+
+Usage:
+    python manage.py benchmark_inventory
+    python manage.py benchmark_inventory --threads 32 --orders 2000 --skus 3
+    python manage.py benchmark_inventory --strategy conditional --stock 500
+"""
+
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.test.utils import override_settings
+from rest_framework.exceptions import ValidationError
+
+from api.v1.orders.services import OrderService
+from api.v1.products.counters import CategoryCounters
+from apps.products.models import Category, Product, ProductSKU
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent checkout throughput of the locking vs conditional inventory strategies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strategy',
+            choices=[OrderService.LOCKING, OrderService.CONDITIONAL],
+            action='append',
+            dest='strategies',
+            help='Strategy to run (can be repeated; default: both)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Concurrent buyers (default: 8)'
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=400,
+            help='Checkout attempts per strategy (default: 400)'
+        )
+        parser.add_argument(
+            '--skus',
+            type=int,
+            default=2,
+            help='Hot SKUs; every order buys one unit of each, in random order (default: 2)'
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            help='Starting units per SKU (default: --orders, so nothing sells out)'
+        )
+
+    def handle(self, *args, **options):
+        strategies = options['strategies'] or [OrderService.LOCKING, OrderService.CONDITIONAL]
+        stock = options['stock'] if options['stock'] is not None else options['orders']
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes all writers (expect "database is locked" errors); '
+                'row-lock differences will not show'
+            ))
+
+        category = Category.objects.create(name='Inventory benchmark')
+        product = Product.objects.create(
+            category=category, name='Inventory benchmark product', summary='Summary', description='Description'
+        )
+        skus = [
+            ProductSKU.objects.create(
+                product=product, sku=f'INVBENCH-{product.id}-{idx}', price=Decimal('10.00'), quantity=stock
+            )
+            for idx in range(options['skus'])
+        ]
+        Product.refresh_sku_aggregates([product.id])
+        CategoryCounters.record({}, [product.id])
+        buyer = User.objects.create_user(
+            username=f'inventory-bench-{product.id}', email=f'inventory-bench-{product.id}@example.com'
+        )
+        try:
+            for strategy in strategies:
+                with CategoryCounters.track([product.id]):
+                    ProductSKU.objects.filter(product=product).update(quantity=stock)
+                    Product.objects.filter(id=product.id).update(in_stock=True)
+                    Product.refresh_sku_aggregates([product.id])
+                with override_settings(INVENTORY_STRATEGY=strategy):
+                    result = self.run_strategy(buyer, product, skus, options['threads'], options['orders'])
+                self.report(strategy, result, product)
+        finally:
+            buyer.delete()
+            with CategoryCounters.track([product.id]):
+                product.delete()
+            category.delete()
+
+    @staticmethod
+    def run_strategy(buyer, product, skus, threads, orders, coupon_code=None):
+        """Place `orders` checkouts from `threads` workers; returns outcome counts and latencies"""
+        remaining = iter(range(orders))
+        lock = threading.Lock()
+        outcomes = {'placed': 0, 'sold_out': 0, 'errors': 0}
+        latencies = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    lines = [{'product_id': product.id, 'sku_id': sku.id, 'quantity': 1} for sku in skus]
+                    random.shuffle(lines)
+                    start = time.perf_counter()
+                    try:
+                        OrderService.create_order(buyer, {'items': lines, 'coupon_code': coupon_code})
+                        outcome = 'placed'
+                    except ValidationError:
+                        outcome = 'sold_out'
+                    except DatabaseError:
+                        # Lock timeouts, deadlocks and "database is locked"
+                        outcome = 'errors'
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        outcomes[outcome] += 1
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for future in [pool.submit(worker) for _ in range(threads)]:
+                future.result()
+        return dict(outcomes, seconds=time.perf_counter() - start, latencies=latencies)
+
+    def report(self, strategy, result, product):
+        latencies = sorted(result['latencies']) or [0.0]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        quantities = list(ProductSKU.objects.filter(product=product).values_list('quantity', flat=True))
+        self.stdout.write(
+            f"{strategy:<12} {result['placed'] / result['seconds']:>9.1f} orders/s   "
+            f"placed {result['placed']}, sold out {result['sold_out']}, errors {result['errors']}   "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms   "
+            f"stock left {quantities}"
+        )
+        if min(quantities) < 0:
+            self.stdout.write(self.style.ERROR(f'{strategy}: stock went negative'))
@@ -0,0 +1,90 @@
+"""
+Django management command to compare DRF's JSON renderer/parser with the
+orjson-backed ones on realistic API payloads.
+
+Creates throwaway products and orders inside a transaction that is rolled
+back at the end, so it is safe to run against a development database.
+
+Usage:
+    python manage.py benchmark_json
+    python manage.py benchmark_json --size 5000 --repeat 10
+"""
+
+import io
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.v1.orders.fast import FastAdminOrderSerializer
+from api.v1.products.serializer.fast import FastProductSerializer
+from api.v1.products.services import ProductServices
+from api.v1.renderers import FastJSONParser, FastJSONRenderer, orjson
+from apps.orders.models import Order
+from apps.products.management.benchmark import best_of, create_fixture
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON encode/decode time of DRF vs orjson renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=1000,
+            help='Products and orders per payload (default: 1000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per measurement; the best run is reported (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer falls back to json'))
+
+        size, repeat = options['size'], options['repeat']
+        with transaction.atomic():
+            create_fixture(size)
+            payloads = {
+                'product list': {
+                    'count': size,
+                    'data': FastProductSerializer.serialize_queryset(ProductServices.get_products()),
+                },
+                'admin order list': {
+                    'count': size,
+                    'data': FastAdminOrderSerializer.serialize_many(
+                        Order.objects.select_related('user').order_by('-created_at')
+                    ),
+                },
+                # Raw rows keep Decimal and datetime objects for the encoders to handle
+                'raw product rows': list(Product.objects.values(
+                    'id', 'name', 'original_price', 'min_price', 'rating_avg', 'created_at', 'updated_at'
+                )),
+            }
+            transaction.set_rollback(True)
+
+        for label, payload in payloads.items():
+            self.compare(label, payload, repeat)
+
+    def compare(self, label, payload, repeat):
+        drf_time, drf_body = best_of(lambda: JSONRenderer().render(payload), repeat)
+        fast_time, fast_body = best_of(lambda: FastJSONRenderer().render(payload), repeat)
+        drf_parse, _ = best_of(lambda: JSONParser().parse(io.BytesIO(drf_body)), repeat)
+        fast_parse, parsed = best_of(lambda: FastJSONParser().parse(io.BytesIO(fast_body)), repeat)
+
+        identical = drf_body == fast_body
+        style = self.style.SUCCESS if identical else self.style.WARNING
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{label} ({len(drf_body) / 1024:.0f} KiB)'))
+        self.stdout.write(style(
+            f'  encode  drf {drf_time * 1000:8.2f} ms   orjson {fast_time * 1000:8.2f} ms   '
+            f'x{drf_time / fast_time:5.1f}   identical bytes={identical}'
+        ))
+        self.stdout.write(
+            f'  decode  drf {drf_parse * 1000:8.2f} ms   orjson {fast_parse * 1000:8.2f} ms   '
+            f'x{drf_parse / fast_parse:5.1f}'
+        )
@@ -0,0 +1,91 @@
+"""
+Django management command to compare MessagePack with JSON on realistic
+API payloads: body size (raw and gzipped) and encode/decode latency.
+
+Creates throwaway products and orders inside a transaction that is rolled
+back at the end, so it is safe to run against a development database.
+
+Usage:
+    python manage.py benchmark_msgpack
+    python manage.py benchmark_msgpack --size 5000 --repeat 10
+"""
+
+import gzip
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.v1.orders.fast import FastOrderSerializer
+from api.v1.products.serializer.fast import FastProductSerializer
+from api.v1.products.services import ProductServices
+from api.v1.renderers import (
+    FastJSONParser, FastJSONRenderer, MessagePackParser, MessagePackRenderer, msgpack
+)
+from apps.orders.models import Order
+from apps.products.management.benchmark import best_of, create_fixture
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Benchmark MessagePack against JSON for size and encode/decode time'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=1000,
+            help='Products and orders per payload (default: 1000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per measurement; the best run is reported (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        if msgpack is None:
+            raise CommandError('msgpack is not installed')
+
+        size, repeat = options['size'], options['repeat']
+        with transaction.atomic():
+            create_fixture(size)
+            payloads = {
+                'product list': {
+                    'count': size,
+                    'data': FastProductSerializer.serialize_queryset(ProductServices.get_products()),
+                },
+                'order list': {
+                    'count': size,
+                    'data': FastOrderSerializer.serialize_many(Order.objects.select_related('address')),
+                },
+                # Raw rows keep Decimal values, which MessagePack carries losslessly
+                'raw product rows': list(Product.objects.values(
+                    'id', 'name', 'original_price', 'min_price', 'rating_avg', 'popularity'
+                )),
+            }
+            transaction.set_rollback(True)
+
+        for label, payload in payloads.items():
+            self.compare(label, payload, repeat)
+
+    def compare(self, label, payload, repeat):
+        json_encode, json_body = best_of(lambda: FastJSONRenderer().render(payload), repeat)
+        pack_encode, pack_body = best_of(lambda: MessagePackRenderer().render(payload), repeat)
+        json_decode, _ = best_of(lambda: FastJSONParser().parse(io.BytesIO(json_body)), repeat)
+        pack_decode, unpacked = best_of(lambda: MessagePackParser().parse(io.BytesIO(pack_body)), repeat)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        for name, body, encode, decode in (
+            ('json', json_body, json_encode, json_decode),
+            ('msgpack', pack_body, pack_encode, pack_decode),
+        ):
+            self.stdout.write(
+                f'  {name:<8} {len(body) / 1024:9.1f} KiB   gzip {len(gzip.compress(body, 6)) / 1024:8.1f} KiB   '
+                f'encode {encode * 1000:7.2f} ms   decode {decode * 1000:7.2f} ms'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'  msgpack is {100 * (1 - len(pack_body) / len(json_body)):.0f}% smaller, '
+            f'round trip lossless={unpacked == payload}'
+        ))
@@ -0,0 +1,89 @@
+"""
+Django management command to compare DRF serializers with the fast read paths.
+
+Creates throwaway products and orders inside a transaction that is rolled
+back at the end, so it is safe to run against a development database.
+
+Usage:
+    python manage.py benchmark_serializers
+    python manage.py benchmark_serializers --sizes 100 1000 --repeat 5
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from api.v1.admin.serializers import AdminOrderSerializer
+from api.v1.orders.fast import FastAdminOrderSerializer, FastOrderSerializer
+from api.v1.orders.serializer import OrderSerializer
+from api.v1.products.serializer.fast import FastProductSerializer, FastProductSKUSerializer
+from api.v1.products.serializer.product import ProductSerializer
+from api.v1.products.serializer.sku import ProductSKUSerializer
+from api.v1.products.services import ProductServices
+from apps.orders.models import Order, OrderItem
+from apps.products.management.benchmark import best_of, create_fixture
+from apps.products.models import ProductSKU
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DRF serializers against the fast read-only serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 10000],
+            help='Object counts to benchmark (default: 100 1000 10000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per measurement; the best run is reported (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        with transaction.atomic():
+            for size in options['sizes']:
+                self.benchmark_size(size)
+            transaction.set_rollback(True)
+
+    def benchmark_size(self, size):
+        # Start each size from an empty fixture
+        sid = transaction.savepoint()
+        create_fixture(size)
+
+        products = ProductServices.get_products(include_out_of_stock=True)
+        skus = ProductSKU.objects.select_related('size_attribute', 'color_attribute').order_by('id')
+        orders = Order.objects.select_related('user', 'address').order_by('-created_at', '-id')
+        # Best-case DRF input: items with product and SKU joined in one prefetch query
+        prefetched_orders = orders.prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product', 'sku'))
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{size} objects'))
+        self.compare('ProductSerializer', size,
+                     lambda: ProductSerializer(products.all(), many=True).data,
+                     lambda: FastProductSerializer.serialize_queryset(products.all()))
+        self.compare('ProductSKUSerializer', size,
+                     lambda: ProductSKUSerializer(skus.all(), many=True).data,
+                     lambda: FastProductSKUSerializer.serialize_queryset(skus.all()))
+        self.compare('OrderSerializer', size,
+                     lambda: OrderSerializer(prefetched_orders.all(), many=True).data,
+                     lambda: FastOrderSerializer.serialize_many(orders.all()))
+        self.compare('AdminOrderSerializer', size,
+                     lambda: AdminOrderSerializer(prefetched_orders.all(), many=True).data,
+                     lambda: FastAdminOrderSerializer.serialize_many(orders.all()))
+        transaction.savepoint_rollback(sid)
+
+    def compare(self, label, size, drf, fast):
+        drf_time, drf_data = best_of(drf, self.repeat)
+        fast_time, fast_data = best_of(fast, self.repeat)
+        identical = list(drf_data) == list(fast_data)
+        line = (
+            f'  {label:<22} drf {drf_time * 1000:9.1f} ms   fast {fast_time * 1000:9.1f} ms   '
+            f'x{drf_time / fast_time if fast_time else 0:5.1f}   identical={identical}'
+        )
+        self.stdout.write(self.style.SUCCESS(line) if identical else self.style.ERROR(line))
@@ -0,0 +1,109 @@
+"""
+Django management command to measure checkout throughput on one hot SKU as
+its stock is split across more stripes (see StripedStock and the "Stripe
+stock" admin action).
+
+Like benchmark_inventory it commits through one connection per worker
+thread and deletes its throwaway catalog afterwards. Stripe count 1 is the
+plain, unstriped SKU. SQLite serializes all writers regardless of which
+rows they touch, so run it against PostgreSQL or MySQL to see scaling.
+
+Usage:
+    python manage.py benchmark_stripes
+    python manage.py benchmark_stripes --stripes 1 --stripes 8 --stripes 32 --threads 32
+    python manage.py benchmark_stripes --orders 2000 --stock 1500
+"""
+
+import statistics
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.v1.orders.services import OrderService
+from api.v1.products.counters import CategoryCounters
+from api.v1.products.stripes import StripedStock
+from apps.products.management.commands.benchmark_inventory import Command as InventoryBenchmark
+from apps.products.models import Category, Product, ProductSKU
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent checkout of one hot SKU across stripe counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stripes',
+            type=int,
+            action='append',
+            dest='stripe_counts',
+            help='Stripe count to run (can be repeated; default: 1, 4, 16)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='Concurrent buyers (default: 16)'
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=400,
+            help='Checkout attempts per stripe count (default: 400)'
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            help='Starting units (default: --orders, so nothing sells out)'
+        )
+
+    def handle(self, *args, **options):
+        stripe_counts = options['stripe_counts'] or [1, 4, 16]
+        stock = options['stock'] if options['stock'] is not None else options['orders']
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes all writers (expect "database is locked" errors); stripes cannot help there'
+            ))
+
+        category = Category.objects.create(name='Stripe benchmark')
+        product = Product.objects.create(
+            category=category, name='Stripe benchmark product', summary='Summary', description='Description'
+        )
+        sku = ProductSKU.objects.create(
+            product=product, sku=f'STRIPEBENCH-{product.id}', price=Decimal('10.00'), quantity=stock
+        )
+        Product.refresh_sku_aggregates([product.id])
+        CategoryCounters.record({}, [product.id])
+        buyer = User.objects.create_user(
+            username=f'stripe-bench-{product.id}', email=f'stripe-bench-{product.id}@example.com'
+        )
+        baseline = None
+        try:
+            for stripes in stripe_counts:
+                with CategoryCounters.track([product.id]):
+                    sku = StripedStock.stripe(sku.id, stripes, quantity=stock)
+                    Product.objects.filter(id=product.id).update(in_stock=True)
+                    Product.refresh_sku_aggregates([product.id])
+                # The conditional strategy leaves unstriped SKUs unlocked until the decrement too
+                with override_settings(INVENTORY_STRATEGY=OrderService.CONDITIONAL):
+                    result = InventoryBenchmark.run_strategy(
+                        buyer, product, [sku], options['threads'], options['orders']
+                    )
+                throughput = result['placed'] / result['seconds']
+                baseline = baseline or throughput
+                self.report(stripes, result, throughput, baseline, sku)
+        finally:
+            buyer.delete()
+            with CategoryCounters.track([product.id]):
+                product.delete()
+            category.delete()
+
+    def report(self, stripes, result, throughput, baseline, sku):
+        latencies = sorted(result['latencies']) or [0.0]
+        left = StripedStock.stock([ProductSKU.objects.get(id=sku.id)])[sku.id]
+        self.stdout.write(
+            f"{stripes:>3} stripes {throughput:>9.1f} orders/s ({throughput / baseline if baseline else 0:.2f}x)   "
+            f"placed {result['placed']}, sold out {result['sold_out']}, errors {result['errors']}   "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms   stock left {left}"
+        )
@@ -0,0 +1,50 @@
+"""
+Django management command to update "frequently bought together" neighbours
+from orders placed since the last run (or from all orders with --rebuild).
+
+Usage:
+    python manage.py build_co_purchases
+    python manage.py build_co_purchases --rebuild
+    python manage.py build_co_purchases --batch-orders 50000 --top-k 20
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from api.v1.products.cache import CatalogCache
+from api.v1.products.copurchase import CoPurchases, np
+
+
+class Command(BaseCommand):
+    help = 'Count product co-purchases from new orders and refresh the top-K related products'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Discard all counts and recount every order'
+        )
+        parser.add_argument(
+            '--batch-orders',
+            type=int,
+            help='Orders per incremental batch (default: CO_PURCHASE_BATCH_ORDERS)'
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            help='Neighbours kept per product (default: CO_PURCHASE_TOP_K)'
+        )
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('numpy is not installed')
+
+        build = CoPurchases.rebuild if options['rebuild'] else CoPurchases.update
+        totals = build(batch_orders=options['batch_orders'], k=options['top_k'])
+
+        if not totals['orders']:
+            self.stdout.write(self.style.SUCCESS('No new orders since the last run'))
+            return
+        CatalogCache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {totals['orders']} orders: {totals['pairs']} product pairs, "
+            f"neighbours refreshed for {totals['products']} products"
+        ))
@@ -0,0 +1,48 @@
+"""
+Django management command to build the content-based similar-items index
+(TF-IDF over catalog text, cosine top-K neighbours) served by
+/api/v1/products/<id>/similar/.
+
+Usage:
+    python manage.py build_similar_index
+    python manage.py build_similar_index --top-k 20 --max-features 8192 --block-size 512
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.v1.products.similar import SimilarIndex, np
+
+
+class Command(BaseCommand):
+    help = 'Build TF-IDF similar-product neighbours into memory-mapped index files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            help='Neighbours kept per product (default: SIMILAR_TOP_K)'
+        )
+        parser.add_argument(
+            '--max-features',
+            type=int,
+            help='Vocabulary size cap (default: SIMILAR_MAX_FEATURES)'
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            help='Rows per similarity tile (default: SIMILAR_BLOCK_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('numpy is not installed')
+
+        meta = SimilarIndex.build(
+            k=options['top_k'],
+            max_features=options['max_features'],
+            block_size=options['block_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {meta['products']} products over {meta['terms']} terms "
+            f"into {settings.SIMILAR_INDEX_DIR}"
+        ))
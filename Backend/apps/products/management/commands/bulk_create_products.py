@@ -11,6 +11,9 @@ import json
 from decimal import Decimal
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
+from api.v1.products.attributes import attribute_registry
+from api.v1.products.cache import CatalogCache
+from api.v1.products.counters import CategoryCounters
 from apps.products.models import (
     Product, Category, ProductImage, ProductSKU, ProductAttribute
 )
@@ -105,6 +108,9 @@ class Command(BaseCommand):
                 else:
                     raise CommandError(error_msg)
 
+        if not dry_run and (created_count or updated_count):
+            CatalogCache.bump_version()
+
         # Summary
         self.stdout.write('\n' + '=' * 50)
         if dry_run:
@@ -154,6 +160,7 @@ class Command(BaseCommand):
                 was_created = False
             except Product.DoesNotExist:
                 pass
+        counters_before = CategoryCounters.capture([product.id] if product else [])
 
         # Create or update product
         product_data_dict = {
@@ -199,17 +206,11 @@ class Command(BaseCommand):
 
                 # Get or create size attribute
                 if sku_data.get('size'):
-                    size_attr, _ = ProductAttribute.objects.get_or_create(
-                        type=ProductAttribute.SIZE,
-                        value=sku_data['size']
-                    )
+                    size_attr = attribute_registry.get_or_create(ProductAttribute.SIZE, sku_data['size'])
 
                 # Get or create color attribute
                 if sku_data.get('color'):
-                    color_attr, _ = ProductAttribute.objects.get_or_create(
-                        type=ProductAttribute.COLOR,
-                        value=sku_data['color']
-                    )
+                    color_attr = attribute_registry.get_or_create(ProductAttribute.COLOR, sku_data['color'])
 
                 ProductSKU.objects.create(
                     product=product,
@@ -219,7 +220,9 @@ class Command(BaseCommand):
                     size_attribute=size_attr,
                     color_attribute=color_attr,
                 )
+            Product.refresh_sku_aggregates([product.id])
 
+        CategoryCounters.record(counters_before, [product.id])
         return product, was_created
 
 
@@ -0,0 +1,26 @@
+"""
+Django management command to regenerate the materialized product cards.
+
+Usage:
+    python manage.py rebuild_product_cards
+    python manage.py rebuild_product_cards --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+from api.v1.products.cards import ProductCards
+
+
+class Command(BaseCommand):
+    help = 'Regenerate ProductCard JSON for every product in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Products serialized per batch (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        written = ProductCards.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} product cards'))
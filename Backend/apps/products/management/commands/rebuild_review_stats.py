@@ -0,0 +1,39 @@
+"""
+Django management command to rebuild denormalized product review stats.
+
+Usage:
+    python manage.py rebuild_review_stats
+    python manage.py rebuild_review_stats --product 12 --product 15
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.v1.products.cards import ProductCards
+from apps.products.models import ProductReviewStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute ProductReviewStats from ProductReview rows to reconcile drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            type=int,
+            action='append',
+            dest='product_ids',
+            help='Only rebuild stats for this product ID (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = ProductReviewStats.rebuild(product_ids=options['product_ids'])
+
+        if written:
+            # Stats were corrected with bulk updates, so the cards' review summaries are stale
+            if options['product_ids']:
+                ProductCards.refresh(options['product_ids'])
+            else:
+                ProductCards.rebuild()
+            self.stdout.write(self.style.WARNING(f'Rebuilt stats for {written} products'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Review stats are up to date'))
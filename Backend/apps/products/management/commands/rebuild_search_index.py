@@ -0,0 +1,23 @@
+"""
+Django management command to rebuild the product full-text search index.
+
+Usage:
+    python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.v1.products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index in bulk'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            indexed = backend.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {indexed} products using {backend.__class__.__name__}')
+        )
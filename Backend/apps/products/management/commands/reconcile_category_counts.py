@@ -0,0 +1,43 @@
+"""
+Django management command to verify the denormalized category counters
+(product_count, in_stock_count, featured_count) against the product table.
+
+Usage:
+    python manage.py reconcile_category_counts
+    python manage.py reconcile_category_counts --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.v1.products.cache import CatalogCache
+from api.v1.products.counters import CategoryCounters
+
+
+class Command(BaseCommand):
+    help = 'Recompute category product counters from the product table to reconcile drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drifted categories without correcting them'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        with transaction.atomic():
+            drifted = CategoryCounters.reconcile(fix=not dry_run)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Category counters are up to date'))
+            return
+
+        for category, stored, expected in drifted:
+            self.stdout.write(
+                f'  {category.name} (#{category.id}): stored {stored}, expected {expected}'
+            )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} categories have drifted counters'))
+        else:
+            CatalogCache.bump_version()
+            self.stdout.write(self.style.WARNING(f'Corrected counters for {len(drifted)} categories'))
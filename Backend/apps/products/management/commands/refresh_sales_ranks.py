@@ -0,0 +1,32 @@
+"""
+Django management command to recompute bestseller and trending ranks from
+the daily sales rollup (run it hourly or nightly).
+
+Usage:
+    python manage.py refresh_sales_ranks
+    python manage.py refresh_sales_ranks --rebuild
+"""
+
+from django.core.management.base import BaseCommand
+from api.v1.products.cache import CatalogCache
+from api.v1.products.rankings import SalesRankings
+
+
+class Command(BaseCommand):
+    help = 'Refresh 1/7/30-day product sales ranks used by ?sort=bestselling and /products/trending/'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recount the daily rollup from order history before ranking'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            SalesRankings.rebuild_daily()
+            self.stdout.write(self.style.WARNING('Daily sales rollup rebuilt from order history'))
+
+        ranked = SalesRankings.refresh()
+        CatalogCache.bump_version()
+        self.stdout.write(self.style.SUCCESS(f'Ranked {ranked} products by recent sales'))
@@ -0,0 +1,63 @@
+"""
+Django management command to backfill the denormalized SKU columns on Product
+(min_price, max_price, total_stock, sku_count) from the SKU table. Striped
+SKUs first get their quantity re-summed from their stripes.
+
+Usage:
+    python manage.py refresh_sku_aggregates
+    python manage.py refresh_sku_aggregates --product 12 --product 15
+    python manage.py refresh_sku_aggregates --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.v1.products.cache import CatalogCache
+from api.v1.products.counters import CategoryCounters
+from api.v1.products.stripes import StripedStock
+from apps.products.models import Product, ProductSKU
+
+
+class Command(BaseCommand):
+    help = 'Recompute SKU-derived price and stock columns on Product to reconcile drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            type=int,
+            action='append',
+            dest='product_ids',
+            help='Only refresh this product ID (can be repeated)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Products per grouped query and transaction (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        product_ids = options['product_ids'] or list(Product.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            StripedStock.refresh_mirrors(
+                None if options['product_ids'] is None else
+                ProductSKU.objects.filter(product_id__in=product_ids).values('id')
+            )
+
+        changed = 0
+        for start in range(0, len(product_ids), batch_size):
+            with transaction.atomic():
+                changed += Product.refresh_sku_aggregates(product_ids[start:start + batch_size])
+
+        if not changed:
+            self.stdout.write(self.style.SUCCESS('SKU aggregates are up to date'))
+            return
+
+        # In-stock counters follow total_stock, so they may have drifted along with it
+        with transaction.atomic():
+            drifted = CategoryCounters.reconcile()
+        CatalogCache.bump_version()
+        self.stdout.write(self.style.WARNING(
+            f'Refreshed SKU aggregates for {changed} products; corrected counters for {len(drifted)} categories'
+        ))
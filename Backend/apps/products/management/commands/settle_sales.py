@@ -0,0 +1,33 @@
+"""
+Django management command to apply the product writes checkout defers for
+striped SKUs (run it every minute from cron): stock mirrors, in_stock, SKU
+aggregates, category counters, popularity and daily sales.
+
+Usage:
+    python manage.py settle_sales
+    python manage.py settle_sales --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+from api.v1.orders.services import OrderService
+
+
+class Command(BaseCommand):
+    help = 'Fold pending sales and striped stock into the product rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Pending sales per transaction (default: SALE_SETTLE_BATCH)'
+        )
+
+    def handle(self, *args, **options):
+        totals = OrderService.settle_sales(batch_size=options['batch_size'])
+        if not totals['products']:
+            self.stdout.write(self.style.SUCCESS('Nothing to settle'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Settled {totals['sales']} pending sales and {totals['skus']} striped SKUs "
+            f"across {totals['products']} products"
+        ))
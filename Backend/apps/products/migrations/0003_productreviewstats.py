@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_review_stats(apps, schema_editor):
+    ProductReview = apps.get_model('products', 'ProductReview')
+    ProductReviewStats = apps.get_model('products', 'ProductReviewStats')
+
+    stats = {}
+    rows = ProductReview.objects.order_by().values('product_id', 'rating').annotate(total=models.Count('id'))
+    for row in rows:
+        entry = stats.setdefault(row['product_id'], ProductReviewStats(product_id=row['product_id']))
+        entry.review_count += row['total']
+        entry.rating_sum += row['rating'] * row['total']
+        setattr(entry, f"rating_{row['rating']}", row['total'])
+    ProductReviewStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_coupon_productdetail_couponusage_productreview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0, help_text='Sum of all ratings')),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='review_stats', to='products.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Product review stats',
+            },
+        ),
+        migrations.RunPython(backfill_review_stats, migrations.RunPython.noop),
+    ]
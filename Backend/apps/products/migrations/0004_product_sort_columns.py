@@ -0,0 +1,77 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:23
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_sort_columns(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductSKU = apps.get_model('products', 'ProductSKU')
+    ProductReviewStats = apps.get_model('products', 'ProductReviewStats')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    min_prices = dict(
+        ProductSKU.objects.order_by().values('product_id').annotate(
+            lowest=models.Min('price')
+        ).values_list('product_id', 'lowest')
+    )
+    rating_avgs = {
+        stats.product_id: (Decimal(stats.rating_sum) / stats.review_count).quantize(Decimal('0.01'))
+        for stats in ProductReviewStats.objects.filter(review_count__gt=0)
+    }
+    units_sold = dict(
+        OrderItem.objects.exclude(order__status='cancelled').order_by().values('product_id').annotate(
+            units=models.Sum('quantity')
+        ).values_list('product_id', 'units')
+    )
+
+    products = list(Product.objects.only('id'))
+    for product in products:
+        product.min_price = min_prices.get(product.id)
+        product.rating_avg = rating_avgs.get(product.id, Decimal('0.00'))
+        product.popularity = units_sold.get(product.id) or 0
+    Product.objects.bulk_update(products, ['min_price', 'rating_avg', 'popularity'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_initial'),
+        ('products', '0003_productreviewstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Lowest SKU price', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='popularity',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Units sold in non-cancelled orders'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Average review rating', max_digits=3),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', '-created_at', '-id'], name='product_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', 'min_price', 'id'], name='product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', '-rating_avg', '-id'], name='product_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', '-popularity', '-id'], name='product_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_sort_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:44
+
+from django.db import migrations, models
+
+
+def backfill_category_counters(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    ProductSKU = apps.get_model('products', 'ProductSKU')
+
+    listed = models.Q(in_stock=True) & models.Exists(
+        ProductSKU.objects.filter(product=models.OuterRef('pk'), quantity__gt=0)
+    )
+    rows = Product.objects.filter(category__isnull=False).annotate(listed=listed).order_by().values(
+        'category_id'
+    ).annotate(
+        products=models.Count('id'),
+        listed_count=models.Count('id', filter=models.Q(listed=True)),
+        featured=models.Count('id', filter=models.Q(featured=True)),
+    )
+    counts = {row['category_id']: row for row in rows}
+
+    categories = list(Category.objects.only('id'))
+    for category in categories:
+        row = counts.get(category.id, {})
+        category.product_count = row.get('products', 0)
+        category.in_stock_count = row.get('listed_count', 0)
+        category.featured_count = row.get('featured', 0)
+    Category.objects.bulk_update(
+        categories, ['product_count', 'in_stock_count', 'featured_count'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_productcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='featured_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Featured products'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='in_stock_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Products listed as in stock'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Products in this category'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(('product_count__gt', 0)), fields=['name'], name='category_listed_idx'),
+        ),
+        migrations.RunPython(backfill_category_counters, migrations.RunPython.noop),
+    ]
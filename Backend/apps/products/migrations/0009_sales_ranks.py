@@ -0,0 +1,68 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_co_purchases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Product daily sales',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesRank',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_rank', serialize=False, to='products.product')),
+                ('units_1d', models.PositiveIntegerField(default=0)),
+                ('units_7d', models.PositiveIntegerField(default=0)),
+                ('units_30d', models.PositiveIntegerField(default=0)),
+                ('trend_score', models.FloatField(default=0, help_text='Units in the last 7 days above the 30-day pace')),
+                ('bestseller_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('trending_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='recent_sales',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Units sold in the last 30 days (refresh_sales_ranks)'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', '-recent_sales', '-id'], name='product_bestselling_idx'),
+        ),
+        migrations.AddField(
+            model_name='productdailysales',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product'),
+        ),
+        migrations.AddIndex(
+            model_name='productsalesrank',
+            index=models.Index(fields=['bestseller_rank'], name='sales_bestseller_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productsalesrank',
+            index=models.Index(fields=['trending_rank'], name='sales_trending_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productdailysales',
+            index=models.Index(fields=['day'], name='daily_sales_day_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='productdailysales',
+            unique_together={('product', 'day')},
+        ),
+    ]
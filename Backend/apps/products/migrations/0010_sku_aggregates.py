@@ -0,0 +1,57 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:58
+
+from django.db import migrations, models
+
+
+def backfill_sku_aggregates(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductSKU = apps.get_model('products', 'ProductSKU')
+
+    aggregates = {
+        row['product_id']: row
+        for row in ProductSKU.objects.order_by().values('product_id').annotate(
+            highest=models.Max('price'), stock=models.Sum('quantity'), skus=models.Count('id')
+        )
+    }
+
+    products = list(Product.objects.only('id'))
+    for product in products:
+        row = aggregates.get(product.id, {})
+        product.max_price = row.get('highest')
+        product.total_stock = row.get('stock') or 0
+        product.sku_count = row.get('skus', 0)
+    Product.objects.bulk_update(products, ['max_price', 'total_stock', 'sku_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_sales_ranks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Highest SKU price', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sku_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of SKUs'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='total_stock',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Units on hand across all SKUs'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', 'max_price', 'id'], name='product_max_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_stock', 'total_stock'], name='product_stock_idx'),
+        ),
+        migrations.RunPython(backfill_sku_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_sku_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='productsku',
+            constraint=models.CheckConstraint(condition=models.Q(('quantity__gte', 0)), name='sku_quantity_non_negative'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_sku_quantity_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsku',
+            name='stripe_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Stock rows the quantity is split across (0 = not striped); see ProductSKUStripe'),
+        ),
+        migrations.CreateModel(
+            name='ProductSKUStripe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe', models.PositiveSmallIntegerField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stripes', to='products.productsku')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('quantity__gte', 0)), name='stripe_quantity_non_negative')],
+                'unique_together': {('sku', 'stripe')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_sku_stock_stripes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CouponUsageShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('used', models.PositiveIntegerField(default=0)),
+                ('coupon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_shards', to='products.coupon')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('used__gte', 0)), name='coupon_shard_used_non_negative')],
+                'unique_together': {('coupon', 'shard')},
+            },
+        ),
+    ]
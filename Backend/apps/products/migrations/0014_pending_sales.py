@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_initial'),
+        ('products', '0013_coupon_usage_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingSale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.PositiveIntegerField()),
+                ('sold_at', models.DateTimeField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_sales', to='orders.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_sales', to='products.product')),
+            ],
+        ),
+    ]
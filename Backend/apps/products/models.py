@@ -1,14 +1,28 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
 import json
+from datetime import timedelta
 
 User = get_user_model()
 
 class Category(models.Model):
     name = models.CharField(max_length=150)
     description = models.TextField(blank=True)
+    # Denormalized product counters (maintained by CategoryCounters on product and stock writes)
+    product_count = models.PositiveIntegerField(default=0, editable=False, help_text="Products in this category")
+    in_stock_count = models.PositiveIntegerField(default=0, editable=False, help_text="Products listed as in stock")
+    featured_count = models.PositiveIntegerField(default=0, editable=False, help_text="Featured products")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['name'], condition=models.Q(product_count__gt=0), name='category_listed_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -31,11 +45,69 @@ class Product(models.Model):
     original_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Original price before discount")
     featured = models.BooleanField(default=False, help_text="Whether product is featured")
     in_stock = models.BooleanField(default=True, help_text="Product availability status")
+    # Denormalized sort columns (kept in sync by SKU, review and order write paths)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False, help_text="Lowest SKU price")
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False, help_text="Highest SKU price")
+    total_stock = models.PositiveIntegerField(default=0, editable=False, help_text="Units on hand across all SKUs")
+    sku_count = models.PositiveIntegerField(default=0, editable=False, help_text="Number of SKUs")
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False, help_text="Average review rating")
+    popularity = models.PositiveIntegerField(default=0, editable=False, help_text="Units sold in non-cancelled orders")
+    recent_sales = models.PositiveIntegerField(default=0, editable=False, help_text="Units sold in the last 30 days (refresh_sales_ranks)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['in_stock', '-created_at', '-id'], name='product_newest_idx'),
+            models.Index(fields=['in_stock', 'min_price', 'id'], name='product_price_idx'),
+            models.Index(fields=['in_stock', 'max_price', 'id'], name='product_max_price_idx'),
+            models.Index(fields=['in_stock', 'total_stock'], name='product_stock_idx'),
+            models.Index(fields=['in_stock', '-rating_avg', '-id'], name='product_rating_idx'),
+            models.Index(fields=['in_stock', '-popularity', '-id'], name='product_popularity_idx'),
+            models.Index(fields=['in_stock', '-recent_sales', '-id'], name='product_bestselling_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    SKU_AGGREGATE_FIELDS = ['min_price', 'max_price', 'total_stock', 'sku_count']
+
+    @classmethod
+    def refresh_sku_aggregates(cls, product_ids):
+        """Recompute SKU-derived columns for the given products in one grouped query; returns rows changed"""
+        from django.db.models import Count, Max, Min, Sum
+
+        product_ids = list(product_ids)
+        aggregates = {
+            row['product_id']: row
+            for row in ProductSKU.objects.filter(product_id__in=product_ids).order_by().values(
+                'product_id'
+            ).annotate(
+                min_price=Min('price'), max_price=Max('price'), total_stock=Sum('quantity'), sku_count=Count('id')
+            )
+        }
+        empty = {'min_price': None, 'max_price': None, 'total_stock': 0, 'sku_count': 0}
+        changed = []
+        for product in cls.objects.filter(id__in=product_ids).only('id', *cls.SKU_AGGREGATE_FIELDS):
+            row = aggregates.get(product.id, empty)
+            if any(getattr(product, field) != row[field] for field in cls.SKU_AGGREGATE_FIELDS):
+                for field in cls.SKU_AGGREGATE_FIELDS:
+                    setattr(product, field, row[field])
+                changed.append(product)
+        cls.objects.bulk_update(changed, cls.SKU_AGGREGATE_FIELDS, batch_size=500)
+        return len(changed)
+
+    @classmethod
+    def add_popularity(cls, quantities):
+        """Apply {product_id: units} deltas to the popularity column in one statement"""
+        from django.db.models import Case, F, When
+
+        quantities = {product_id: units for product_id, units in quantities.items() if units}
+        if quantities:
+            cls.objects.filter(id__in=quantities).update(popularity=Case(
+                *[When(id=product_id, then=F('popularity') + units) for product_id, units in quantities.items()]
+            ))
+
 
 class ProductImage(models.Model):
     """Model to store multiple images for a product"""
@@ -79,10 +151,39 @@ class ProductSKU(models.Model):
     sku = models.CharField(max_length=100, unique=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField()
+    stripe_count = models.PositiveSmallIntegerField(
+        default=0, help_text="Stock rows the quantity is split across (0 = not striped); see ProductSKUStripe"
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            # Explicit on every backend; the conditional inventory strategy relies on it
+            models.CheckConstraint(condition=models.Q(quantity__gte=0), name='sku_quantity_non_negative'),
+        ]
+
+
+class ProductSKUStripe(models.Model):
+    """
+    One slice of a striped SKU's stock. While a SKU is striped its stock is
+    the sum of its stripes and ProductSKU.quantity mirrors that sum after
+    each write (see api.v1.products.stripes.StripedStock).
+    """
+    sku = models.ForeignKey(ProductSKU, on_delete=models.CASCADE, related_name="stripes")
+    stripe = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['sku', 'stripe']
+        constraints = [
+            models.CheckConstraint(condition=models.Q(quantity__gte=0), name='stripe_quantity_non_negative'),
+        ]
+
+    def __str__(self):
+        return f"{self.sku_id} stripe {self.stripe}: {self.quantity}"
+
 
 class ProductDetail(models.Model):
     """Additional product details like material, care instructions, fit"""
@@ -118,6 +219,253 @@ class ProductReview(models.Model):
         return f"{self.user.username} - {self.product.name} - {self.rating} stars"
 
 
+class ProductReviewStats(models.Model):
+    """Denormalized review aggregates per product, maintained alongside review writes"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="review_stats")
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0, help_text="Sum of all ratings")
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Product review stats"
+
+    def __str__(self):
+        return f"Review stats for product #{self.product_id}"
+
+    @property
+    def rating_breakdown(self):
+        return {i: getattr(self, f'rating_{i}') for i in range(1, 6)}
+
+    @classmethod
+    def apply(cls, product_id, rating, delta):
+        """Add (delta=1) or remove (delta=-1) one rating; call inside the review write transaction"""
+        from django.db.models import F
+        from django.utils import timezone
+
+        cls.objects.get_or_create(product_id=product_id)
+        cls.objects.filter(product_id=product_id).update(
+            review_count=F('review_count') + delta,
+            rating_sum=F('rating_sum') + delta * rating,
+            updated_at=timezone.now(),
+            **{f'rating_{rating}': F(f'rating_{rating}') + delta}
+        )
+        cls.objects.get(product_id=product_id).sync_rating_avg()
+
+    @property
+    def rating_avg(self):
+        from decimal import Decimal
+
+        if not self.review_count:
+            return Decimal('0.00')
+        return (Decimal(self.rating_sum) / self.review_count).quantize(Decimal('0.01'))
+
+    def sync_rating_avg(self):
+        """Copy the average rating onto Product.rating_avg for indexed sorting"""
+        Product.objects.filter(id=self.product_id).update(rating_avg=self.rating_avg)
+
+    @classmethod
+    def record_review(cls, review):
+        cls.apply(review.product_id, review.rating, 1)
+
+    @classmethod
+    def remove_review(cls, review):
+        cls.apply(review.product_id, review.rating, -1)
+
+    @classmethod
+    def rebuild(cls, product_ids=None, batch_size=500):
+        """
+        Recompute stats from ProductReview with one grouped query per batch
+        of products and upsert them. Returns the number of products whose
+        stats drifted; creating a missing row for an unreviewed product is
+        not drift.
+        """
+        products = Product.objects.all()
+        if product_ids is not None:
+            products = products.filter(id__in=product_ids)
+        product_ids = list(products.order_by('id').values_list('id', flat=True))
+        return sum(
+            cls._rebuild_batch(product_ids[start:start + batch_size])
+            for start in range(0, len(product_ids), batch_size)
+        )
+
+    @classmethod
+    def _rebuild_batch(cls, product_ids):
+        from django.db.models import Count
+
+        expected = {
+            product_id: {f'rating_{i}': 0 for i in range(1, 6)}
+            for product_id in product_ids
+        }
+        rows = ProductReview.objects.filter(product_id__in=product_ids).order_by().values(
+            'product_id', 'rating'
+        ).annotate(total=Count('id'))
+        for row in rows:
+            expected[row['product_id']][f'rating_{row["rating"]}'] = row['total']
+        for values in expected.values():
+            values['review_count'] = sum(values[f'rating_{i}'] for i in range(1, 6))
+            values['rating_sum'] = sum(i * values[f'rating_{i}'] for i in range(1, 6))
+
+        fields = ['review_count', 'rating_sum'] + [f'rating_{i}' for i in range(1, 6)]
+        existing = {stats.product_id: stats for stats in cls.objects.filter(product_id__in=product_ids)}
+        to_create, to_update, drifted = [], [], []
+        for product_id, values in expected.items():
+            stats = existing.get(product_id)
+            if stats is None:
+                stats = cls(product_id=product_id, **values)
+                to_create.append(stats)
+                if values['review_count']:
+                    drifted.append(stats)
+            elif any(getattr(stats, field) != values[field] for field in fields):
+                for field in fields:
+                    setattr(stats, field, values[field])
+                to_update.append(stats)
+                drifted.append(stats)
+
+        cls.objects.bulk_create(to_create, batch_size=500)
+        cls.objects.bulk_update(to_update, fields, batch_size=500)
+        for stats in drifted:
+            stats.sync_rating_avg()
+        return len(drifted)
+
+
+class ProductCard(models.Model):
+    """Materialized ProductSerializer output per product, spliced into listing responses"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="card")
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Card for product #{self.product_id}"
+
+
+class BatchWatermark(models.Model):
+    """Last source row id processed by an incremental batch job"""
+    job = models.CharField(max_length=50, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.job} @ {self.position}"
+
+    @classmethod
+    def get(cls, job):
+        return cls.objects.filter(job=job).values_list('position', flat=True).first() or 0
+
+    @classmethod
+    def advance(cls, job, position):
+        cls.objects.update_or_create(job=job, defaults={'position': position})
+
+
+class ProductPairCount(models.Model):
+    """Number of non-cancelled orders containing both products; stored once per pair (product_a < product_b)"""
+    product_a = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    product_b = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['product_a', 'product_b']
+        indexes = [models.Index(fields=['product_b'], name='pair_count_b_idx')]
+
+    def __str__(self):
+        return f"#{self.product_a_id} + #{self.product_b_id}: {self.orders}"
+
+
+class ProductDailySales(models.Model):
+    """Units sold per product per day (order placement date), kept current by OrderService"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField()
+    # Signed: a cancellation may reach a day whose row was already pruned
+    units = models.IntegerField(default=0)
+
+    # Days of history kept; the longest ranking window
+    RETENTION_DAYS = 30
+
+    class Meta:
+        unique_together = ['product', 'day']
+        indexes = [models.Index(fields=['day'], name='daily_sales_day_idx')]
+        verbose_name_plural = "Product daily sales"
+
+    def __str__(self):
+        return f"#{self.product_id} on {self.day}: {self.units}"
+
+    @classmethod
+    def record(cls, placed_at, units_by_product):
+        """Apply {product_id: signed units} for an order placed at `placed_at`; call inside the order transaction"""
+        from django.db.models import Case, F, When
+        from django.utils import timezone
+
+        day = timezone.localdate(placed_at)
+        if day < timezone.localdate() - timedelta(days=cls.RETENTION_DAYS):
+            return
+        units_by_product = {product_id: units for product_id, units in units_by_product.items() if units}
+        if not units_by_product:
+            return
+        cls.objects.bulk_create(
+            [cls(product_id=product_id, day=day) for product_id in units_by_product], ignore_conflicts=True
+        )
+        cls.objects.filter(product_id__in=units_by_product, day=day).update(units=Case(
+            *[When(product_id=product_id, then=F('units') + units) for product_id, units in units_by_product.items()]
+        ))
+
+
+class PendingSale(models.Model):
+    """
+    Units sold by a checkout that left the product rows alone (striped SKUs,
+    or every SKU under the conditional inventory strategy).
+    OrderService.settle_sales folds them into popularity and daily sales in
+    batches and deletes them; inserting one never waits on another checkout.
+    Cancelling the order before then just deletes its rows.
+    """
+    order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, related_name="pending_sales")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="pending_sales")
+    units = models.PositiveIntegerField()
+    sold_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.units} x #{self.product_id} at {self.sold_at}"
+
+
+class ProductSalesRank(models.Model):
+    """Bestseller and trending ranks over 1/7/30-day windows, rewritten by refresh_sales_ranks"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="sales_rank")
+    units_1d = models.PositiveIntegerField(default=0)
+    units_7d = models.PositiveIntegerField(default=0)
+    units_30d = models.PositiveIntegerField(default=0)
+    trend_score = models.FloatField(default=0, help_text="Units in the last 7 days above the 30-day pace")
+    bestseller_rank = models.PositiveIntegerField(null=True, blank=True)
+    trending_rank = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bestseller_rank'], name='sales_bestseller_rank_idx'),
+            models.Index(fields=['trending_rank'], name='sales_trending_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Sales rank for product #{self.product_id}"
+
+
+class ProductCoPurchase(models.Model):
+    """Top-K "frequently bought together" neighbours per product, derived from ProductPairCount"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="co_purchases")
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    orders = models.PositiveIntegerField(help_text="Orders containing both products")
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ['product', 'rank']
+        ordering = ['product', 'rank']
+
+    def __str__(self):
+        return f"#{self.product_id} -> #{self.related_id} ({self.orders})"
+
+
 class Coupon(models.Model):
     """Discount coupons/codes"""
     code = models.CharField(max_length=50, unique=True, help_text="Coupon code")
@@ -201,6 +549,26 @@ class Coupon(models.Model):
         return min(discount, amount)
 
 
+class CouponUsageShard(models.Model):
+    """
+    One slice of a coupon's use count. Checkouts count uses here instead of
+    on the coupon row; Coupon.used_count is their sum, folded in after
+    commit (see api.v1.products.redemptions.CouponRedemptions).
+    """
+    coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name="usage_shards")
+    shard = models.PositiveSmallIntegerField()
+    used = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['coupon', 'shard']
+        constraints = [
+            models.CheckConstraint(condition=models.Q(used__gte=0), name='coupon_shard_used_non_negative'),
+        ]
+
+    def __str__(self):
+        return f"{self.coupon_id} shard {self.shard}: {self.used}"
+
+
 class CouponUsage(models.Model):
     """Track coupon usage by users"""
     coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name="usages")
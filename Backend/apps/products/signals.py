@@ -0,0 +1,119 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_migrate, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.products.models import (
+    Category, Product, ProductAttribute, ProductDetail, ProductImage, ProductReview, ProductSKU
+)
+
+
+SEARCH_FIELDS = {'name', 'summary', 'description'}
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, update_fields=None, **kwargs):
+    """Keep the full-text index in step with product text changes"""
+    from api.v1.products.search import get_search_backend
+
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    get_search_backend().index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_search(sender, instance, **kwargs):
+    from api.v1.products.search import get_search_backend
+
+    get_search_backend().remove_product(instance.pk)
+
+
+@receiver(post_migrate)
+def recheck_search_table(sender, **kwargs):
+    """A migration may have created the FTS table; pick the backend again"""
+    from api.v1.products.search import reset_fts_table_cache
+
+    reset_fts_table_cache()
+
+
+@receiver(post_save, sender=Product)
+def update_product_suggestion(sender, instance, **kwargs):
+    """Keep this worker's typeahead index in step with committed product changes"""
+    from api.v1.products.suggest import suggest_index
+
+    transaction.on_commit(partial(suggest_index.update_product, instance))
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_suggestion(sender, instance, **kwargs):
+    from api.v1.products.suggest import suggest_index
+
+    transaction.on_commit(partial(suggest_index.remove_product, instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def update_category_suggestion(sender, instance, **kwargs):
+    from api.v1.products.suggest import suggest_index
+
+    transaction.on_commit(partial(suggest_index.update_category, instance))
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_suggestion(sender, instance, **kwargs):
+    from api.v1.products.suggest import suggest_index
+
+    transaction.on_commit(partial(suggest_index.remove_category, instance.pk))
+
+
+@receiver(post_save, sender=ProductDetail)
+def update_brand_suggestion(sender, instance, **kwargs):
+    from api.v1.products.suggest import suggest_index
+
+    transaction.on_commit(partial(suggest_index.update_product_brand, instance.product_id, instance.brand))
+
+
+@receiver(post_delete, sender=ProductDetail)
+def remove_brand_suggestion(sender, instance, **kwargs):
+    from api.v1.products.suggest import suggest_index
+
+    transaction.on_commit(partial(suggest_index.update_product_brand, instance.product_id, None))
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_card(sender, instance, **kwargs):
+    """Regenerate the materialized listing card after any write that changes its content"""
+    from api.v1.products.cards import ProductCards
+
+    ProductCards.schedule([instance.pk])
+
+
+@receiver(post_save, sender=ProductSKU)
+@receiver(post_delete, sender=ProductSKU)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductDetail)
+@receiver(post_delete, sender=ProductDetail)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def refresh_card_for_related(sender, instance, **kwargs):
+    from api.v1.products.cards import ProductCards
+
+    ProductCards.schedule([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+def refresh_cards_in_category(sender, instance, created=False, **kwargs):
+    from api.v1.products.cards import ProductCards
+
+    if not created:
+        ProductCards.schedule(Product.objects.filter(category=instance).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=ProductAttribute)
+@receiver(post_delete, sender=ProductAttribute)
+def invalidate_attribute_registry(sender, instance, **kwargs):
+    """Reload attribute lookups once the write is committed (never from a transaction that may roll back)"""
+    from api.v1.products.attributes import attribute_registry
+
+    transaction.on_commit(attribute_registry.invalidate)
@@ -1,3 +1,901 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+
+from api.v1.orders.services import OrderService
+from api.v1.products.aggregates import ProductDetailAggregate
+from api.v1.products.attributes import AttributeRegistry, attribute_registry
+from api.v1.products.cache import CatalogCache
+from api.v1.products.cards import ProductCards
+from api.v1.products.copurchase import CoPurchases
+from api.v1.products.counters import CategoryCounters
+from api.v1.products.facets import ProductFacets
+from api.v1.products.rankings import SalesRankings
+from api.v1.products.serializer.fast import FastProductSerializer, FastProductSKUSerializer
+from api.v1.products.serializer.product import ProductSerializer
+from api.v1.products.serializer.sku import ProductSKUSerializer
+from api.v1.products.services import ProductServices
+from api.v1.products.search import FTS_TABLE, fts_table_exists, reset_fts_table_cache
+from api.v1.products.similar import SimilarIndex
+from api.v1.products.suggest import SuggestIndex, suggest_index
+from api.v1.renderers import FastJSONParser, FastJSONRenderer, MessagePackParser, MessagePackRenderer
+from apps.orders.models import Order, OrderItem
+from apps.products.models import (
+    Category, Product, ProductAttribute, ProductDetail, ProductImage, ProductReview,
+    ProductCard, ProductDailySales, ProductPairCount, ProductReviewStats, ProductSalesRank, ProductSKU
+)
+from apps.users.models import User
+from config.middleware import CompressionMiddleware, brotli
+
+
+def create_catalog(count, category=None, reviewer=None, prefix="P"):
+    """Create `count` in-stock products with SKUs, images, details and a review each"""
+    category = category or Category.objects.create(name="Clothing")
+    reviewer = reviewer or User.objects.create_user(username="reviewer", password="pass12345")
+    size, _ = ProductAttribute.objects.get_or_create(type=ProductAttribute.SIZE, value="M")
+    color, _ = ProductAttribute.objects.get_or_create(type=ProductAttribute.COLOR, value="Red")
+    # Test transactions never commit, so the on-commit invalidation doesn't run
+    attribute_registry.invalidate()
+
+    products = []
+    for idx in range(count):
+        product = Product.objects.create(
+            category=category,
+            name=f"{prefix} Product {idx}",
+            summary="Summary",
+            description="Description",
+            original_price=Decimal("99.00"),
+        )
+        ProductSKU.objects.create(
+            product=product, sku=f"{prefix}-{idx}-A", price=Decimal("49.00"), quantity=5,
+            size_attribute=size, color_attribute=color,
+        )
+        ProductSKU.objects.create(
+            product=product, sku=f"{prefix}-{idx}-B", price=Decimal("39.00"), quantity=5,
+            size_attribute=size,
+        )
+        ProductImage.objects.create(product=product, image_url=f"https://img.test/{idx}.jpg")
+        ProductDetail.objects.create(product=product, material="Cotton", brand="Zuno")
+        review = ProductReview.objects.create(product=product, user=reviewer, rating=4, comment="Nice")
+        ProductReviewStats.record_review(review)
+        products.append(product)
+    Product.refresh_sku_aggregates([product.id for product in products])
+    CategoryCounters.record({}, [product.id for product in products])
+    for product in products:
+        product.refresh_from_db(fields=Product.SKU_AGGREGATE_FIELDS)
+    return products
+
+
+class ProductSerializerQueryCountTests(TestCase):
+    """Listing cost must not grow with the number of products on the page"""
+
+    def serialize_listing(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = ProductSerializer(ProductServices.get_products(), many=True).data
+        return data, len(queries)
+
+    def test_listing_query_count_is_flat(self):
+        create_catalog(3)
+        small_data, small_queries = self.serialize_listing()
+
+        create_catalog(20, reviewer=User.objects.create_user(username="other", password="pass12345"), prefix="Q")
+        large_data, large_queries = self.serialize_listing()
+
+        self.assertEqual(len(small_data), 3)
+        self.assertEqual(len(large_data), 23)
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, 3)
+
+    def test_projected_fields(self):
+        product = create_catalog(1)[0]
+        data = ProductSerializer(product).data
+
+        self.assertEqual(data['sizes'], ['M'])
+        self.assertEqual(data['colors'], ['Red'])
+        self.assertEqual(data['price'], 39.0)
+        self.assertEqual(data['images'], ['https://img.test/0.jpg'])
+        self.assertEqual(data['details']['brand'], 'Zuno')
+        self.assertEqual(data['review_summary']['average_rating'], 4.0)
+        self.assertEqual(data['review_summary']['rating_breakdown'], {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+
+
+class ProductReviewStatsTests(TestCase):
+    def test_apply_and_rebuild(self):
+        product = create_catalog(1)[0]
+        stats = ProductReviewStats.objects.get(product=product)
+        self.assertEqual((stats.review_count, stats.rating_sum, stats.rating_4), (1, 4, 1))
+
+        review = ProductReview.objects.get(product=product)
+        ProductReviewStats.remove_review(review)
+        review.delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.review_count, stats.rating_sum, stats.rating_4), (0, 0, 0))
+
+        ProductReview.objects.create(
+            product=product, user=User.objects.create_user(username="drift", password="pass12345"),
+            rating=2, comment="Unrecorded"
+        )
+        self.assertEqual(ProductReviewStats.rebuild(), 1)
+        stats.refresh_from_db()
+        self.assertEqual((stats.review_count, stats.rating_sum, stats.rating_2), (1, 2, 1))
+        self.assertEqual(ProductReviewStats.rebuild(), 0)
+
+    def test_rebuild_counts_only_drift_in_batches(self):
+        products = create_catalog(3)
+        ProductReviewStats.objects.all().delete()
+        ProductReview.objects.filter(product=products[1]).delete()
+
+        with self.assertNumQueries(8):
+            # One IN query per batch; the unreviewed product gets a zero row that is not drift
+            self.assertEqual(ProductReviewStats.rebuild(product_ids=[products[0].id, products[1].id], batch_size=1), 1)
+        self.assertEqual(ProductReviewStats.rebuild(batch_size=2), 1)
+        self.assertEqual(ProductReviewStats.objects.count(), 3)
+        self.assertEqual(ProductReviewStats.rebuild(batch_size=2), 0)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_listing_is_cached_until_version_bump(self):
+        create_catalog(2)
+        first = self.client.get('/api/v1/products/')
+        second = self.client.get('/api/v1/products/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.json(), second.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CatalogCache.bump_version()
+        self.assertEqual(self.client.get('/api/v1/products/')['X-Cache'], 'MISS')
+        self.assertEqual(CatalogCache.stats()['hits'], 1)
+
+    def test_conditional_get_returns_304_without_queries(self):
+        products = create_catalog(2)
+        for url in ['/api/v1/products/', f'/api/v1/products/{products[0].id}/',
+                    f'/api/v1/products/{products[0].id}/skus/', '/api/v1/products/categories/']:
+            etag = self.client.get(url)['ETag']
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(len(queries), 0)
+            self.assertEqual(response.content, b'')
+
+        etag = self.client.get('/api/v1/products/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            CatalogCache.bump_version()
+        self.assertEqual(self.client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stock_writes_revalidate_product_endpoints(self):
+        (product,) = create_catalog(1)
+        detail, skus = f'/api/v1/products/{product.id}/', f'/api/v1/products/{product.id}/skus/'
+        etags = {url: self.client.get(url)['ETag'] for url in (detail, skus)}
+        listing_etag = self.client.get('/api/v1/products/')['ETag']
+
+        buyer = User.objects.create_user(username="buyer", password="pass12345")
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderService.create_order(buyer, {'items': [
+                {'product_id': product.id, 'sku_id': product.skus.order_by('id').first().id, 'quantity': 2}
+            ]})
+
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etags[detail])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([sku['quantity'] for sku in response.json()['data']['skus']], [3, 5])
+        self.assertEqual(self.client.get(skus, HTTP_IF_NONE_MATCH=etags[skus]).status_code, 200)
+        # Stock alone leaves the rest of the catalog cached
+        self.assertEqual(self.client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=listing_etag).status_code, 304)
+
+    def test_review_list_etag_follows_review_watermark(self):
+        products = create_catalog(1)
+        url = f'/api/v1/products/{products[0].id}/reviews/'
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+        review = ProductReview.objects.get(product=products[0])
+        review.helpful_count += 1
+        review.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, sort, limit=4):
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {'sort': sort, 'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.client.get('/api/v1/products/', params).json()
+            ids.extend(item['id'] for item in body['data'])
+            pages += 1
+            cursor = body['next_cursor']
+            if not cursor:
+                return ids, pages, body['count']
+
+    def test_cursor_walk_covers_catalog_once(self):
+        products = create_catalog(10)
+        for idx, product in enumerate(products):
+            ProductSKU.objects.filter(product=product).update(price=Decimal(100 - (idx % 3)))
+        Product.refresh_sku_aggregates([product.id for product in products])
+
+        for sort in ['newest', 'price_asc', 'price_desc', 'rating', 'popularity']:
+            ids, pages, count = self.walk(sort)
+            self.assertEqual(sorted(ids), sorted(p.id for p in products), sort)
+            self.assertEqual(pages, 3)
+            self.assertEqual(count, 10)
+
+        ids, _, _ = self.walk('price_asc')
+        prices = list(Product.objects.filter(id__in=ids).values_list('id', 'min_price'))
+        by_id = dict(prices)
+        self.assertEqual([by_id[i] for i in ids], sorted(by_id[i] for i in ids))
+
+    def test_invalid_sort_and_cursor(self):
+        self.assertEqual(self.client.get('/api/v1/products/', {'sort': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/products/', {'cursor': 'not-a-cursor'}).status_code, 400)
+        for value in ['abc', 'NaN', 'Infinity', None]:
+            payload = json.dumps({'s': 'price_asc', 'v': value, 'id': 1}).encode('utf-8')
+            cursor = base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+            response = self.client.get('/api/v1/products/', {'sort': 'price_asc', 'cursor': cursor})
+            self.assertEqual(response.status_code, 400, value)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_search_ranks_name_matches_first(self):
+        products = create_catalog(3)
+        products[0].description = "Pairs well with a linen shirt"
+        products[0].save()
+        products[2].name = "Linen Shirt"
+        products[2].save()
+
+        body = self.client.get('/api/v1/products/search/', {'q': 'linen shir'}).json()
+        self.assertEqual([item['id'] for item in body['data']], [products[2].id, products[0].id])
+
+        products[2].delete()
+        body = self.client.get('/api/v1/products/search/', {'q': 'linen'}).json()
+        self.assertEqual([item['id'] for item in body['data']], [products[0].id])
+
+    def test_rebuild_command(self):
+        create_catalog(2)
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 2 products', out.getvalue())
+
+    def test_missing_fts_table_is_rechecked_sparingly(self):
+        reset_fts_table_cache()
+        self.addCleanup(reset_fts_table_cache)
+        with mock.patch.object(connection.introspection, 'table_names', return_value=[]) as table_names, \
+                mock.patch('api.v1.products.search.time.monotonic', side_effect=[100.0, 130.0, 200.0]):
+            self.assertFalse(fts_table_exists())
+            self.assertFalse(fts_table_exists())
+            self.assertEqual(table_names.call_count, 1)
+            table_names.return_value = [FTS_TABLE]
+            self.assertTrue(fts_table_exists())
+            self.assertEqual(table_names.call_count, 2)
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_filters_and_counts(self):
+        products = create_catalog(4)
+        large, _ = ProductAttribute.objects.get_or_create(type=ProductAttribute.SIZE, value="L")
+        ProductSKU.objects.filter(product=products[0]).update(size_attribute=large, price=Decimal("1200.00"))
+        Product.refresh_sku_aggregates([products[0].id])
+
+        with CaptureQueriesContext(connection) as queries:
+            facets = ProductFacets.counts(ProductServices.get_products())
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(facets['category'], {'Clothing': 4})
+        self.assertEqual(facets['size'], {'M': 3, 'L': 1})
+        self.assertEqual(facets['color'], {'Red': 4})
+        self.assertEqual(facets['price']['0-500'], 3)
+        self.assertEqual(facets['price']['1000-2500'], 1)
+        self.assertEqual(facets['rating']['4+'], 4)
+
+        body = self.client.get('/api/v1/products/', {'size': 'L'}).json()
+        self.assertEqual([item['id'] for item in body['data']], [products[0].id])
+        self.assertEqual(body['facets']['size'], {'L': 1})
+
+        body = self.client.get('/api/v1/products/', {'max_price': '500', 'color': 'Red,Blue'}).json()
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(self.client.get('/api/v1/products/', {'min_price': 'abc'}).status_code, 400)
+
+    def test_repeated_params_match_names_with_commas(self):
+        create_catalog(2)
+        create_catalog(1, category=Category.objects.create(name="Bags, Belts"), reviewer=User.objects.first(), prefix="B")
+        body = self.client.get('/api/v1/products/', {'category': ["Bags, Belts", "Clothing"]}).json()
+        self.assertEqual(body['count'], 3)
+        body = self.client.get('/api/v1/products/', {'category': "Bags, Belts"}).json()
+        self.assertEqual(body['facets']['category'], {'Bags, Belts': 1})
+
+    def test_counts_are_cached_per_filter_not_per_page(self):
+        create_catalog(5)
+        first = self.client.get('/api/v1/products/', {'limit': 2}).json()
+        with mock.patch.object(ProductFacets, 'counts', side_effect=AssertionError("recomputed")):
+            second = self.client.get('/api/v1/products/', {'limit': 2, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(second['facets'], first['facets'])
+
+
+class ProductSuggestTests(TestCase):
+    def test_prefix_suggestions_follow_popularity_and_updates(self):
+        products = create_catalog(3)
+        Product.objects.filter(pk=products[1].pk).update(name="Linen Shirt", popularity=9)
+        Product.objects.filter(pk=products[2].pk).update(name="Linen Trousers", popularity=2)
+        suggest_index.build()
+
+        body = self.client.get('/api/v1/products/suggest/', {'q': 'lin'}).json()
+        self.assertEqual([item['text'] for item in body['data']], ["Linen Shirt", "Linen Trousers"])
+        self.assertEqual(body['data'][0], {'text': "Linen Shirt", 'type': 'product', 'id': products[1].id})
+
+        # word starts match too; category and brand completions come from the same index
+        self.assertEqual(suggest_index.suggest('shi')[0]['text'], "Linen Shirt")
+        self.assertEqual(suggest_index.suggest('clo'), [{'text': "Clothing", 'type': 'category', 'id': products[0].category_id}])
+        self.assertEqual(suggest_index.suggest('zu')[0]['type'], 'brand')
+
+        # signals refresh the index incrementally, once the write commits
+        products[2].refresh_from_db()
+        products[2].name = "Wool Trousers"
+        with self.captureOnCommitCallbacks(execute=True):
+            products[2].save()
+            self.assertEqual(len(suggest_index.suggest('lin')), 2)
+        self.assertEqual([item['text'] for item in suggest_index.suggest('lin')], ["Linen Shirt"])
+        with self.captureOnCommitCallbacks(execute=True):
+            products[1].delete()
+        self.assertEqual(suggest_index.suggest('lin'), [])
+        self.assertEqual(self.client.get('/api/v1/products/suggest/').json()['count'], 0)
+
+    def test_incremental_updates_respect_max_keys(self):
+        create_catalog(1)
+        index = SuggestIndex(max_keys=4)
+        index.build()
+        self.assertLessEqual(index.stats()['keys'], 4)
+
+        product = Product(pk=999, name="Very Long Linen Shirt", in_stock=True, popularity=100)
+        index.update_product(product)
+        self.assertLessEqual(index.stats()['keys'], 4)
+        self.assertEqual(index.suggest('very'), [])
+
+
+    def test_incremental_updates_weigh_like_a_rebuild(self):
+        products = create_catalog(3)
+        Product.objects.filter(pk=products[0].pk).update(popularity=7)
+        index = SuggestIndex()
+        index.build()
+
+        def weights(index):
+            return {ref: suggestion["weight"] for ref, suggestion in index._suggestions.items()}
+
+        ProductDetail.objects.filter(product=products[0]).update(brand="Orla")
+        index.update_product_brand(products[0].pk, "Orla")
+        products[1].popularity = 4
+        Product.objects.filter(pk=products[1].pk).update(popularity=4)
+        index.update_product(products[1])
+        index.update_category(Category.objects.create(name="Outerwear"))
+
+        rebuilt = SuggestIndex()
+        rebuilt.build()
+        self.assertEqual(weights(index) | weights(rebuilt), weights(index))
+        self.assertEqual(weights(index)[(SuggestIndex.BRAND, "zuno")], 5 + 1)
+        self.assertEqual(index.suggest('out')[0]['text'], "Outerwear")
+
+    def test_stale_index_is_served_while_another_thread_rebuilds(self):
+        create_catalog(1)
+        index = SuggestIndex(ttl=0)
+        index.build()
+        with index._build_lock, mock.patch.object(index, 'build', side_effect=AssertionError("rebuilt")):
+            self.assertEqual(index.suggest('clo')[0]['text'], "Clothing")
+
+
+class ProductCardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_match_serializer_and_refresh_on_commit(self):
+        products = create_catalog(3)
+        expected = ProductSerializer(ProductServices.get_products(), many=True).data
+        body = self.client.get('/api/v1/products/').json()
+        self.assertEqual(body['data'], json.loads(json.dumps(expected, cls=DjangoJSONEncoder)))
+        self.assertEqual(ProductCard.objects.count(), 3)
+
+        # once cards exist, the page body costs a single query
+        with CaptureQueriesContext(connection) as queries:
+            ProductCards.for_ids([product.id for product in products])
+        self.assertEqual(len(queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=products[0], image_url="https://img.test/extra.jpg", order=5)
+            products[0].name = "Renamed"
+            products[0].save()
+        card = ProductCard.objects.get(product=products[0]).payload
+        self.assertEqual(card['name'], "Renamed")
+        self.assertEqual(card['images'][-1], "https://img.test/extra.jpg")
+
+        ProductCard.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_product_cards', stdout=out)
+        self.assertIn('Rebuilt 3 product cards', out.getvalue())
+        self.assertEqual(ProductCard.objects.count(), 3)
+
+
+class FastProductSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_output_matches_drf_serializers(self):
+        products = create_catalog(3)
+        Product.objects.filter(pk=products[1].pk).update(original_price=None, category=None)
+        queryset = ProductServices.get_products()
+        expected = ProductSerializer(queryset, many=True).data
+        self.assertEqual(FastProductSerializer.serialize_many(queryset), expected)
+        self.assertEqual(FastProductSerializer.serialize_queryset(queryset), expected)
+
+        skus = ProductServices.get_product_skus(products[0], include_out_of_stock=True)
+        expected = ProductSKUSerializer(skus, many=True).data
+        self.assertEqual(FastProductSKUSerializer.serialize_many(skus), expected)
+        self.assertEqual(FastProductSKUSerializer.serialize_queryset(skus), expected)
+
+    def test_card_view_omits_description(self):
+        create_catalog(2)
+        body = self.client.get('/api/v1/products/', {'view': 'card'}).json()
+        self.assertTrue(body['data'])
+        self.assertTrue(all('description' not in item and 'summary' in item for item in body['data']))
+        self.assertIn('description', self.client.get('/api/v1/products/').json()['data'][0])
+        self.assertEqual(self.client.get('/api/v1/products/', {'view': 'bogus'}).status_code, 400)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_drf_json_renderer(self):
+        payload = {
+            'price': Decimal('49.90'),
+            'created_at': datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=dt_timezone.utc),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'breakdown': {1: 0, 5: 2},
+            'text': 'caf\u00e9 \u2028 line',
+        }
+        body = FastJSONRenderer().render(payload)
+        self.assertEqual(body, JSONRenderer().render(payload))
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), {
+            'price': 49.9,
+            'created_at': '2025-01-02T03:04:05.678000Z',
+            'uuid': '12345678-1234-5678-1234-567812345678',
+            'breakdown': {'1': 0, '5': 2},
+            'text': 'caf\u00e9 \u2028 line',
+        })
+
+    def test_malformed_body_is_a_parse_error(self):
+        response = self.client.post('/api/v1/users/login/', data=b'{"broken', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class MessagePackNegotiationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_decimal_round_trip_is_lossless(self):
+        payload = {'total': Decimal('1234567890.123456789'), 'when': datetime(2025, 1, 2, tzinfo=dt_timezone.utc)}
+        unpacked = MessagePackParser().parse(BytesIO(MessagePackRenderer().render(payload)))
+        self.assertEqual(unpacked, {'total': Decimal('1234567890.123456789'), 'when': '2025-01-02T00:00:00Z'})
+
+    def test_listing_negotiates_msgpack(self):
+        create_catalog(2)
+        response = self.client.get('/api/v1/products/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        body = MessagePackParser().parse(BytesIO(response.content))
+        json_body = self.client.get('/api/v1/products/', HTTP_ACCEPT='application/json').json()
+        self.assertEqual([item['id'] for item in body['data']], [item['id'] for item in json_body['data']])
+        self.assertEqual(body['data'][0]['original_price'], json_body['data'][0]['original_price'])
+
+        response = self.client.post(
+            '/api/v1/users/login/', data=MessagePackRenderer().render({'username': 'nobody', 'password': 'x'}),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertNotIn('parse error', str(MessagePackParser().parse(BytesIO(response.content))))
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        CompressionMiddleware.cache.clear()
+        CompressionMiddleware.metrics.reset()
+
+    def test_negotiation(self):
+        choose = CompressionMiddleware.choose_encoding
+        self.assertEqual(choose('gzip, deflate'), 'gzip')
+        self.assertIsNone(choose('identity'))
+        self.assertIsNone(choose('gzip;q=0'))
+        if brotli is not None:
+            self.assertEqual(choose('gzip, deflate, br'), 'br')
+            self.assertEqual(choose('br;q=0.5, gzip'), 'gzip')
+
+    def test_listing_is_compressed_once_per_body(self):
+        create_catalog(5)
+        plain = self.client.get('/api/v1/products/')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        for _ in range(2):
+            response = self.client.get('/api/v1/products/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.content), plain.content)
+            self.assertTrue(response['ETag'].startswith('W/'))
+
+        stats = CompressionMiddleware.stats()
+        self.assertEqual(stats['responses_compressed'], 2)
+        self.assertEqual(stats['cache_hits'], 1)
+        self.assertLess(stats['compression_ratio'], 1)
+
+        if brotli is not None:
+            response = self.client.get('/api/v1/products/', HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_small_bodies_are_not_compressed(self):
+        response = self.client.get('/api/v1/products/categories/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(response.content), 1024)
+        self.assertNotIn('Content-Encoding', response)
+
+
+class CategoryCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def counts(self, category):
+        category.refresh_from_db()
+        return category.product_count, category.in_stock_count, category.featured_count
+
+    def test_counters_follow_product_and_stock_writes(self):
+        products = create_catalog(3)
+        clothing = products[0].category
+        shoes = Category.objects.create(name="Shoes")
+        self.assertEqual(self.counts(clothing), (3, 3, 0))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [(c.name, c.product_count) for c in ProductServices.get_categories()], [("Clothing", 3)]
+            )
+
+        with CategoryCounters.track([products[0].id]):
+            Product.objects.filter(id=products[0].id).update(category=shoes, featured=True)
+        self.assertEqual(self.counts(clothing), (2, 2, 0))
+        self.assertEqual(self.counts(shoes), (1, 1, 1))
+
+        # Selling the last units takes the product out of the in-stock count, cancelling restores it
+        buyer = User.objects.create_user(username="buyer", password="pass12345")
+        order = OrderService.create_order(buyer, {'items': [
+            {'product_id': products[1].id, 'sku_id': sku.id, 'quantity': 5} for sku in products[1].skus.all()
+        ]})
+        self.assertEqual(self.counts(clothing), (2, 1, 0))
+        OrderService.cancel_order(buyer, order.id)
+        self.assertEqual(self.counts(clothing), (2, 2, 0))
+
+        response = self.client.get('/api/v1/products/categories/')
+        self.assertEqual(
+            [(c['name'], c['product_count'], c['in_stock_count'], c['featured_count']) for c in response.json()['data']],
+            [("Clothing", 2, 2, 0), ("Shoes", 1, 1, 1)],
+        )
+
+        with CategoryCounters.track([products[2].id]):
+            products[2].delete()
+        self.assertEqual(self.counts(clothing), (1, 1, 0))
+        self.assertEqual(CategoryCounters.reconcile(), [])
+
+    def test_reconcile_command(self):
+        products = create_catalog(2)
+        Category.objects.update(product_count=7, in_stock_count=0)
+
+        out = StringIO()
+        call_command('reconcile_category_counts', '--dry-run', stdout=out)
+        self.assertIn('Clothing', out.getvalue())
+        self.assertEqual(self.counts(products[0].category), (7, 0, 0))
+
+        call_command('reconcile_category_counts', stdout=StringIO())
+        self.assertEqual(self.counts(products[0].category), (2, 2, 0))
+
+
+class SkuAggregateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def aggregates(self, product):
+        product.refresh_from_db(fields=Product.SKU_AGGREGATE_FIELDS)
+        return tuple(getattr(product, field) for field in Product.SKU_AGGREGATE_FIELDS)
+
+    def test_columns_follow_orders_and_backfill(self):
+        product, other = create_catalog(2)
+        self.assertEqual(self.aggregates(product), (Decimal("39.00"), Decimal("49.00"), 10, 2))
+
+        buyer = User.objects.create_user(username="buyer", password="pass12345")
+        order = OrderService.create_order(buyer, {'items': [
+            {'product_id': product.id, 'sku_id': sku.id, 'quantity': 5} for sku in product.skus.all()
+        ]})
+        self.assertEqual(self.aggregates(product)[2], 0)
+        response = self.client.get('/api/v1/products/')
+        self.assertEqual([card['id'] for card in response.json()['data']], [other.id])
+
+        OrderService.update_order_status(order, Order.CANCELLED)
+        self.assertEqual(self.aggregates(product)[2], 10)
+
+        Product.objects.update(max_price=None, total_stock=0, sku_count=0)
+        out = StringIO()
+        call_command('refresh_sku_aggregates', '--batch-size', '1', stdout=out)
+        self.assertIn('2 products', out.getvalue())
+        self.assertEqual(self.aggregates(other), (Decimal("39.00"), Decimal("49.00"), 10, 2))
+        self.assertEqual(CategoryCounters.reconcile(), [])
+
+
+class AttributeRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        attribute_registry.invalidate()
+
+    def test_lookups_are_served_from_memory(self):
+        (product,) = create_catalog(1)
+        ProductAttribute.objects.create(type=ProductAttribute.SIZE, value="XL", deleted_at=timezone.now())
+        attribute_registry.invalidate()
+
+        with self.assertNumQueries(1):
+            size = attribute_registry.get("SIZE", " m ")
+            self.assertEqual((size.type, size.value), (ProductAttribute.SIZE, "M"))
+            self.assertEqual(attribute_registry.get_by_id(str(size.id), ProductAttribute.SIZE), size)
+            self.assertIsNone(attribute_registry.get_by_id(size.id, ProductAttribute.COLOR))
+            self.assertIsNone(attribute_registry.get(ProductAttribute.SIZE, "XL"))
+            self.assertEqual([a.value for a in attribute_registry.all(ProductAttribute.COLOR)], ["Red"])
+
+        # Checkout by size and color resolves through the registry
+        buyer = User.objects.create_user(username="buyer", password="pass12345")
+        order = OrderService.create_order(buyer, {'items': [
+            {'product_id': product.id, 'size': 'M', 'color': 'Red', 'quantity': 1}
+        ]})
+        self.assertEqual(order.items.get().sku.sku, "P-0-A")
+
+    def test_writes_invalidate_on_commit(self):
+        self.assertIsNone(attribute_registry.get(ProductAttribute.COLOR, "Teal"))
+        with self.captureOnCommitCallbacks(execute=True):
+            created = attribute_registry.get_or_create(ProductAttribute.COLOR, "Teal")
+        self.assertEqual(attribute_registry.get("color", "teal"), created)
+        with self.captureOnCommitCallbacks(execute=True):
+            created.delete()
+        self.assertIsNone(attribute_registry.get(ProductAttribute.COLOR, "Teal"))
+
+    def test_invalidate_keeps_serving_readers_until_reload(self):
+        create_catalog(1)
+        by_id, _ = attribute_registry._ensure_loaded()
+        attribute_registry.invalidate()
+        # A reader between invalidate() and the reload still sees the previous table
+        self.assertIs(attribute_registry._tables[0], by_id)
+        with self.assertNumQueries(1):
+            self.assertEqual(attribute_registry.get(ProductAttribute.SIZE, "M").value, "M")
+        self.assertIsNot(attribute_registry._tables[0], by_id)
+
+    def test_tables_past_max_age_reload_without_a_version_bump(self):
+        create_catalog(1)
+        attribute_registry._ensure_loaded()
+        # Written by another worker whose version bump this worker's cache never saw
+        ProductAttribute.objects.create(type=ProductAttribute.COLOR, value="Teal")
+        attribute_registry._checked_at = 0.0
+        self.assertIsNone(attribute_registry.get(ProductAttribute.COLOR, "Teal"))
+
+        attribute_registry._checked_at = 0.0
+        attribute_registry._loaded_at -= AttributeRegistry.MAX_AGE
+        self.assertEqual(attribute_registry.get(ProductAttribute.COLOR, "Teal").value, "Teal")
+
+
+class ProductDetailAggregateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_detail_view_stays_within_query_budget(self):
+        product = create_catalog(1)[0]
+        for idx in range(6):
+            user = User.objects.create_user(username=f"fan{idx}", password="pass12345", first_name=f"Fan{idx}")
+            ProductReview.objects.create(product=product, user=user, rating=5, comment="Great", helpful_count=idx)
+
+        with self.assertNumQueries(ProductDetailAggregate.QUERY_BUDGET):
+            response = self.client.get(f'/api/v1/products/{product.id}/')
+        data = response.json()['data']
+
+        self.assertEqual(data['product'], json.loads(json.dumps(
+            ProductSerializer(ProductServices.get_product(product.id)).data, cls=DjangoJSONEncoder
+        )))
+        self.assertEqual(data['skus'], FastProductSKUSerializer.serialize_queryset(
+            ProductServices.get_product_skus(product, include_out_of_stock=True)
+        ))
+        top_reviews = ProductReview.objects.filter(product=product).order_by('-helpful_count', '-created_at')[:5]
+        self.assertEqual([review['id'] for review in data['recent_reviews']], [review.id for review in top_reviews])
+        self.assertEqual(data['recent_reviews'][0]['user_name'], "Fan5")
+
+        self.assertEqual(self.client.get('/api/v1/products/999999/').status_code, 404)
+
+
+@override_settings(CO_PURCHASE_SETTLE_SECONDS=0)
+class CoPurchaseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def place(self, user, products, status=Order.PENDING):
+        order = Order.objects.create(user=user, total=Decimal("0.00"), status=status)
+        for product in products:
+            sku = product.skus.order_by('id').first()
+            OrderItem.objects.create(order=order, product=product, sku=sku, quantity=1, price=sku.price)
+
+    def pair_counts(self):
+        return dict(
+            ((a, b), orders) for a, b, orders in
+            ProductPairCount.objects.values_list('product_a_id', 'product_b_id', 'orders')
+        )
+
+    def test_incremental_counts_and_related_endpoint(self):
+        p0, p1, p2, p3 = create_catalog(4)
+        buyer = User.objects.create_user(username="buyer", password="pass12345")
+        self.place(buyer, [p0, p1, p2])
+        self.place(buyer, [p0, p1, p1])
+        self.place(buyer, [p0, p2], status=Order.CANCELLED)
+        self.place(buyer, [p1])
+
+        CoPurchases.update(batch_orders=2)
+        self.assertEqual(self.pair_counts(), {(p0.id, p1.id): 2, (p0.id, p2.id): 1, (p1.id, p2.id): 1})
+        self.assertEqual(CoPurchases.related_ids(p0.id, 10), [p1.id, p2.id])
+
+        # Only the new order is read on the next run
+        self.place(buyer, [p3, p2, p0])
+        self.assertEqual(CoPurchases.update()['orders'], 1)
+        self.assertEqual(CoPurchases.related_ids(p0.id, 10), [p1.id, p2.id, p3.id])
+        self.assertEqual(CoPurchases.related_ids(p3.id, 10), [p0.id, p2.id])
+        counts = self.pair_counts()
+        CoPurchases.rebuild()
+        self.assertEqual(self.pair_counts(), counts)
+
+        response = self.client.get(f'/api/v1/products/{p0.id}/related/?limit=2')
+        self.assertEqual([card['id'] for card in response.json()['data']], [p1.id, p2.id])
+        self.assertEqual(self.client.get('/api/v1/products/999999/related/').status_code, 404)
+
+    def test_recent_orders_wait_for_the_settle_margin(self):
+        p0, p1 = create_catalog(2)
+        buyer = User.objects.create_user(username="buyer", password="pass12345")
+        self.place(buyer, [p0, p1])
+        self.place(buyer, [p0, p1])
+        first, second = Order.objects.order_by('id').values_list('id', flat=True)
+        Order.objects.filter(id=second).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        # The newer-looking lower id blocks the batch, so it can't be skipped past
+        self.assertEqual(CoPurchases.update(settle_seconds=60)['orders'], 0)
+        Order.objects.filter(id=first).update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(CoPurchases.update(settle_seconds=60)['orders'], 2)
+        self.assertEqual(self.pair_counts(), {(p0.id, p1.id): 2})
+
+    def test_baskets_are_truncated(self):
+        product_a, product_b, counts = CoPurchases.count_pairs([1, 1, 1, 2], [5, 3, 9, 3], max_basket=2)
+        self.assertEqual(list(zip(product_a.tolist(), product_b.tolist(), counts.tolist())), [(3, 5, 1)])
+
+
+class SalesRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.buyer = User.objects.create_user(username="buyer", password="pass12345")
+
+    def buy(self, product, quantity):
+        sku = product.skus.order_by('id').first()
+        return OrderService.create_order(self.buyer, {'items': [
+            {'product_id': product.id, 'sku_id': sku.id, 'quantity': quantity}
+        ]})
+
+    def test_rollup_ranks_and_endpoints(self):
+        p0, p1, p2 = create_catalog(3)
+        self.buy(p0, 2)
+        self.buy(p1, 3)
+        cancelled = self.buy(p2, 4)
+        OrderService.cancel_order(self.buyer, cancelled.id)
+
+        # Orders from three weeks ago count towards 30 days but not trending
+        old = self.buy(p0, 2)
+        Order.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=21))
+        SalesRankings.rebuild_daily()
+
+        self.assertEqual(SalesRankings.refresh(), 2)
+        ranks = {r.product_id: r for r in ProductSalesRank.objects.all()}
+        self.assertEqual((ranks[p0.id].units_7d, ranks[p0.id].units_30d), (2, 4))
+        self.assertEqual([ranks[p0.id].bestseller_rank, ranks[p1.id].bestseller_rank], [1, 2])
+        self.assertEqual(SalesRankings.trending_ids(10), [p1.id, p0.id])
+
+        response = self.client.get('/api/v1/products/?sort=bestselling')
+        self.assertEqual([card['id'] for card in response.json()['data']][:2], [p0.id, p1.id])
+        response = self.client.get('/api/v1/products/trending/?limit=1')
+        self.assertEqual([card['id'] for card in response.json()['data']], [p1.id])
+
+    def test_cancellation_is_applied_incrementally(self):
+        (product,) = create_catalog(1)
+        order = self.buy(product, 3)
+        self.assertEqual(ProductDailySales.objects.get(product=product).units, 3)
+        OrderService.update_order_status(order, Order.CANCELLED)
+        self.assertEqual(ProductDailySales.objects.get(product=product).units, 0)
+        OrderService.update_order_status(order, Order.PROCESSING)
+        self.assertEqual(ProductDailySales.objects.get(product=product).units, 3)
+
+        SalesRankings.refresh()
+        self.assertEqual(Product.objects.get(id=product.id).recent_sales, 3)
+        OrderService.update_order_status(order, Order.CANCELLED)
+        SalesRankings.refresh()
+        self.assertEqual(Product.objects.get(id=product.id).recent_sales, 0)
+        self.assertFalse(ProductSalesRank.objects.exists())
+
+
+class SimilarIndexTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(SIMILAR_INDEX_DIR=self.tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_blocked_top_k_matches_full_similarity(self):
+        rng = np.random.default_rng(7)
+        vectors = rng.random((9, 5), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        rows, _ = SimilarIndex.top_k(vectors, 3, block_size=2)
+
+        full = vectors @ vectors.T
+        np.fill_diagonal(full, -np.inf)
+        np.testing.assert_array_equal(rows, np.argsort(-full, axis=1, kind='stable')[:, :3])
+
+    def test_neighbours_are_served_without_queries(self):
+        shirts, shoes = Category.objects.create(name="Shirts"), Category.objects.create(name="Shoes")
+        linen = Product.objects.create(category=shirts, name="Linen Shirt", summary="Breezy linen", description="Linen")
+        oxford = Product.objects.create(category=shirts, name="Oxford Shirt", summary="Cotton oxford", description="Cotton")
+        linen_blue = Product.objects.create(category=shirts, name="Blue Linen Shirt", summary="Breezy linen", description="Blue")
+        boots = Product.objects.create(category=shoes, name="Leather Boots", summary="Sturdy leather", description="Boots")
+        Product.objects.create(category=shoes, name="Suede Boots", summary="Soft suede", description="Boots")
+
+        call_command('build_similar_index', '--block-size', '2', stdout=StringIO())
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/v1/products/{linen.id}/similar/')
+        data = response.json()['data']
+        self.assertEqual([item['id'] for item in data[:2]], [linen_blue.id, oxford.id])
+        self.assertNotIn(boots.id, [item['id'] for item in data])
+        self.assertEqual(self.client.get('/api/v1/products/999999/similar/').json(), {'count': 0, 'data': []})
+
+    def test_builds_switch_versions_through_the_pointer_file(self):
+        shirts = Category.objects.create(name="Shirts")
+        linen = Product.objects.create(category=shirts, name="Linen Shirt", summary="Linen", description="Linen")
+        Product.objects.create(category=shirts, name="Blue Linen Shirt", summary="Linen", description="Blue")
+        index = SimilarIndex()
+        self.assertIsNone(index.version())
+
+        first = SimilarIndex.build()
+        self.assertEqual(index.version(), first["built_at"])
+        self.assertEqual(len(index.neighbours(linen.id, 5)), 1)
+        for _ in range(2):
+            tee = Product.objects.create(category=shirts, name="Linen Tee", summary="Linen", description="Tee")
+            latest = SimilarIndex.build()
+
+        root = Path(self.tmp.name)
+        versions = sorted(path.name for path in root.iterdir() if path.is_dir())
+        self.assertEqual(len(versions), SimilarIndex.KEEP_VERSIONS)
+        self.assertEqual((root / SimilarIndex.POINTER_FILE).read_text(), versions[-1])
+        self.assertEqual(index.version(), latest["built_at"])
+        self.assertEqual(index.neighbours(tee.id, 1)[0]["id"], tee.id - 1)
@@ -0,0 +1,228 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+class CompressedBodyCache:
+    """
+    Thread-safe LRU of compressed bodies keyed by (encoding, content hash).
+
+    Bounded both by entry count and by total compressed bytes, so a few
+    very large responses can't pin unbounded memory in a worker.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+class CompressionMetrics:
+    """Per-process compression counters reported by the health endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.compressed = 0
+        self.skipped = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        self.by_encoding = {}
+
+    def record(self, encoding, size_in, size_out, cpu_seconds, cache_hit):
+        with self._lock:
+            self.compressed += 1
+            self.cache_hits += int(cache_hit)
+            self.bytes_in += size_in
+            self.bytes_out += size_out
+            self.cpu_seconds += cpu_seconds
+            self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    def record_skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def snapshot(self):
+        with self._lock:
+            compressions = self.compressed - self.cache_hits
+            return {
+                "responses_compressed": self.compressed,
+                "responses_skipped": self.skipped,
+                "by_encoding": dict(self.by_encoding),
+                "cache_hits": self.cache_hits,
+                "cache_hit_ratio": round(self.cache_hits / self.compressed, 4) if self.compressed else None,
+                "compression_ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                "cpu_ms_per_compression": (
+                    round(self.cpu_seconds * 1000 / compressions, 3) if compressions else None
+                ),
+            }
+
+
+class CompressionMiddleware:
+    """
+    br/gzip compression for API responses.
+
+    Picks the best encoding the client accepts (brotli when available,
+    then gzip), leaves small, streaming, already-encoded or incompressible
+    responses alone, and reuses compressed bodies of identical content from
+    a bounded per-process cache, so hot catalog responses are compressed
+    once rather than on every request.
+    """
+
+    cache = CompressedBodyCache(
+        max_entries=settings.COMPRESSION_CACHE_ENTRIES,
+        max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES,
+    )
+    metrics = CompressionMetrics()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    @staticmethod
+    def accepted_encodings(header):
+        """{encoding: q} parsed from an Accept-Encoding header"""
+        encodings = {}
+        for part in header.split(","):
+            name, _, params = part.strip().partition(";")
+            name = name.strip().lower()
+            if not name:
+                continue
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            encodings[name] = q
+        return encodings
+
+    @classmethod
+    def choose_encoding(cls, header):
+        encodings = cls.accepted_encodings(header)
+        wildcard = encodings.get("*", 0.0)
+        candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+        best, best_q = None, 0.0
+        for encoding in candidates:
+            q = encodings.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    @staticmethod
+    def compress(encoding, content):
+        if encoding == "br":
+            return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+    def is_compressible(self, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return False
+        if len(response.content) < self.min_size:
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        # The representation depends on Accept-Encoding even when we don't compress
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not self.is_compressible(response):
+            self.metrics.record_skip()
+            return response
+        encoding = self.choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            self.metrics.record_skip()
+            return response
+
+        content = response.content
+        key = (encoding, hashlib.sha1(content).digest())
+        compressed = self.cache.get(key)
+        cache_hit = compressed is not None
+        cpu_seconds = 0.0
+        if not cache_hit:
+            started = time.thread_time()
+            compressed = self.compress(encoding, content)
+            cpu_seconds = time.thread_time() - started
+            self.cache.set(key, compressed)
+
+        if len(compressed) >= len(content):
+            self.metrics.record_skip()
+            return response
+
+        self.metrics.record(encoding, len(content), len(compressed), cpu_seconds, cache_hit)
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # A strong validator would be wrong for the re-encoded bytes
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+    @classmethod
+    def stats(cls):
+        return {
+            "brotli_available": brotli is not None,
+            **cls.metrics.snapshot(),
+            "cache": cls.cache.stats(),
+        }
@@ -3,6 +3,7 @@
 # =========================================================
 from pathlib import Path
 import os
+import importlib.util
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -52,6 +53,7 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "config.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -99,6 +101,110 @@ DATABASES = {
 }
 
 
+# =========================================================
+# ⚡ CACHING
+# =========================================================
+# Local-memory by default; point CACHE_BACKEND at
+# django.core.cache.backends.filebased.FileBasedCache (with CACHE_LOCATION
+# set to a directory) to share the catalog cache across worker processes.
+# Cache-held versions (catalog, attribute registry) only reach other workers
+# through a shared cache; with the default, attribute tables fall back to
+# AttributeRegistry.MAX_AGE.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "zuno-cache"),
+        "TIMEOUT": 300,
+    }
+}
+
+# Seconds a cached public catalog response may be served for
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "300"))
+
+# Per-worker typeahead index: key cap and full-rebuild interval (seconds).
+# Signals keep a worker's own index current; the rebuild picks up writes
+# made by other workers.
+SUGGEST_MAX_KEYS = int(os.getenv("SUGGEST_MAX_KEYS", "50000"))
+SUGGEST_INDEX_TTL = int(os.getenv("SUGGEST_INDEX_TTL", "600"))
+
+
+# =========================================================
+# 🗜️ RESPONSE COMPRESSION
+# =========================================================
+# br/gzip for API responses (WhiteNoise already serves compressed static
+# files). Bodies below COMPRESSION_MIN_SIZE are sent as-is; compressed
+# bodies are cached per worker by content hash, bounded by entry count
+# and total bytes.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_CACHE_ENTRIES = int(os.getenv("COMPRESSION_CACHE_ENTRIES", "256"))
+COMPRESSION_CACHE_MAX_BYTES = int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+# =========================================================
+# 🧠 RECOMMENDATIONS
+# =========================================================
+# "Frequently bought together": neighbours kept per product, items per
+# order considered (larger baskets are truncated), and orders processed
+# per incremental batch of build_co_purchases.
+CO_PURCHASE_TOP_K = int(os.getenv("CO_PURCHASE_TOP_K", "10"))
+CO_PURCHASE_MAX_BASKET = int(os.getenv("CO_PURCHASE_MAX_BASKET", "50"))
+CO_PURCHASE_BATCH_ORDERS = int(os.getenv("CO_PURCHASE_BATCH_ORDERS", "20000"))
+# Orders younger than this are left for the next run: order ids are taken
+# at INSERT but become visible at COMMIT, so a slow checkout can commit a
+# lower id after a higher one was consumed. Keep it above the longest
+# checkout transaction.
+CO_PURCHASE_SETTLE_SECONDS = int(os.getenv("CO_PURCHASE_SETTLE_SECONDS", "300"))
+
+# Content-based "similar items" built by build_similar_index: output
+# directory of the memory-mapped neighbour arrays, neighbours per product,
+# TF-IDF vocabulary cap and row/column block size of the similarity matmul.
+SIMILAR_INDEX_DIR = Path(os.getenv("SIMILAR_INDEX_DIR", BASE_DIR / "var" / "similar"))
+SIMILAR_TOP_K = int(os.getenv("SIMILAR_TOP_K", "10"))
+SIMILAR_MAX_FEATURES = int(os.getenv("SIMILAR_MAX_FEATURES", "4096"))
+SIMILAR_BLOCK_SIZE = int(os.getenv("SIMILAR_BLOCK_SIZE", "1024"))
+
+
+# =========================================================
+# 📦 INVENTORY
+# =========================================================
+# How checkout takes stock. "locking" locks every SKU of the order
+# (SELECT ... FOR UPDATE, in id order) before checking and decrementing.
+# "conditional" reads without locks and decrements with a guarded
+# UPDATE ... WHERE quantity >= n as the last statement before commit, so
+# hot SKUs are only locked from the decrement to commit; product rows
+# (in_stock, aggregates, popularity) are then left to settle_sales.
+# Compare both with benchmark_inventory on PostgreSQL or MySQL.
+INVENTORY_STRATEGY = os.getenv("INVENTORY_STRATEGY", "locking")
+
+# Cart stock holds (/api/v1/cart/reservations/): default lifetime of a
+# hold and rows deleted per statement by expire_reservations. Expired holds
+# stop counting immediately; the sweeper only reclaims the rows.
+RESERVATION_TTL_SECONDS = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+RESERVATION_MAX_TTL_SECONDS = int(os.getenv("RESERVATION_MAX_TTL_SECONDS", "3600"))
+RESERVATION_SWEEP_BATCH = int(os.getenv("RESERVATION_SWEEP_BATCH", "1000"))
+
+# Stripes used by the "Stripe stock" admin action. A striped SKU's stock is
+# split across that many rows and each checkout decrements a random
+# non-empty one, so concurrent buyers of one hot SKU rarely wait on the
+# same row; compare stripe counts with benchmark_stripes.
+INVENTORY_STRIPES = int(os.getenv("INVENTORY_STRIPES", "8"))
+
+# Checkouts of striped SKUs (and all checkouts with the conditional
+# strategy) leave the product rows alone; settle_sales
+# (run it every minute from cron) refreshes stock mirrors, in_stock and
+# aggregates and folds their PendingSale rows into popularity and daily
+# sales, this many rows per transaction.
+SALE_SETTLE_BATCH = int(os.getenv("SALE_SETTLE_BATCH", "1000"))
+
+# Rows each coupon's use count is spread over. Checkouts with one campaign
+# code increment a random shard instead of queueing on the coupon row;
+# each shard holds at most its share of the usage limit, so the limit is
+# never overshot. Compare with benchmark_coupons.
+COUPON_USAGE_SHARDS = int(os.getenv("COUPON_USAGE_SHARDS", "8"))
+
+
 # =========================================================
 # 🔑 AUTHENTICATION & USER MODEL
 # =========================================================
@@ -115,6 +221,8 @@ AUTH_PASSWORD_VALIDATORS = [
 # =========================================================
 # 🔐 DJANGO REST FRAMEWORK
 # =========================================================
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -122,6 +230,19 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
+    # orjson-backed JSON; the browsable API is only enabled in DEBUG.
+    # MessagePack is negotiated via Accept/Content-Type when msgpack is installed.
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.v1.renderers.FastJSONRenderer",
+        *(("api.v1.renderers.MessagePackRenderer",) if MSGPACK_AVAILABLE else ()),
+        *(("rest_framework.renderers.BrowsableAPIRenderer",) if DEBUG else ()),
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.v1.renderers.FastJSONParser",
+        *(("api.v1.renderers.MessagePackParser",) if MSGPACK_AVAILABLE else ()),
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 # =========================================================
@@ -1,4 +1,12 @@
 from .base import *
 
 DEBUG = True
+
+# base.py decided renderers before DEBUG was forced on here
+if "rest_framework.renderers.BrowsableAPIRenderer" not in REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"]:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
+        *REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"],
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    )
+
 ALLOWED_HOSTS = ["*"]
@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
 
 application = get_wsgi_application()
+
+# Warm the typeahead index per worker so the first keystroke doesn't pay for the build
+from api.v1.products.suggest import suggest_index  # noqa: E402
+
+try:
+    suggest_index.build()
+except Exception:  # e.g. database not migrated yet; the index builds on first use
+    logging.getLogger(__name__).exception("Suggest index warm-up failed")
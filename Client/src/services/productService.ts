@@ -29,6 +29,7 @@ interface BackendProduct {
 
 interface ProductListResponse {
   count: number
+  next_cursor?: string | null
   data: BackendProduct[]
 }
 
@@ -76,11 +77,29 @@ const transformProduct = (backendProduct: BackendProduct): Product => {
   }
 }
 
+// Largest page the backend serves (KeysetPaginator.MAX_LIMIT)
+const PAGE_LIMIT = 100
+
+// The product list is cursor-paginated: follow next_cursor until the last page,
+// or until `max` products have been fetched
+const fetchProductPages = async (params: Record<string, string> = {}, max?: number): Promise<BackendProduct[]> => {
+  const products: BackendProduct[] = []
+  let cursor: string | null | undefined = undefined
+  do {
+    const response: { data: ProductListResponse } = await api.get<ProductListResponse>('/products', {
+      params: { ...params, limit: max ? Math.min(max - products.length, PAGE_LIMIT) : PAGE_LIMIT, ...(cursor ? { cursor } : {}) }
+    })
+    products.push(...response.data.data)
+    cursor = response.data.next_cursor
+  } while (cursor && (!max || products.length < max))
+  return products
+}
+
 export const productService = {
   getAllProducts: async (): Promise<Product[]> => {
     try {
-      const response = await api.get<ProductListResponse>('/products')
-      return response.data.data.map(transformProduct)
+      const products = await fetchProductPages()
+      return products.map(transformProduct)
     } catch (error) {
       console.error('Failed to fetch products:', error)
       return []
@@ -139,11 +158,8 @@ export const productService = {
 
   getFeaturedProducts: async (limit?: number): Promise<Product[]> => {
     try {
-      const response = await api.get<ProductListResponse>('/products', {
-        params: { featured: 'true' }
-      })
-      const products = response.data.data.map(transformProduct)
-      return limit ? products.slice(0, limit) : products
+      const products = await fetchProductPages({ featured: 'true' }, limit)
+      return products.map(transformProduct)
     } catch (error) {
       console.error('Failed to fetch featured products:', error)
       return []
@@ -152,10 +168,8 @@ export const productService = {
 
   getProductsByCategory: async (category: string): Promise<Product[]> => {
     try {
-      const response = await api.get<ProductListResponse>('/products', {
-        params: { category }
-      })
-      return response.data.data.map(transformProduct)
+      const products = await fetchProductPages({ category })
+      return products.map(transformProduct)
     } catch (error) {
       console.error('Failed to fetch products by category:', error)
       return []